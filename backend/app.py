@@ -3,63 +3,66 @@ Dashboard Web - Backend FastAPI
 Substituição Total do Power BI
 """
 
-import json
 import os
-import time
 from contextlib import asynccontextmanager
-from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 # Imports relativos para funcionar quando executado da raiz
 try:
     # Tentar import absoluto primeiro (desenvolvimento local)
     from routes import (
-        entradas, encerramentos, saldo, mapas, indicadores
+        entradas, encerramentos, saldo, mapas, indicadores, casos, busca, exportacao, atualizacoes, diff
     )
+    from services.compressao import CompressaoMiddleware
+    from services.metrics import MetricsMiddleware, gerar_metricas
+    from services.timing import ServerTimingMiddleware, TimedJSONResponse
+    from services import atualizacoes as avisos, logs, warmup
 except ImportError:
     # Se falhar, tentar import relativo (produção/deploy)
     from backend.routes import (
-        entradas, encerramentos, saldo, mapas, indicadores
+        entradas, encerramentos, saldo, mapas, indicadores, casos, busca, exportacao, atualizacoes, diff
     )
-
-# Debug log (apenas em desenvolvimento)
-_DEBUG_LOG = None
-if os.getenv("ENVIRONMENT", "development") == "development":
-    try:
-        # Tentar criar log apenas se estiver em desenvolvimento e o diretório existir
-        debug_dir = Path(__file__).parent.parent / ".cursor"
-        if debug_dir.exists():
-            _DEBUG_LOG = debug_dir / "debug.log"
-    except:
-        _DEBUG_LOG = None
-
+    from backend.services.compressao import CompressaoMiddleware
+    from backend.services.metrics import MetricsMiddleware, gerar_metricas
+    from backend.services.timing import ServerTimingMiddleware, TimedJSONResponse
+    from backend.services import atualizacoes as avisos, logs, warmup
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    # #region agent log
-    if _DEBUG_LOG:
-        try:
-            _DEBUG_LOG.parent.mkdir(parents=True, exist_ok=True)
-            with open(_DEBUG_LOG, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"timestamp":int(time.time()*1000),"location":"app.startup","message":"backend_started","data":{"port_note":"bind_ok_if_this_log_exists"},"sessionId":"debug-session","hypothesisId":"H4"}) + "\n")
-        except Exception: pass
-    # #endregion
+    logs.evento("app.startup", "backend_started", {"port_note": "bind_ok_if_this_log_exists"}, hipotese="H4")
+    # Carga da base e pré-cálculo das respostas em segundo plano (progresso em /ready)
+    warmup.iniciar(app)
+    # Verificação periódica dos arquivos da base: nova geração → aviso SSE em /api/atualizacoes
+    avisos.iniciar(app)
 
-    # Shutdown (se necessário adicionar código aqui)
     yield
 
+    # Shutdown: interrompe o aquecimento e grava os eventos ainda na fila de logs
+    warmup.parar()
+    avisos.parar()
+    logs.parar()
+
 
 app = FastAPI(
     title="Dashboard Executivo",
     description="Dashboard Web - Substituição do Power BI",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse
 )
 
+# gzip/brotli acima de COMPRESSAO_MIN_BYTES (rotas em cache já chegam comprimidas uma vez por
+# entrada); o mais interno, para que o span 'compressao' entre no Server-Timing.
+app.add_middleware(CompressaoMiddleware)
+
+# Server-Timing por etapa (cópia, filtro, agregação, serialização, JSON) e ?profile=1.
+# Registrado antes do CORS para que a resposta de perfil também receba os cabeçalhos CORS.
+app.add_middleware(ServerTimingMiddleware)
+
 # CORS para permitir requisições do frontend
 # Para produção, configure allow_origins com URLs específicas
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
@@ -82,12 +85,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latência e tamanho por rota (Prometheus); registrado por último = mais externo, mede CORS incluso
+app.add_middleware(MetricsMiddleware, ignorar=('/metrics', '/api/atualizacoes'))
+
 # Registrar rotas
 app.include_router(entradas.router, prefix="/api/entradas", tags=["Entradas"])
 app.include_router(encerramentos.router, prefix="/api/encerramentos", tags=["Encerramentos"])
 app.include_router(saldo.router, prefix="/api/saldo", tags=["Saldo"])
 app.include_router(mapas.router, prefix="/api/mapas", tags=["Mapas"])
 app.include_router(indicadores.router, prefix="/api/indicadores", tags=["Indicadores"])
+app.include_router(casos.router, prefix="/api/casos", tags=["Casos"])
+app.include_router(busca.router, prefix="/api/busca", tags=["Busca"])
+app.include_router(exportacao.router, prefix="/api/exportar", tags=["Exportação"])
+app.include_router(atualizacoes.router, prefix="/api/atualizacoes", tags=["Atualizações"])
+app.include_router(diff.router, prefix="/api/diff", tags=["Diferenças"])
 
 
 @app.get("/")
@@ -100,6 +111,19 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def ready():
+    """Prontidão do worker: 200 só com a base carregada e as respostas padrão/por UF aquecidas"""
+    return JSONResponse(content=warmup.status(), status_code=200 if warmup.pronto() else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas no formato texto do Prometheus (agregadas entre workers do gunicorn)"""
+    conteudo, content_type = gerar_metricas()
+    return Response(content=conteudo, media_type=content_type)
+
+
 # Via CLI: python -m uvicorn app:app --host 127.0.0.1 --port 8001
 # (api.js usa 8001; se 10048, libere a porta ou use --port 8002 e altere API_BASE_URL no frontend)
 if __name__ == "__main__":
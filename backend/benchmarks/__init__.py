@@ -0,0 +1,5 @@
+"""
+Benchmarks do backend
+Gerador de base sintética (mesmo esquema de DataLoader._map_columns) e harness
+que mede as funções públicas de agregação/transformação e o pipeline de carga.
+"""
@@ -0,0 +1,156 @@
+"""
+Cold Start Serverless (emulação local)
+Cada rodada é um processo Python novo, como um container Lambda recém-criado: importa
+lambda_handler (localizar snapshot + imports + carga) e invoca o handler com eventos do
+API Gateway (HTTP API v2). Mede o init, a primeira resposta (fria) e a segunda (quente,
+cache do container) e compara com ORCAMENTO_COLD_START_S.
+
+Uso (a partir de backend/):
+    python -m benchmarks.cold_start --sintetico 200k --rodadas 3
+    python -m benchmarks.cold_start --snapshot data/snapshot.pkl --falhar
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PASTA_BACKEND = Path(__file__).resolve().parent.parent
+
+# Rotas da primeira dobra da página (as primeiras chamadas após abrir o dashboard)
+ROTAS_PADRAO = ('/api/indicadores/kpis-finais', '/api/mapas/nacional', '/api/entradas/por-objeto')
+
+# Executado no processo filho: o "container"
+_CODIGO_CONTAINER = r'''
+import json, sys, time
+inicio = time.perf_counter()
+import lambda_handler
+init_s = time.perf_counter() - inicio
+
+def evento(caminho):
+    caminho, _, query = caminho.partition('?')
+    return {
+        'version': '2.0', 'routeKey': '$default', 'rawPath': caminho, 'rawQueryString': query,
+        'headers': {'host': 'localhost', 'accept': 'application/json'},
+        'requestContext': {
+            'http': {'method': 'GET', 'path': caminho, 'protocol': 'HTTP/1.1',
+                     'sourceIp': '127.0.0.1', 'userAgent': 'cold-start'},
+            'requestId': 'local', 'routeKey': '$default', 'stage': '$default',
+            'accountId': 'local', 'apiId': 'local', 'domainName': 'localhost',
+            'domainPrefix': 'localhost', 'timeEpoch': 0,
+        },
+        'isBase64Encoded': False,
+    }
+
+class Contexto:
+    function_name = 'dashboard-local'
+    aws_request_id = 'local'
+    def get_remaining_time_in_millis(self):
+        return 30000
+
+requisicoes = []
+for rota in json.loads(sys.argv[1]):
+    for tentativa in ('fria', 'quente'):
+        t = time.perf_counter()
+        resposta = lambda_handler.handler(evento(rota), Contexto())
+        requisicoes.append({'rota': rota, 'tipo': tentativa, 'status': resposta['statusCode'],
+                            'duracao_s': time.perf_counter() - t, 'bytes': len(resposta.get('body') or '')})
+print(json.dumps({'init_s': init_s, 'tempos_init': lambda_handler.TEMPOS_INIT,
+                  'orcamento_s': lambda_handler.ORCAMENTO_COLD_START_S, 'requisicoes': requisicoes}))
+'''
+
+
+def rodar_container(snapshot: Path, rotas: List[str]) -> Dict[str, Any]:
+    """Um cold start em processo novo; devolve os tempos medidos no filho"""
+    env = {**os.environ, 'DATA_SNAPSHOT': str(snapshot)}
+    # Qualquer valor em PYTHONDONTWRITEBYTECODE (até '0') impede gravar .pyc. Sem ele, a
+    # primeira rodada compila e as demais importam o bytecode, como um pacote de deploy
+    # que já leva os __pycache__: o init medido é carga + imports, não compilação.
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    resultado = subprocess.run(
+        [sys.executable, '-c', _CODIGO_CONTAINER, json.dumps(rotas)],
+        cwd=PASTA_BACKEND, env=env, capture_output=True, text=True, check=False,
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(f"container falhou:\n{resultado.stderr[-2000:]}")
+    # A última linha é o JSON; antes dela vêm os prints da carga
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def resumir(rodadas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Medianas entre rodadas: init por etapa, primeira resposta e cold start total"""
+    def mediana(valores):
+        return statistics.median(valores) if valores else 0.0
+
+    primeira = [r['requisicoes'][0]['duracao_s'] for r in rodadas]
+    resumo = {
+        'rodadas': len(rodadas),
+        'registros': rodadas[0]['tempos_init'].get('registros'),
+        'origem': rodadas[0]['tempos_init'].get('origem'),
+        'init_s': mediana([r['init_s'] for r in rodadas]),
+        'imports_s': mediana([r['tempos_init']['imports_s'] for r in rodadas]),
+        'carga_s': mediana([r['tempos_init']['carga_s'] for r in rodadas]),
+        'primeira_resposta_s': mediana(primeira),
+        'cold_start_s': mediana([r['init_s'] + p for r, p in zip(rodadas, primeira)]),
+        'orcamento_s': rodadas[0]['orcamento_s'],
+        'por_rota': {},
+    }
+    for req in rodadas[0]['requisicoes']:
+        chave = req['rota']
+        tempos = [x['duracao_s'] for r in rodadas for x in r['requisicoes']
+                  if x['rota'] == chave and x['tipo'] == req['tipo']]
+        resumo['por_rota'].setdefault(chave, {})[req['tipo']] = mediana(tempos)
+        resumo['por_rota'][chave]['status'] = req['status']
+    resumo['dentro_orcamento'] = resumo['cold_start_s'] <= resumo['orcamento_s']
+    return resumo
+
+
+def imprimir(resumo: Dict[str, Any]) -> None:
+    print(f"\nCold start ({resumo['rodadas']} rodadas, {resumo['registros']} registros, origem {resumo['origem']})")
+    print(f"  imports          {resumo['imports_s'] * 1000:8.0f} ms")
+    print(f"  carga            {resumo['carga_s'] * 1000:8.0f} ms")
+    print(f"  init total       {resumo['init_s'] * 1000:8.0f} ms")
+    print(f"  1ª resposta      {resumo['primeira_resposta_s'] * 1000:8.0f} ms")
+    print(f"  cold start       {resumo['cold_start_s'] * 1000:8.0f} ms  "
+          f"(orçamento {resumo['orcamento_s'] * 1000:.0f} ms: {'OK' if resumo['dentro_orcamento'] else 'ESTOUROU'})")
+    print(f"\n{'rota':<45} {'fria':>10} {'quente':>10}  status")
+    for rota, tempos in resumo['por_rota'].items():
+        print(f"{rota:<45} {tempos.get('fria', 0) * 1000:8.1f}ms {tempos.get('quente', 0) * 1000:8.1f}ms  {tempos['status']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Emula cold starts do handler serverless')
+    parser.add_argument('--snapshot', default=None, help='Snapshot a usar (padrão: data/snapshot.pkl)')
+    parser.add_argument('--sintetico', default=None, help='Gerar snapshot temporário com base sintética (ex.: 200k)')
+    parser.add_argument('--rodadas', type=int, default=3, help='Cold starts (processos novos) a medir')
+    parser.add_argument('--rotas', default=','.join(ROTAS_PADRAO), help='Rotas invocadas após o init')
+    parser.add_argument('--salvar', default=None, help='Arquivo JSON com o resumo')
+    parser.add_argument('--falhar', action='store_true', help='Código de saída 1 se estourar o orçamento')
+    args = parser.parse_args(argv)
+
+    if args.sintetico:
+        snapshot = Path(tempfile.mkdtemp(prefix='cold_start_')) / 'snapshot.pkl'
+        from build_snapshot import main as gerar_snapshot
+        gerar_snapshot(['--sintetico', args.sintetico, '--saida', str(snapshot)])
+    else:
+        snapshot = Path(args.snapshot) if args.snapshot else PASTA_BACKEND / 'data' / 'snapshot.pkl'
+    if not snapshot.exists():
+        print(f"Snapshot não encontrado: {snapshot} (gere com python build_snapshot.py)")
+        return 2
+
+    rotas = [r.strip() for r in args.rotas.split(',') if r.strip()]
+    rodadas = [rodar_container(snapshot, rotas) for _ in range(args.rodadas)]
+    resumo = resumir(rodadas)
+    imprimir(resumo)
+    if args.salvar:
+        Path(args.salvar).write_text(json.dumps(resumo, indent=2, ensure_ascii=False), encoding='utf-8')
+    return 1 if args.falhar and not resumo['dentro_orcamento'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""
+Teste de Carga da Página
+Reproduz a sequência de chamadas que o frontend (api.js, scroll.js, sequence.js) faz por
+visita, com filtros cruzados aleatórios de UF/objeto, contra uma instância local
+(uvicorn ou gunicorn). Mede p50/p95/p99 por endpoint e o tempo total da página por
+número de usuários virtuais simultâneos.
+
+Uso (a partir de backend/, com o servidor rodando):
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8001 --usuarios 1,10,50 --visitas 5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+# Seções na ordem do index.html → chamadas feitas pelos loaders (scroll.js) e gráficos
+# (charts.js/maps.js). Chamadas de uma mesma seção são sequenciais (awaits em série).
+SECOES_PAGINA: List[Tuple[str, List[str]]] = [
+    ('capa', ['/api/indicadores/kpis-finais']),
+    ('entradas-encerrados', ['/api/entradas/por-objeto', '/api/encerramentos/por-objeto']),
+    ('saldo-entradas-encerramentos', ['/api/saldo/por-objeto', '/api/saldo/', '/api/saldo/']),
+    ('estatisticas-gerais', ['/api/indicadores/estatisticas-gerais']),
+    ('dashboard-acoes-ganhas-perdidas', ['/api/indicadores/acoes-ganhas-perdidas',
+                                         '/api/indicadores/acoes-ganhas-perdidas']),
+    ('evolucao', ['/api/indicadores/evolucao']),
+    ('slide-analise-impacto', ['/api/indicadores/analise-correlacao', '/api/mapas/capitais']),
+    ('sla-area', ['/api/indicadores/sla-area', '/api/indicadores/solicitacoes-prazo-por-area',
+                  '/api/indicadores/solicitacoes-prazo']),
+    ('volume-custo', ['/api/indicadores/volume-custo']),
+    ('reiteracoes', ['/api/indicadores/reiteracoes']),
+    ('pareto-impacto', ['/api/indicadores/pareto']),
+    ('casos-criticos-sentencas', ['/api/indicadores/casos-criticos', '/api/indicadores/sentencas-por-area',
+                                  '/api/indicadores/sentencas']),
+    ('reincidencia', ['/api/indicadores/reincidencia', '/api/indicadores/reincidencia-por-cliente']),
+    ('tipos-acoes-reincidencia', ['/api/indicadores/tipos-acoes-2025', '/api/indicadores/reincidencia',
+                                  '/api/indicadores/reincidencia-por-cliente']),
+    ('erro-sistemico-prejuizo', ['/api/indicadores/erro-sistemico', '/api/indicadores/erro-sistemico']),
+    ('maior-reiteracao', ['/api/indicadores/maior-reiteracao']),
+]
+
+# Conexões simultâneas por usuário (limite dos navegadores por host em HTTP/1.1)
+CONEXOES_POR_USUARIO = 6
+
+# Nomes de parâmetro aceitos pelas rotas para cada filtro global
+PARAMETROS_UF = ('estado', 'uf')
+PARAMETROS_OBJETO = ('objeto', 'filtro_objeto')
+
+PERCENTIS = (50, 95, 99)
+
+
+def _importar_httpx():
+    try:
+        import httpx
+        return httpx
+    except ImportError:
+        print("Este script requer httpx: pip install -r requirements-dev.txt")
+        sys.exit(2)
+
+
+def percentil(valores: Sequence[float], p: float) -> float:
+    """Percentil por posição mais próxima (nearest-rank) de uma lista de tempos"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+def resumo_tempos(valores: Sequence[float]) -> Dict[str, Any]:
+    resumo = {'n': len(valores)}
+    for p in PERCENTIS:
+        resumo[f'p{p}_ms'] = round(percentil(valores, p) * 1000, 2)
+    resumo['max_ms'] = round(max(valores) * 1000, 2) if valores else 0.0
+    return resumo
+
+
+class Coletor:
+    """Tempos por endpoint, por página e erros de uma rodada"""
+
+    def __init__(self):
+        self.por_endpoint: Dict[str, List[float]] = {}
+        self.paginas: List[float] = []
+        self.erros: Dict[str, int] = {}
+        self.bytes = 0
+        self.requisicoes = 0
+
+    def registrar(self, caminho: str, decorrido: float, status: Optional[int], tamanho: int) -> None:
+        self.requisicoes += 1
+        self.bytes += tamanho
+        if status is None or status >= 400:
+            chave = f"{caminho} [{status or 'falha'}]"
+            self.erros[chave] = self.erros.get(chave, 0) + 1
+            return
+        self.por_endpoint.setdefault(caminho, []).append(decorrido)
+
+
+async def descobrir_parametros(cliente, base_url: str) -> Dict[str, Set[str]]:
+    """Parâmetros de query aceitos por rota, lidos do /openapi.json do servidor"""
+    resposta = await cliente.get(f"{base_url}/openapi.json")
+    resposta.raise_for_status()
+    parametros = {}
+    for caminho, metodos in resposta.json().get('paths', {}).items():
+        operacao = metodos.get('get') or {}
+        parametros[caminho] = {p['name'] for p in operacao.get('parameters', []) if p.get('in') == 'query'}
+    return parametros
+
+
+async def descobrir_filtros(cliente, base_url: str) -> Tuple[List[str], List[str]]:
+    """UFs e objetos presentes na base (para sortear filtros realistas)"""
+    ufs, objetos = [], []
+    try:
+        mapa = (await cliente.get(f"{base_url}/api/mapas/nacional")).json()
+        ufs = [e['estado'] for e in mapa.get('estados', []) if e.get('estado') and e['estado'] != 'Não Informado']
+        impacto = (await cliente.get(f"{base_url}/api/indicadores/casos-impacto")).json()
+        objetos = [d['objeto'] for d in impacto.get('dados', []) if d.get('objeto')]
+    except Exception as e:
+        print(f"Aviso: não foi possível descobrir UFs/objetos ({e}); usando apenas a visão nacional")
+    return ufs, objetos
+
+
+def montar_query(caminho: str, parametros: Dict[str, Set[str]], uf: Optional[str],
+                 objeto: Optional[str]) -> Dict[str, str]:
+    """Aplica os filtros globais apenas nas rotas que os aceitam (como o frontend faria)"""
+    aceitos = parametros.get(caminho, set())
+    query = {}
+    if uf:
+        nome = next((p for p in PARAMETROS_UF if p in aceitos), None)
+        if nome:
+            query[nome] = uf
+    if objeto:
+        nome = next((p for p in PARAMETROS_OBJETO if p in aceitos), None)
+        if nome:
+            query[nome] = objeto
+    return query
+
+
+async def visitar(cliente, base_url: str, coletor: Coletor, parametros: Dict[str, Set[str]],
+                  uf: Optional[str], objeto: Optional[str], pensar_s: float) -> None:
+    """
+    Uma visita completa: seções em paralelo (rolagem rápida dispara vários observers),
+    chamadas de cada seção em série, até CONEXOES_POR_USUARIO requisições em voo.
+    """
+    semaforo = asyncio.Semaphore(CONEXOES_POR_USUARIO)
+
+    async def chamar(caminho: str) -> None:
+        async with semaforo:
+            inicio = time.perf_counter()
+            status, tamanho = None, 0
+            try:
+                resposta = await cliente.get(base_url + caminho, params=montar_query(caminho, parametros, uf, objeto))
+                status, tamanho = resposta.status_code, len(resposta.content)
+            except Exception:
+                pass
+            coletor.registrar(caminho, time.perf_counter() - inicio, status, tamanho)
+
+    async def secao(indice: int, chamadas: List[str]) -> None:
+        if pensar_s:
+            await asyncio.sleep(indice * pensar_s)
+        for caminho in chamadas:
+            await chamar(caminho)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(secao(i, chamadas) for i, (_, chamadas) in enumerate(SECOES_PAGINA)))
+    coletor.paginas.append(time.perf_counter() - inicio)
+
+
+async def usuario_virtual(cliente, base_url: str, coletor: Coletor, parametros: Dict[str, Set[str]],
+                          ufs: List[str], objetos: List[str], visitas: int, prob_uf: float,
+                          prob_objeto: float, pensar_s: float, rng: random.Random) -> None:
+    for _ in range(visitas):
+        uf = rng.choice(ufs) if ufs and rng.random() < prob_uf else None
+        objeto = rng.choice(objetos) if objetos and rng.random() < prob_objeto else None
+        await visitar(cliente, base_url, coletor, parametros, uf, objeto, pensar_s)
+
+
+async def rodada(base_url: str, usuarios: int, visitas: int, prob_uf: float, prob_objeto: float,
+                 pensar_s: float, seed: int, timeout_s: float) -> Dict[str, Any]:
+    """N usuários simultâneos, cada um com `visitas` visitas completas à página"""
+    httpx = _importar_httpx()
+    limites = httpx.Limits(max_connections=usuarios * CONEXOES_POR_USUARIO,
+                           max_keepalive_connections=usuarios * CONEXOES_POR_USUARIO)
+    async with httpx.AsyncClient(timeout=timeout_s, limits=limites) as cliente:
+        parametros = await descobrir_parametros(cliente, base_url)
+        ufs, objetos = await descobrir_filtros(cliente, base_url)
+        coletor = Coletor()
+        inicio = time.perf_counter()
+        await asyncio.gather(*(
+            usuario_virtual(cliente, base_url, coletor, parametros, ufs, objetos, visitas,
+                            prob_uf, prob_objeto, pensar_s, random.Random(seed + i))
+            for i in range(usuarios)
+        ))
+        duracao = time.perf_counter() - inicio
+
+    return {
+        'usuarios': usuarios,
+        'visitas_por_usuario': visitas,
+        'duracao_s': round(duracao, 3),
+        'requisicoes': coletor.requisicoes,
+        'requisicoes_por_s': round(coletor.requisicoes / duracao, 2) if duracao else 0.0,
+        'mb_recebidos': round(coletor.bytes / 1e6, 2),
+        'pagina': resumo_tempos(coletor.paginas),
+        'endpoints': {caminho: resumo_tempos(tempos) for caminho, tempos in sorted(coletor.por_endpoint.items())},
+        'erros': coletor.erros,
+    }
+
+
+def imprimir(resultado: Dict[str, Any]) -> None:
+    pagina = resultado['pagina']
+    print(f"\n=== {resultado['usuarios']} usuário(s) x {resultado['visitas_por_usuario']} visita(s) "
+          f"— {resultado['requisicoes']} req em {resultado['duracao_s']} s "
+          f"({resultado['requisicoes_por_s']} req/s, {resultado['mb_recebidos']} MB) ===")
+    print(f"Página completa: p50 {pagina['p50_ms']} ms | p95 {pagina['p95_ms']} ms | "
+          f"p99 {pagina['p99_ms']} ms | máx {pagina['max_ms']} ms")
+    print(f"  {'endpoint':<52}{'n':>6}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}")
+    for caminho, r in sorted(resultado['endpoints'].items(), key=lambda x: -x[1]['p95_ms']):
+        print(f"  {caminho:<52}{r['n']:>6}{r['p50_ms']:>11}{r['p95_ms']:>11}{r['p99_ms']:>11}")
+    for chave, qtd in resultado['erros'].items():
+        print(f"  ERRO {chave}: {qtd}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Teste de carga reproduzindo as chamadas da página')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8001', help='Origem do backend (sem /api)')
+    parser.add_argument('--usuarios', default='1,10', help='Lista de usuários simultâneos (uma rodada por valor)')
+    parser.add_argument('--visitas', type=int, default=3, help='Visitas completas por usuário em cada rodada')
+    parser.add_argument('--prob-uf', type=float, default=0.5, help='Probabilidade de a visita filtrar por UF')
+    parser.add_argument('--prob-objeto', type=float, default=0.3, help='Probabilidade de filtrar por objeto')
+    parser.add_argument('--pensar', type=float, default=0.0,
+                        help='Segundos entre o início de seções consecutivas (0 = rolagem instantânea)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--salvar', default=None, help='Arquivo JSON com o resultado de todas as rodadas')
+    args = parser.parse_args(argv)
+
+    base_url = args.base_url.rstrip('/')
+    resultados = []
+    for usuarios in [int(u) for u in args.usuarios.split(',') if u.strip()]:
+        resultado = asyncio.run(rodada(base_url, usuarios, args.visitas, args.prob_uf, args.prob_objeto,
+                                       args.pensar, args.seed, args.timeout))
+        imprimir(resultado)
+        resultados.append(resultado)
+
+    if args.salvar:
+        destino = Path(args.salvar)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        destino.write_text(json.dumps({'base_url': base_url, 'rodadas': resultados}, indent=2, ensure_ascii=False),
+                           encoding='utf-8')
+        print(f"\nResultado gravado em {destino}")
+    return 1 if any(r['erros'] for r in resultados) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""
+Harness de Benchmark
+Mede todas as funções públicas de services/aggregations.py e services/transformations.py
+e o pipeline de carga sobre bases sintéticas, grava o resultado em JSON e compara com
+um baseline anterior.
+
+Uso (a partir de backend/):
+    python -m benchmarks.run --tamanhos 10k,100k --salvar benchmarks/baselines/atual.json
+    python -m benchmarks.run --tamanhos 100k --baseline benchmarks/baselines/atual.json --falhar
+
+Ganho do map-reduce em processos (services/mapreduce.py), nas bases a partir de
+MAPREDUCE_MIN_LINHAS:
+    python -m benchmarks.run --tamanhos 1m --processos 1 --salvar benchmarks/baselines/seq.json
+    python -m benchmarks.run --tamanhos 1m --processos 8 --baseline benchmarks/baselines/seq.json
+"""
+
+import argparse
+import gc
+import inspect
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import (
+    _loader_vazio, gerar_base_bruta, instalar_loader, parse_tamanho, rotulo_tamanho
+)
+
+BASELINES_DIR = Path(__file__).resolve().parent / 'baselines'
+
+# Módulos cujas funções públicas são medidas
+MODULOS = ('services.aggregations', 'services.transformations')
+
+# Argumentos extras por função (além do DataFrame): cenários representativos das rotas
+ARGUMENTOS: Dict[str, Dict[str, Any]] = {
+    'apply_global_filters': {'uf': 'SP', 'objeto': 'Fraude'},
+    'get_reincidencia_por_cliente': {'top_n': 100},
+    'filter_critical_cases': {'top_n': 20},
+}
+
+# Funções que não recebem DataFrame: fábrica de argumentos a partir da base
+SEM_DATAFRAME: Dict[str, Callable[[pd.DataFrame], Tuple[tuple, dict]]] = {
+    'format_currency': lambda df: ((1234567.891,), {}),
+    'format_number': lambda df: ((1234567.891,), {}),
+    'calculate_percentage': lambda df: ((37, len(df) or 1), {}),
+    'format_sla_by_area': lambda df: ((_resumo_sla(df),), {'benchmark': 23}),
+}
+
+# Funções com caminho pré-computado (df=None usa a base do loader): medidas também nesse modo
+PRE_COMPUTADAS = (
+    'get_sla_by_area', 'get_sla_subsidio_por_area', 'get_sla_distribuicao', 'get_solicitacoes_prazo_por_area',
+)
+
+# Funções que aceitam o cubo de sketches: medidas também com o cubo pré-computado
+COM_CUBO = (
+    'get_average_time', 'get_map_data', 'get_cases_by_impact', 'get_estatisticas_gerais',
+    'get_reincidence', 'get_reincidencia_por_cliente',
+)
+
+# Regressão: mais lento que o baseline além da tolerância relativa E da absoluta
+TOLERANCIA_PADRAO = 0.25
+TOLERANCIA_ABSOLUTA_S = 0.002
+
+
+def _resumo_sla(df: pd.DataFrame):
+    from services.distributions import build_sla_dias
+    distribuicao = build_sla_dias(df, 'area', por_filtro=False)
+    return distribuicao.resumo() if distribuicao is not None else {}
+
+
+def funcoes_publicas() -> List[Tuple[str, Callable]]:
+    """(nome qualificado, função) de todas as funções públicas definidas nos módulos medidos"""
+    import importlib
+    funcoes = []
+    for nome_modulo in MODULOS:
+        modulo = importlib.import_module(nome_modulo)
+        for nome, fn in inspect.getmembers(modulo, inspect.isfunction):
+            if nome.startswith('_') or fn.__module__ != modulo.__name__:
+                continue
+            funcoes.append((f"{nome_modulo.split('.')[-1]}.{nome}", fn))
+    return funcoes
+
+
+def medir(fn: Callable, repeticoes: int, preparar: Optional[Callable[[], Tuple[tuple, dict]]] = None) -> Dict[str, Any]:
+    """
+    Executa fn `repeticoes` vezes (após um aquecimento) e retorna min/mediana/média em segundos.
+    `preparar` monta os argumentos de cada execução fora do tempo medido.
+    """
+    tempos = []
+    erro = None
+    for i in range(repeticoes + 1):
+        args, kwargs = preparar() if preparar else ((), {})
+        gc.collect()
+        inicio = time.perf_counter()
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"
+            break
+        decorrido = time.perf_counter() - inicio
+        if i > 0:
+            tempos.append(decorrido)
+    if erro:
+        return {'erro': erro}
+    return {
+        'min_s': round(min(tempos), 6),
+        'mediana_s': round(statistics.median(tempos), 6),
+        'media_s': round(statistics.fmean(tempos), 6),
+        'execucoes': len(tempos),
+    }
+
+
+def medir_carga(bruto: pd.DataFrame, repeticoes: int) -> Dict[str, Dict[str, Any]]:
+    """Pipeline de carga sem I/O: mapeamento + campos derivados e a mesclagem das duas bases"""
+    loader = _loader_vazio()
+    resultados = {'carga._map_columns': medir(loader._map_columns, repeticoes, lambda: ((bruto.copy(),), {}))}
+
+    # Mesclagem principal + novos casos: metade das linhas em comum, como na atualização mensal
+    metade = len(bruto) // 2
+    principal = loader._map_columns(bruto.iloc[:metade + metade // 2].copy())
+    novos = loader._map_columns(bruto.iloc[metade:].copy())
+    resultados['carga._merge_dataframes'] = medir(
+        loader._merge_dataframes, repeticoes, lambda: ((principal, novos), {}))
+    return resultados
+
+
+def medir_excel(bruto: pd.DataFrame, repeticoes: int, pasta: Path) -> Dict[str, Dict[str, Any]]:
+    """Leitura da planilha (openpyxl), o passo mais caro da carga real; só para bases pequenas"""
+    arquivo = pasta / f'benchmark_{len(bruto)}.xlsx'
+    if not arquivo.exists():
+        bruto.to_excel(arquivo, index=False, sheet_name='dados')
+    return {'carga.read_excel': medir(
+        lambda: pd.read_excel(arquivo, sheet_name='dados', engine='openpyxl'), repeticoes)}
+
+
+def _cubo_mapreduce(df: pd.DataFrame):
+    """Cubo sempre por map-reduce (qualquer tamanho de base), para comparar com derivados.cubo"""
+    from services import mapreduce
+    from services.cube import construir_cubo
+    minimo, mapreduce.MIN_LINHAS = mapreduce.MIN_LINHAS, 0
+    try:
+        return construir_cubo(df)
+    finally:
+        mapreduce.MIN_LINHAS = minimo
+
+
+def medir_derivados(df: pd.DataFrame, repeticoes: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Estruturas pré-computadas por geração (custo pago uma vez por carga). Com mais de um
+    processo de map-reduce, o cubo também é medido montado em partições.
+    """
+    from services import mapreduce
+    from services.cube import SketchCube
+    from services.distributions import METRICAS
+    resultados = {'derivados.cubo': medir(SketchCube, repeticoes, lambda: ((df,), {}))}
+    if mapreduce.PROCESSOS > 1:
+        # A execução de aquecimento de medir() paga a criação do pool
+        resultados['derivados.cubo[mapreduce]'] = medir(_cubo_mapreduce, repeticoes, lambda: ((df,), {}))
+    for metrica, (construtor, _) in METRICAS.items():
+        resultados[f'derivados.distribuicao:{metrica}'] = medir(construtor, repeticoes, lambda: ((df, 'area', True), {}))
+    return resultados
+
+
+def medir_funcoes(df: pd.DataFrame, repeticoes: int, filtro: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Funções públicas com o DataFrame completo e, quando houver, com dados pré-computados"""
+    from services.cube import get_cube
+    resultados = {}
+    for nome, fn in funcoes_publicas():
+        curto = nome.split('.', 1)[1]
+        if filtro and filtro not in nome:
+            continue
+        if curto in SEM_DATAFRAME:
+            args, kwargs = SEM_DATAFRAME[curto](df)
+            resultados[nome] = medir(fn, repeticoes, lambda: (args, kwargs))
+            continue
+        extras = ARGUMENTOS.get(curto, {})
+        # Cópia por execução: algumas funções acrescentam colunas auxiliares ao DataFrame
+        resultados[nome] = medir(fn, repeticoes, lambda: ((df.copy(),), dict(extras)))
+        if curto in PRE_COMPUTADAS:
+            resultados[f'{nome}[pre]'] = medir(fn, repeticoes, lambda: ((None,), dict(extras)))
+        if curto in COM_CUBO:
+            cubo = get_cube()
+            resultados[f'{nome}[cubo]'] = medir(fn, repeticoes, lambda: ((df.copy(),), {**extras, 'cube': cubo}))
+    return resultados
+
+
+def executar(tamanhos: List[int], repeticoes: int, seed: int, filtro: Optional[str] = None,
+             excel_ate: int = 0) -> Dict[str, Any]:
+    """Roda o benchmark completo para cada tamanho e retorna o documento JSON"""
+    documento = {'meta': metadados(seed, repeticoes), 'resultados': {}}
+    for n in tamanhos:
+        rotulo = rotulo_tamanho(n)
+        print(f"[{rotulo}] gerando base sintética...", flush=True)
+        inicio = time.perf_counter()
+        bruto = gerar_base_bruta(n, seed)
+        geracao_s = time.perf_counter() - inicio
+
+        resultados: Dict[str, Dict[str, Any]] = {}
+        if not filtro or 'carga' in filtro:
+            print(f"[{rotulo}] pipeline de carga...", flush=True)
+            resultados.update(medir_carga(bruto, repeticoes))
+            if n <= excel_ate:
+                resultados.update(medir_excel(bruto, repeticoes, BASELINES_DIR))
+
+        df = _loader_vazio()._map_columns(bruto)
+        del bruto
+        instalar_loader(df)
+
+        if not filtro or 'derivados' in filtro:
+            print(f"[{rotulo}] estruturas pré-computadas...", flush=True)
+            resultados.update(medir_derivados(df, repeticoes))
+
+        print(f"[{rotulo}] funções públicas...", flush=True)
+        resultados.update(medir_funcoes(df, repeticoes, filtro))
+
+        documento['resultados'][rotulo] = {
+            'linhas': n,
+            'geracao_base_s': round(geracao_s, 3),
+            'funcoes': resultados,
+        }
+    return documento
+
+
+def metadados(seed: int, repeticoes: int) -> Dict[str, Any]:
+    from services import mapreduce
+    return {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'seed': seed,
+        'repeticoes': repeticoes,
+        'mapreduce_processos': mapreduce.PROCESSOS,
+        'mapreduce_min_linhas': mapreduce.MIN_LINHAS,
+    }
+
+
+def comparar(atual: Dict[str, Any], baseline: Dict[str, Any], tolerancia: float = TOLERANCIA_PADRAO) -> List[Dict[str, Any]]:
+    """
+    Compara medianas por (tamanho, função). Retorna uma linha por medição comum aos dois
+    documentos, com a razão atual/baseline e o status (regressao, melhoria, estavel, erro).
+    """
+    linhas = []
+    for rotulo, bloco in atual.get('resultados', {}).items():
+        base_bloco = baseline.get('resultados', {}).get(rotulo, {}).get('funcoes', {})
+        for nome, medida in bloco['funcoes'].items():
+            base = base_bloco.get(nome)
+            if base is None:
+                continue
+            if 'erro' in medida or 'erro' in base:
+                linhas.append({'tamanho': rotulo, 'funcao': nome, 'status': 'erro',
+                               'detalhe': medida.get('erro') or base.get('erro')})
+                continue
+            atual_s, base_s = medida['mediana_s'], base['mediana_s']
+            razao = atual_s / base_s if base_s else float('inf')
+            diferenca = atual_s - base_s
+            if razao > 1 + tolerancia and diferenca > TOLERANCIA_ABSOLUTA_S:
+                status = 'regressao'
+            elif razao < 1 / (1 + tolerancia) and -diferenca > TOLERANCIA_ABSOLUTA_S:
+                status = 'melhoria'
+            else:
+                status = 'estavel'
+            linhas.append({'tamanho': rotulo, 'funcao': nome, 'baseline_s': base_s, 'atual_s': atual_s,
+                           'razao': round(razao, 3), 'status': status})
+    return linhas
+
+
+def imprimir_resultados(documento: Dict[str, Any]) -> None:
+    for rotulo, bloco in documento['resultados'].items():
+        print(f"\n=== {rotulo} ({bloco['linhas']} linhas) ===")
+        for nome, medida in sorted(bloco['funcoes'].items(), key=lambda x: -x[1].get('mediana_s', 0)):
+            if 'erro' in medida:
+                print(f"  {nome:<60} ERRO {medida['erro']}")
+            else:
+                print(f"  {nome:<60} {medida['mediana_s'] * 1000:>12.2f} ms")
+
+
+def imprimir_comparacao(linhas: List[Dict[str, Any]]) -> None:
+    marcadores = {'regressao': '!!', 'melhoria': '++', 'estavel': '  ', 'erro': 'EE'}
+    print("\n=== Comparação com baseline (mediana) ===")
+    for linha in sorted(linhas, key=lambda l: (l['status'] != 'regressao', l['status'] != 'erro', -l.get('razao', 0))):
+        if linha['status'] == 'erro':
+            print(f"EE [{linha['tamanho']}] {linha['funcao']}: {linha['detalhe']}")
+            continue
+        print(f"{marcadores[linha['status']]} [{linha['tamanho']}] {linha['funcao']:<60} "
+              f"{linha['baseline_s'] * 1000:>10.2f} ms → {linha['atual_s'] * 1000:>10.2f} ms  (x{linha['razao']})")
+    resumo = {s: sum(1 for l in linhas if l['status'] == s) for s in marcadores}
+    print(f"\nRegressões: {resumo['regressao']}  Melhorias: {resumo['melhoria']}  "
+          f"Estáveis: {resumo['estavel']}  Erros: {resumo['erro']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark das agregações sobre base sintética')
+    parser.add_argument('--tamanhos', default='10k,100k', help='Lista: 10k,100k,1m,10m (ou números)')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--filtro', default=None, help='Mede só funções cujo nome contém o texto')
+    parser.add_argument('--excel-ate', type=int, default=0,
+                        help='Mede também a leitura de XLSX para bases com até N linhas (lento para gerar)')
+    parser.add_argument('--salvar', default=None, help='Arquivo JSON para gravar o resultado (novo baseline)')
+    parser.add_argument('--baseline', default=None, help='JSON anterior para comparação')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO,
+                        help='Aumento relativo da mediana considerado regressão (0.25 = 25%%)')
+    parser.add_argument('--falhar', action='store_true', help='Código de saída 1 se houver regressão')
+    parser.add_argument('--processos', type=int, default=None,
+                        help='Processos do map-reduce (padrão: MAPREDUCE_PROCESSOS; 1 desliga). '
+                             'Comparar --processos 1 com N mede o ganho nas funções com cubo')
+    args = parser.parse_args(argv)
+
+    if args.processos is not None:
+        from services import mapreduce
+        mapreduce.PROCESSOS = args.processos
+
+    tamanhos = [parse_tamanho(t) for t in args.tamanhos.split(',') if t.strip()]
+    documento = executar(tamanhos, args.repeticoes, args.seed, args.filtro, args.excel_ate)
+    imprimir_resultados(documento)
+
+    if args.salvar:
+        destino = Path(args.salvar)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        destino.write_text(json.dumps(documento, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"\nResultado gravado em {destino}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        linhas = comparar(documento, baseline, args.tolerancia)
+        imprimir_comparacao(linhas)
+        if args.falhar and any(l['status'] == 'regressao' for l in linhas):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
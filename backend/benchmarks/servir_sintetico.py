@@ -0,0 +1,40 @@
+"""
+Servidor com Base Sintética
+Sobe o app com a base sintética no lugar das planilhas, para testes de carga
+reproduzíveis sem dados reais.
+
+Uso (a partir de backend/):
+    python -m benchmarks.servir_sintetico --tamanho 100k --porta 8001
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.synthetic import gerar_base, instalar_loader, parse_tamanho
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Sobe o backend com base sintética')
+    parser.add_argument('--tamanho', default='100k')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8001)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    n = parse_tamanho(args.tamanho)
+    print(f"Gerando base sintética com {n} registros...")
+    instalar_loader(gerar_base(n, args.seed))
+
+    from app import app
+    uvicorn.run(app, host=args.host, port=args.porta, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""
+Base Sintética
+Gera casos no formato das planilhas de origem (colunas brutas), de forma determinística
+por semente, para que DataLoader._map_columns produza exatamente o esquema usado em produção.
+Distribuições de UF, objeto e motivo e as taxas de NaN seguem a base real aproximadamente.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Tamanhos nomeados aceitos pela linha de comando
+TAMANHOS = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+# UF → peso (concentração no Sudeste, cauda longa no Norte)
+UFS = {
+    'SP': 0.24, 'RJ': 0.11, 'MG': 0.10, 'PR': 0.06, 'RS': 0.06, 'BA': 0.06, 'PA': 0.05,
+    'PE': 0.04, 'SC': 0.04, 'GO': 0.04, 'CE': 0.04, 'DF': 0.03, 'ES': 0.02, 'MA': 0.02,
+    'AM': 0.02, 'MT': 0.015, 'MS': 0.015, 'PB': 0.01, 'RN': 0.01, 'AL': 0.01, 'PI': 0.01,
+    'SE': 0.005, 'RO': 0.005, 'TO': 0.005, 'AC': 0.002, 'AP': 0.002, 'RR': 0.002,
+}
+
+OBJETOS = {
+    'Cobrança indevida': 0.26, 'Negativação indevida': 0.18, 'Fraude': 0.14,
+    'Revisional de contrato': 0.12, 'Busca e apreensão': 0.08, 'Cartão de crédito': 0.08,
+    'Danos morais': 0.06, 'Tarifas bancárias': 0.04, 'Superendividamento': 0.02,
+    'Consignado': 0.02,
+}
+
+# Motivos de encerramento: os três primeiros NÃO são encerramento (ver _is_encerrado)
+MOTIVOS_ABERTOS = {'Ativo': 0.70, 'Sem sentença': 0.20, 'Fase de recurso': 0.10}
+MOTIVOS_ENCERRADOS = {
+    'Extinção': 0.22, 'Improcedência': 0.20, 'Acordo antes da sentença': 0.20,
+    'Acordo pós sentença': 0.12, 'Pagamento condenação': 0.14, 'Condenação sem ônus': 0.06,
+    'Erro sistêmico - TI': 0.06,
+}
+
+AREAS = {
+    'Operações': 0.35, 'Operações II': 0.10, 'Customer do Banco': 0.05, 'Cobranças': 0.25,
+    'Jurídico Interno': 0.20, 'Outros': 0.05,
+}
+
+SENTENCAS = {'Favorável': 0.40, 'Desfavorável': 0.30, 'Parcial': 0.10, 'Sem Sentença': 0.20}
+
+COMARCAS_POR_UF = 6
+
+# Taxas de NaN por coluna bruta
+NAN = {
+    'Pólo Ativo': 0.02,
+    'Número do Processo': 0.01,
+    'Area Responsável': 0.08,
+    'Descricao do Tipo de Ação': 0.01,
+    'UF': 0.005,
+    'Data de entrada': 0.002,
+    'Valor da Causa': 0.03,
+    'Sentença Favorável/Desfavorável': 0.25,
+}
+
+# Fração de casos encerrados e janela de entradas
+FRACAO_ENCERRADOS = 0.55
+INICIO_ENTRADAS = pd.Timestamp('2019-01-01')
+DIAS_ENTRADAS = 2200
+
+
+def parse_tamanho(valor: str) -> int:
+    """'10k' → 10000, '1m' → 1000000, '2500' → 2500"""
+    chave = str(valor).strip().lower()
+    if chave in TAMANHOS:
+        return TAMANHOS[chave]
+    multiplicador = 1
+    if chave.endswith('k'):
+        chave, multiplicador = chave[:-1], 1_000
+    elif chave.endswith('m'):
+        chave, multiplicador = chave[:-1], 1_000_000
+    return int(float(chave) * multiplicador)
+
+
+def rotulo_tamanho(n: int) -> str:
+    """10000 → '10k', 1000000 → '1m'"""
+    for rotulo, valor in TAMANHOS.items():
+        if valor == n:
+            return rotulo
+    return str(n)
+
+
+def _escolher(rng: np.random.Generator, pesos: Dict[str, float], n: int) -> np.ndarray:
+    """Amostra categórica (via códigos, sem criar n strings Python antes da hora)"""
+    nomes = np.array(list(pesos.keys()), dtype=object)
+    p = np.array(list(pesos.values()), dtype=float)
+    return nomes[rng.choice(len(nomes), size=n, p=p / p.sum())]
+
+
+def _com_nan(rng: np.random.Generator, valores: np.ndarray, taxa: float) -> np.ndarray:
+    if taxa <= 0:
+        return valores
+    valores = valores.astype(object)
+    valores[rng.random(len(valores)) < taxa] = None
+    return valores
+
+
+def _numeros_processo(rng: np.random.Generator, n: int, ufs: np.ndarray) -> pd.Series:
+    """Números no padrão CNJ NNNNNNN-DD.AAAA.J.TR.OOOO, únicos por construção"""
+    sequencial = pd.Series(rng.permutation(n) + 1).astype(str).str.zfill(7)
+    digito = pd.Series(rng.integers(0, 100, n)).astype(str).str.zfill(2)
+    ano = pd.Series(rng.integers(2015, 2026, n)).astype(str)
+    tribunal = pd.Series(pd.factorize(ufs)[0] % 27 + 1).astype(str).str.zfill(2)
+    origem = pd.Series(rng.integers(1, 10000, n)).astype(str).str.zfill(4)
+    return sequencial + '-' + digito + '.' + ano + '.8.' + tribunal + '.' + origem
+
+
+def gerar_base_bruta(n: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Base sintética com as colunas das planilhas de origem (ex.: 'Data de entrada', 'UF').
+    Mesma semente → mesma base, em qualquer máquina.
+    """
+    rng = np.random.default_rng(seed)
+
+    ufs = _escolher(rng, UFS, n)
+    objetos = _escolher(rng, OBJETOS, n)
+
+    entrada = INICIO_ENTRADAS + pd.to_timedelta(
+        # Volume crescente no tempo: mais entradas nos anos recentes
+        (np.sqrt(rng.random(n)) * DIAS_ENTRADAS).astype(np.int64), unit='D')
+    encerrado = rng.random(n) < FRACAO_ENCERRADOS
+    duracao = np.minimum(rng.lognormal(5.3, 0.8, n), 1800).astype(np.int64)
+    encerramento = pd.Series(entrada + pd.to_timedelta(duracao, unit='D'))
+    encerramento[~encerrado | (encerramento > pd.Timestamp.now().normalize()).to_numpy()] = pd.NaT
+    encerrado = encerramento.notna().to_numpy()
+
+    motivo = np.where(encerrado, _escolher(rng, MOTIVOS_ENCERRADOS, n), _escolher(rng, MOTIVOS_ABERTOS, n))
+    # Parte dos abertos vem sem motivo preenchido (coluna U em branco)
+    motivo = motivo.astype(object)
+    motivo[~encerrado & (rng.random(n) < 0.15)] = None
+
+    # Clientes com reincidência: poucos clientes concentram muitos processos (cauda de Zipf)
+    n_clientes = max(1, n // 3)
+    cliente_id = np.minimum(rng.zipf(1.6, n), n_clientes) - 1
+    cliente_id = (cliente_id + rng.integers(0, n_clientes, n) * (rng.random(n) < 0.7)) % n_clientes
+    clientes = 'Cliente ' + pd.Series(cliente_id).astype(str).str.zfill(7)
+
+    valor = np.round(rng.lognormal(9.2, 1.3, n), 2)
+    comarca = pd.Series(ufs).astype(str) + ' - Comarca ' + pd.Series(rng.integers(1, COMARCAS_POR_UF + 1, n)).astype(str)
+
+    bruto = pd.DataFrame({
+        'Data de entrada': entrada,
+        'DATA ENCERRAMENTO': encerramento,
+        'Descricao do Tipo de Ação': objetos,
+        'UF': ufs,
+        'Status': np.where(encerrado, 'ENCERRADO', np.where(rng.random(n) < 0.9, 'EM ANDAMENTO', 'ENTRADA')),
+        'Valor da Causa': valor,
+        'Valor - Impacto Negativo': np.where(rng.random(n) < 0.3, np.round(valor * rng.random(n), 2), np.nan),
+        'Pólo Ativo': clientes.to_numpy(dtype=object),
+        'Número do Processo': _numeros_processo(rng, n, ufs).to_numpy(dtype=object),
+        'Motivo Encerramento': motivo,
+        'Area Responsável': _escolher(rng, AREAS, n),
+        'Sentença Favorável/Desfavorável': np.where(encerrado, _escolher(rng, SENTENCAS, n), 'Sem Sentença'),
+        'Quantidade de Reiterações': rng.poisson(1.5, n),
+        'Descricao Da Comarca': comarca.to_numpy(dtype=object),
+    })
+
+    for coluna, taxa in NAN.items():
+        if coluna == 'Data de entrada':
+            bruto.loc[rng.random(n) < taxa, coluna] = pd.NaT
+        elif coluna == 'Valor da Causa':
+            bruto.loc[rng.random(n) < taxa, coluna] = np.nan
+        else:
+            bruto[coluna] = _com_nan(rng, bruto[coluna].to_numpy(dtype=object), taxa)
+    return bruto
+
+
+def _loader_vazio():
+    """DataLoader sem arquivos (não executa a carga das planilhas)"""
+    from services.data_loader import DataLoader
+    return DataLoader.sem_arquivos(origem='sintetico')
+
+
+def gerar_base(n: int, seed: int = 42) -> pd.DataFrame:
+    """Base sintética já mapeada (mesmas colunas e campos derivados do DataLoader)"""
+    return _loader_vazio()._map_columns(gerar_base_bruta(n, seed))
+
+
+def instalar_loader(df: pd.DataFrame):
+    """
+    Instala um DataLoader com a base informada como singleton de get_loader(),
+    para que rotas e funções com dados pré-computados usem a base sintética.
+    """
+    import time
+    import services.data_loader as data_loader
+    loader = _loader_vazio()
+    loader._df = df
+    loader.generation = 1
+    loader.loaded_at = time.time()
+    loader._reference_date = data_loader._hoje()
+    data_loader._loader = loader
+    return loader
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Grava a base bruta sintética em CSV/Parquet (útil para testar a carga fora do harness)"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Gera base sintética no formato das planilhas de origem')
+    parser.add_argument('tamanho', help='Linhas: 10k, 100k, 1m, 10m ou número')
+    parser.add_argument('saida', help='Arquivo de saída (.csv, .parquet ou .xlsx)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    bruto = gerar_base_bruta(parse_tamanho(args.tamanho), args.seed)
+    if args.saida.endswith('.parquet'):
+        bruto.to_parquet(args.saida, index=False)
+    elif args.saida.endswith('.xlsx'):
+        bruto.to_excel(args.saida, index=False, sheet_name='dados')
+    else:
+        bruto.to_csv(args.saida, index=False)
+    print(f"{len(bruto)} registros gravados em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
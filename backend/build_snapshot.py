@@ -0,0 +1,52 @@
+"""
+Snapshot Binário da Base
+Lê as planilhas uma vez (mapeamento e campos derivados inclusos) e grava o DataFrame em
+formato binário. Carregado via DATA_SNAPSHOT, evita o parse do XLSX em cold starts
+serverless (lambda_handler.py) e em cada worker.
+
+Uso (a partir de backend/):
+    python build_snapshot.py                         # grava data/snapshot.pkl
+    python build_snapshot.py --saida /tmp/base.pkl
+    python build_snapshot.py --sintetico 200k        # base sintética (testes de cold start)
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+SNAPSHOT_PADRAO = Path(__file__).resolve().parent / 'data' / 'snapshot.pkl'
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Gera o snapshot binário da base para cargas rápidas')
+    parser.add_argument('--saida', default=str(SNAPSHOT_PADRAO), help='Arquivo do snapshot')
+    parser.add_argument('--sintetico', default=None, help='Usar base sintética com N registros (ex.: 200k)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    # O snapshot é sempre gerado a partir das planilhas (ou da base sintética), nunca de outro snapshot
+    os.environ.pop('DATA_SNAPSHOT', None)
+
+    inicio = time.perf_counter()
+    if args.sintetico:
+        from benchmarks.synthetic import gerar_base, instalar_loader, parse_tamanho
+        loader = instalar_loader(gerar_base(parse_tamanho(args.sintetico), seed=args.seed))
+    else:
+        from services.data_loader import get_loader
+        loader = get_loader()
+    carga = time.perf_counter() - inicio
+
+    # Colunas de texto como categóricas: arquivo menor, carga mais rápida e páginas
+    # compartilháveis entre workers (ver DataLoader.compactar)
+    loader.compactar()
+    caminho = loader.salvar_snapshot(args.saida)
+    print(f"Snapshot com {len(loader._df)} registros → {caminho} "
+          f"({caminho.stat().st_size / 1e6:.1f} MB; carga das planilhas {carga:.1f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
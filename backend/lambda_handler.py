@@ -0,0 +1,88 @@
+"""
+Entrada Serverless (AWS Lambda + API Gateway, via Mangum)
+Handler: lambda_handler.handler
+
+Na inicialização do container (fase de init, fora da cobrança por requisição):
+- localiza o snapshot binário da base (DATA_SNAPSHOT, /tmp, pacote ou S3) — nunca o XLSX;
+- importa só o necessário: sem prometheus_client (METRICAS=0), sem thread de aquecimento
+  (lifespan desligado), sem openpyxl (o snapshot dispensa as planilhas);
+- carrega a base uma vez.
+O loader, as estruturas derivadas e o cache de respostas são globais do módulo, então
+invocações seguintes no mesmo container reaproveitam tudo.
+
+Orçamento de cold start medido por benchmarks/cold_start.py (emulação local).
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+_INICIO = time.perf_counter()
+
+# Antes de importar o app: desligar o que não serve em uma função por requisição
+os.environ.setdefault('ENVIRONMENT', 'production')
+os.environ.setdefault('METRICAS', '0')
+os.environ.setdefault('AQUECIMENTO', '0')
+
+PASTA_BACKEND = Path(__file__).resolve().parent
+
+# Snapshot empacotado com a função e cópia em /tmp (sobrevive entre invocações do container)
+SNAPSHOT_PACOTE = PASTA_BACKEND / 'data' / 'snapshot.pkl'
+SNAPSHOT_TMP = Path('/tmp/dashboard_snapshot.pkl')
+
+# Orçamento de cold start (s): init completo (imports + carga do snapshot) + primeira resposta
+ORCAMENTO_COLD_START_S = float(os.getenv('ORCAMENTO_COLD_START_S', '3.0'))
+
+
+def _baixar_s3(uri: str, destino: Path) -> Optional[Path]:
+    """Baixa s3://bucket/chave para /tmp (boto3 só é importado neste caso)"""
+    import boto3
+    bucket, _, chave = uri[len('s3://'):].partition('/')
+    temporario = destino.with_name(destino.name + '.tmp')
+    boto3.client('s3').download_file(bucket, chave, str(temporario))
+    temporario.replace(destino)
+    return destino
+
+
+def localizar_snapshot() -> Optional[Path]:
+    """DATA_SNAPSHOT, cópia em /tmp, snapshot do pacote ou download de DATA_SNAPSHOT_S3"""
+    configurado = os.getenv('DATA_SNAPSHOT')
+    if configurado and Path(configurado).exists():
+        return Path(configurado)
+    for candidato in (SNAPSHOT_TMP, SNAPSHOT_PACOTE):
+        if candidato.exists():
+            return candidato
+    uri = os.getenv('DATA_SNAPSHOT_S3')
+    if uri and uri.startswith('s3://'):
+        try:
+            return _baixar_s3(uri, SNAPSHOT_TMP)
+        except Exception as e:
+            print(f"Erro ao baixar snapshot de {uri}: {e}")
+    return None
+
+
+TEMPOS_INIT: Dict[str, Any] = {}
+
+_snapshot = localizar_snapshot()
+if _snapshot is not None:
+    os.environ['DATA_SNAPSHOT'] = str(_snapshot)
+else:
+    print("AVISO: nenhum snapshot encontrado; a carga vai ler as planilhas (cold start lento)")
+TEMPOS_INIT['localizar_snapshot_s'] = time.perf_counter() - _INICIO
+
+_marco = time.perf_counter()
+from mangum import Mangum  # noqa: E402
+
+from app import app  # noqa: E402
+from services.data_loader import get_loader  # noqa: E402
+TEMPOS_INIT['imports_s'] = time.perf_counter() - _marco
+
+_marco = time.perf_counter()
+_loader = get_loader()
+TEMPOS_INIT['carga_s'] = time.perf_counter() - _marco
+TEMPOS_INIT['origem'] = _loader.origem
+TEMPOS_INIT['registros'] = len(_loader._df) if _loader._df is not None else 0
+TEMPOS_INIT['init_s'] = time.perf_counter() - _INICIO
+
+handler = Mangum(app, lifespan='off')
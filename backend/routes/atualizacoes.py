@@ -0,0 +1,26 @@
+"""
+Rotas de Avisos de Atualização (Server-Sent Events)
+"""
+
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from services.cache import CachedRoute
+from services.atualizacoes import fluxo
+
+router = APIRouter(route_class=CachedRoute)
+
+
+@router.get("")
+async def atualizacoes(
+    last_event_id: Optional[str] = Header(None, description="Versão do último evento recebido (reconexão do EventSource)")
+):
+    """
+    Fluxo text/event-stream: 'estado' ao conectar e 'geracao' a cada nova carga da base,
+    com as seções (rotas) cujas respostas mudaram
+    """
+    return StreamingResponse(
+        fluxo(last_event_id),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
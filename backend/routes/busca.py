@@ -0,0 +1,26 @@
+"""
+Rotas de Busca (clientes, processos, comarcas e objetos)
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from services.cache import CachedRoute
+from services.casos import SeletorInvalido
+from services.busca import LIMITE_PADRAO, buscar
+
+router = APIRouter(route_class=CachedRoute)
+
+
+@router.get("")
+async def busca(
+    q: str = Query(..., description="Texto buscado (sem diferenciar acentos/maiúsculas; prefixo ou trecho)"),
+    campos: Optional[str] = Query(None, description="Restringir a campos: cliente, processo, comarca, objeto"),
+    limit: int = Query(LIMITE_PADRAO, description="Máximo de resultados (até 50)")
+):
+    """Busca com ranking: exato, prefixo, início de palavra e trecho; depois por ocorrências"""
+    try:
+        return buscar(q, campos=campos, limit=limit)
+    except SeletorInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,55 @@
+"""
+Rotas de Drill-down de Casos
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from datetime import date
+from typing import Optional
+from services.data_loader import get_loader
+from services.cache import CachedRoute
+from services.casos import LIMITE_PADRAO, SeletorInvalido, buscar_processo, listar_casos
+
+router = APIRouter(route_class=CachedRoute)
+
+
+@router.get("")
+async def casos(
+    uf: Optional[str] = Query(None, description="Filtrar por estado (UF) - ex: SP, PA"),
+    objeto: Optional[str] = Query(None, description="Filtrar por objeto da ação (cross-filter)"),
+    area: Optional[str] = Query(None, description="Filtrar por área interna"),
+    celula: Optional[str] = Query(None, description="Seletor de célula 'dim:valor;dim:valor' (dim: uf, objeto, area)"),
+    fields: Optional[str] = Query(None, description="Colunas devolvidas, separadas por vírgula"),
+    limit: int = Query(LIMITE_PADRAO, description="Casos por página (máximo 500)"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (paginacao.proximo_cursor)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
+    """Casos por trás de um agregado (UF, objeto, área), paginados e com projeção de colunas"""
+    try:
+        if as_of is None:
+            return listar_casos(uf=uf, objeto=objeto, area=area, celula=celula, campos=fields,
+                                limit=limit, cursor=cursor)
+        df = get_loader().get_dataframe(as_of=as_of)
+        return listar_casos(uf=uf, objeto=objeto, area=area, celula=celula, campos=fields,
+                            limit=limit, cursor=cursor, df=df,
+                            lista=('casos', uf, objeto, area, celula, str(as_of)))
+    except SeletorInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{numero_processo}")
+async def caso_por_numero(
+    numero_processo: str,
+    fields: Optional[str] = Query(None, description="Colunas devolvidas, separadas por vírgula")
+):
+    """Linhas de um processo pelo número (com ou sem pontuação)"""
+    try:
+        result = buscar_processo(numero_processo, campos=fields)
+    except SeletorInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not result['total']:
+        raise HTTPException(status_code=404, detail=f"Processo não encontrado: {numero_processo}")
+    return result
@@ -0,0 +1,25 @@
+"""
+Rotas de Diferenças entre Gerações da Base
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from services.cache import CachedRoute
+from services.casos import SeletorInvalido
+from services.diff import get_diff
+
+router = APIRouter(route_class=CachedRoute)
+
+
+@router.get("")
+async def diff(
+    since: Optional[int] = Query(None, description="Geração de referência (padrão: a anterior mais recente)"),
+    estado: Optional[str] = Query(None, description="Filtrar por estado (UF) - ex: SP, PA")
+):
+    """Processos adicionados, removidos, com status ou impacto alterado desde `since`, por UF e objeto"""
+    try:
+        return get_diff(since=since, estado=estado)
+    except SeletorInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -3,26 +3,33 @@ Rotas para dados de Encerramentos
 """
 
 from fastapi import APIRouter, HTTPException, Query
+from datetime import date
 from typing import Optional
 from services.data_loader import get_loader
+from services.cache import CachedRoute
 from services.aggregations import get_encerrados_by_object
+from services.timing import span
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 def _filter_by_state(df, estado: Optional[str] = None):
     """Filtra DataFrame por estado se fornecido"""
     if estado and estado.strip():
-        return df[df['estado'] == estado.strip().upper()].copy()
+        with span('filtro'):
+            return df[df['estado'] == estado.strip().upper()].copy()
     return df
 
 
 @router.get("/por-objeto")
-async def encerrados_por_objeto(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def encerrados_por_objeto(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Retorna encerramentos agregados por objeto da ação"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         result = get_encerrados_by_object(df)
         return result
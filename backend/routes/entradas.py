@@ -2,54 +2,50 @@
 Rotas para dados de Entradas
 """
 
-import json
-import time
-from pathlib import Path
+import logging
 
 from fastapi import APIRouter, HTTPException, Query
+from datetime import date
 from typing import Optional
 from services.data_loader import get_loader
+from services.cache import CachedRoute
 from services.aggregations import get_entradas_by_object
+from services.logs import evento, habilitado
+from services.timing import span
 
-router = APIRouter()
-_DEBUG_LOG = Path(r"c:\Users\vini\Desktop\zappa + html v2\.cursor\debug.log")
+router = APIRouter(route_class=CachedRoute)
 
 
 def _filter_by_state(df, estado: Optional[str] = None):
     """Filtra DataFrame por estado se fornecido"""
     if estado and estado.strip():
-        return df[df['estado'] == estado.strip().upper()].copy()
+        with span('filtro'):
+            return df[df['estado'] == estado.strip().upper()].copy()
     return df
 
 
 @router.get("/por-objeto")
-async def entradas_por_objeto(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def entradas_por_objeto(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Retorna entradas agregadas por objeto da ação"""
-    # #region agent log
-    try:
-        with open(_DEBUG_LOG, "a", encoding="utf-8") as f:
-            f.write(json.dumps({"timestamp":int(time.time()*1000),"location":"entradas.entradas_por_objeto","message":"entry","data":{"estado":estado},"sessionId":"debug-session","hypothesisId":"H3"}) + "\n")
-    except Exception: pass
-    # #endregion
+    evento("entradas.entradas_por_objeto", "entry", {"estado": estado}, hipotese="H3")
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         result = get_entradas_by_object(df)
-        # #region agent log
-        try:
+        if habilitado():
             dados = result.get("dados") or []
-            sample = (dados[0] if dados else {})
-            with open(_DEBUG_LOG, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"timestamp":int(time.time()*1000),"location":"entradas.entradas_por_objeto","message":"result","data":{"len_dados":len(dados),"keys_sample":list(sample.keys())[:10],"has_2022":2022 in sample or "2022" in sample},"sessionId":"debug-session","hypothesisId":"H3"}) + "\n")
-        except Exception: pass
-        # #endregion
+            sample = dados[0] if dados else {}
+            evento("entradas.entradas_por_objeto", "result", {
+                "len_dados": len(dados),
+                "keys_sample": list(sample.keys())[:10],
+                "has_2022": 2022 in sample or "2022" in sample,
+            }, hipotese="H3")
         return result
     except Exception as e:
-        # #region agent log
-        try:
-            with open(_DEBUG_LOG, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"timestamp":int(time.time()*1000),"location":"entradas.entradas_por_objeto","message":"exception","data":{"err":str(e)},"sessionId":"debug-session","hypothesisId":"H1"}) + "\n")
-        except Exception: pass
-        # #endregion
+        evento("entradas.entradas_por_objeto", "exception", {"err": str(e)},
+               hipotese="H1", nivel=logging.WARNING, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
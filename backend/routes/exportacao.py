@@ -0,0 +1,46 @@
+"""
+Rotas de Exportação (linhas filtradas em streaming)
+"""
+
+from urllib.parse import quote
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from datetime import date
+from typing import Optional
+from services.data_loader import get_loader
+from services.cache import CachedRoute
+from services.casos import SeletorInvalido
+from services.exportacao import exportar
+
+router = APIRouter(route_class=CachedRoute)
+
+
+@router.get("")
+async def exportar_casos(
+    formato: str = Query('csv', description="csv, ndjson ou parquet"),
+    uf: Optional[str] = Query(None, description="Filtrar por estado (UF) - ex: SP, PA"),
+    objeto: Optional[str] = Query(None, description="Filtrar por objeto da ação (cross-filter)"),
+    area: Optional[str] = Query(None, description="Filtrar por área interna"),
+    celula: Optional[str] = Query(None, description="Seletor de célula 'dim:valor;dim:valor' (dim: uf, objeto, area)"),
+    fields: Optional[str] = Query(None, description="Colunas exportadas, separadas por vírgula (padrão: todas)"),
+    gzip: bool = Query(False, description="Comprimir o arquivo com gzip (.gz)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
+    """Linhas filtradas em blocos (memória constante), como arquivo para download"""
+    try:
+        df = get_loader().get_dataframe(as_of=as_of) if as_of is not None else None
+        result = exportar(formato=formato, uf=uf, objeto=objeto, area=area, celula=celula,
+                          campos=fields, gzip=gzip, df=df)
+    except SeletorInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(
+        result['corpo'],
+        media_type=result['media_type'],
+        headers={
+            'Content-Disposition': f"attachment; filename*=UTF-8''{quote(result['arquivo'])}",
+            'X-Total-Linhas': str(result['total']),
+        },
+    )
@@ -3,8 +3,12 @@ Rotas para todos os indicadores do dashboard
 """
 
 from fastapi import APIRouter, HTTPException, Query
+from datetime import date
 from typing import Optional
-from services.data_loader import get_loader
+from services.data_loader import get_loader, BENCHMARK_NACIONAL
+from services.cache import CachedRoute, cached_section
+from services.cube import get_cube
+from services.transformations import FREQUENCIAS_SERIE
 from services.aggregations import (
     get_evolution, get_object_by_state, get_average_time,
     get_cases_by_impact, get_sla_by_area, get_requests_by_deadline,
@@ -14,37 +18,53 @@ from services.aggregations import (
     get_final_kpis, get_analise_correlacao, get_casos_objetos_por_uf,
     get_prejuizo_por_uf, get_sla_subsidio_por_area, get_areas_responsaveis,
     get_solicitacoes_prazo_por_area, get_sentences_by_area, get_reincidencia_por_cliente,
-    get_estatisticas_gerais, get_dashboard_acoes_ganhas_perdidas
+    get_estatisticas_gerais, get_dashboard_acoes_ganhas_perdidas, get_sla_distribuicao
 )
+from services.casos import SeletorInvalido
+from services.ordenacoes import chave_estado, get_ordenacoes
+from services.paginacao import LIMITE_MAXIMO
+from services.timing import span
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 def _filter_by_state(df, estado: Optional[str] = None):
     """Filtra DataFrame por estado se fornecido"""
     if estado and estado.strip():
-        return df[df['estado'] == estado.strip().upper()].copy()
+        with span('filtro'):
+            return df[df['estado'] == estado.strip().upper()].copy()
     return df
 
 
 @router.get("/evolucao")
-async def evolucao_carteira(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def evolucao_carteira(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira"),
+    freq: str = Query('M', description="Granularidade: M (mês), W (semana) ou D (dia)")
+):
     """Evolução da Carteira"""
+    freq = freq.strip().upper()
+    if freq not in FREQUENCIAS_SERIE:
+        raise HTTPException(status_code=400, detail=f"freq deve ser uma de {FREQUENCIAS_SERIE}")
     try:
-        loader = get_loader()
-        df = loader.get_dataframe()
-        df = _filter_by_state(df, estado)
-        return get_evolution(df)
+        def _compute():
+            df = get_loader().get_dataframe(as_of=as_of)
+            df = _filter_by_state(df, estado)
+            return get_evolution(df, freq=freq)
+        return cached_section('evolucao', _compute, estado=estado, freq=freq, as_of=as_of)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/objeto-por-estado")
-async def objeto_por_estado(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def objeto_por_estado(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Objeto por Estado"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_object_by_state(df)
     except Exception as e:
@@ -52,47 +72,62 @@ async def objeto_por_estado(estado: Optional[str] = Query(None, description="Fil
 
 
 @router.get("/tempo-medio")
-async def tempo_medio_tramitacao(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def tempo_medio_tramitacao(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Tempo Médio de Tramitação"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
-        return get_average_time(df)
+        return get_average_time(df, cube=get_cube() if as_of is None else None, estado=estado)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/casos-impacto")
-async def casos_por_impacto(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def casos_por_impacto(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Quantidade de Casos x Impacto Médio"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
-        return get_cases_by_impact(df)
+        return get_cases_by_impact(df, cube=get_cube() if as_of is None else None, estado=estado)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/sla-area")
-async def sla_por_area(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def sla_por_area(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira"),
+    benchmark: float = Query(BENCHMARK_NACIONAL, description="Meta de SLA em dias (linha de corte)")
+):
     """SLA por Área Interna"""
     try:
+        if as_of is None:
+            return get_sla_by_area(benchmark=benchmark, estado=estado)
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
-        return get_sla_by_area(df)
+        return get_sla_by_area(df, benchmark=benchmark)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/solicitacoes-prazo")
-async def solicitacoes_prazo(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def solicitacoes_prazo(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Solicitações x Prazo (> 5 dias)"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_requests_by_deadline(df)
     except Exception as e:
@@ -101,17 +136,21 @@ async def solicitacoes_prazo(estado: Optional[str] = Query(None, description="Fi
 
 @router.get("/solicitacoes-prazo-por-area")
 async def solicitacoes_prazo_por_area(
-    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira"),
+    limite_dias: float = Query(5, description="Limite de prazo em dias (padrão 5)")
 ):
     """
     Solicitações e Prazo por Área Responsável.
-    Retorna dados agrupados por área com contagem de casos <= 5 dias e > 5 dias.
+    Retorna dados agrupados por área com contagem de casos <= limite_dias e > limite_dias.
     """
     try:
+        if as_of is None:
+            return get_solicitacoes_prazo_por_area(limite_dias=limite_dias, estado=estado)
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
-        return get_solicitacoes_prazo_por_area(df)
+        return get_solicitacoes_prazo_por_area(df, limite_dias=limite_dias)
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
@@ -120,11 +159,14 @@ async def solicitacoes_prazo_por_area(
 
 
 @router.get("/volume-custo")
-async def volume_custo(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def volume_custo(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Volume e Custo por Encerramento"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_volume_cost(df)
     except Exception as e:
@@ -132,11 +174,14 @@ async def volume_custo(estado: Optional[str] = Query(None, description="Filtrar
 
 
 @router.get("/reiteracoes")
-async def reiteracoes_objeto(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def reiteracoes_objeto(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Reiterações por Objeto"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_reiterations_by_object(df)
     except Exception as e:
@@ -144,11 +189,14 @@ async def reiteracoes_objeto(estado: Optional[str] = Query(None, description="Fi
 
 
 @router.get("/pareto")
-async def pareto_impacto(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def pareto_impacto(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Curva de Impacto Financeiro (Pareto)"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_pareto_impact(df)
     except Exception as e:
@@ -156,17 +204,26 @@ async def pareto_impacto(estado: Optional[str] = Query(None, description="Filtra
 
 
 @router.get("/casos-criticos")
-async def casos_criticos(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
-    """Casos Críticos"""
+async def casos_criticos(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira"),
+    limit: int = Query(20, description="Casos por página (máximo 500)"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (paginacao.proximo_cursor)")
+):
+    """Casos Críticos (por impacto decrescente, paginados)"""
     try:
-        loader = get_loader()
-        df = loader.get_dataframe()
-        df = _filter_by_state(df, estado)
-        result = get_critical_cases(df)
+        if as_of is None:
+            result = get_critical_cases(limit=limit, cursor=cursor, ordens=get_ordenacoes(), estado=estado)
+        else:
+            df = _filter_by_state(get_loader().get_dataframe(as_of=as_of), estado)
+            result = get_critical_cases(df, limit=limit, cursor=cursor,
+                                        lista=('casos-criticos', chave_estado(estado), str(as_of)))
         # Garantir que o resultado está sanitizado (já feito em get_critical_cases, mas dupla verificação)
         from services.aggregations import _sanitize_for_json
         result = _sanitize_for_json(result)
         return result
+    except SeletorInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
@@ -175,11 +232,14 @@ async def casos_criticos(estado: Optional[str] = Query(None, description="Filtra
 
 
 @router.get("/sentencas")
-async def sentencas(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def sentencas(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Sentença Favorável x Desfavorável"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_sentences(df)
     except Exception as e:
@@ -188,7 +248,8 @@ async def sentencas(estado: Optional[str] = Query(None, description="Filtrar por
 
 @router.get("/sentencas-por-area")
 async def sentencas_por_area(
-    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
 ):
     """
     Sentença Favorável/Desfavorável por Área Responsável.
@@ -196,7 +257,7 @@ async def sentencas_por_area(
     """
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_sentences_by_area(df)
     except Exception as e:
@@ -207,13 +268,17 @@ async def sentencas_por_area(
 
 
 @router.get("/reincidencia")
-async def reincidencia(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def reincidencia(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira"),
+    exato: bool = Query(True, description="Contagem distinta exata (códigos de dicionário) ou aproximada (HyperLogLog)")
+):
     """Reincidência"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
-        return get_reincidence(df)
+        return get_reincidence(df, cube=get_cube() if as_of is None else None, estado=estado, exato=exato)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -221,14 +286,24 @@ async def reincidencia(estado: Optional[str] = Query(None, description="Filtrar
 @router.get("/reincidencia-por-cliente")
 async def reincidencia_por_cliente(
     estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
-    top_n: Optional[int] = Query(100, description="Número de clientes a retornar (TOP N)")
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira"),
+    top_n: Optional[int] = Query(100, description="Número de clientes a retornar (TOP N, até 500; além disso, paginar); o mesmo que limit"),
+    exato: bool = Query(True, description="Contagem distinta exata (códigos de dicionário) ou aproximada (HyperLogLog)"),
+    limit: Optional[int] = Query(None, description="Clientes por página (máximo 500; padrão top_n)"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (paginacao.proximo_cursor)")
 ):
     """Reincidência por Cliente - Tabela com Nome Cliente, Qtd de Processos e Resultado"""
     try:
-        loader = get_loader()
-        df = loader.get_dataframe()
-        df = _filter_by_state(df, estado)
-        return get_reincidencia_por_cliente(df, top_n=top_n or 100)
+        # top_n é o parâmetro antigo: valores acima do máximo viram a primeira página
+        limite = limit if limit is not None else min(top_n if top_n is not None else 100, LIMITE_MAXIMO)
+        if as_of is None:
+            return get_reincidencia_por_cliente(top_n=limite, cube=get_cube(), estado=estado, exato=exato,
+                                                cursor=cursor, ordens=get_ordenacoes())
+        df = _filter_by_state(get_loader().get_dataframe(as_of=as_of), estado)
+        return get_reincidencia_por_cliente(df, top_n=limite, estado=estado, exato=exato, cursor=cursor,
+                                            lista=('reincidencia-por-cliente', chave_estado(estado), str(as_of)))
+    except SeletorInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
@@ -237,11 +312,14 @@ async def reincidencia_por_cliente(
 
 
 @router.get("/tipos-acoes-2025")
-async def tipos_acoes_2025(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def tipos_acoes_2025(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Tipos de Ações – 2025"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_action_types_2025(df)
     except Exception as e:
@@ -249,11 +327,14 @@ async def tipos_acoes_2025(estado: Optional[str] = Query(None, description="Filt
 
 
 @router.get("/erro-sistemico")
-async def erro_sistemico(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def erro_sistemico(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Erro Sistêmico (TI)"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_systemic_errors(df)
     except Exception as e:
@@ -261,11 +342,14 @@ async def erro_sistemico(estado: Optional[str] = Query(None, description="Filtra
 
 
 @router.get("/maior-reiteracao")
-async def maior_reiteracao(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def maior_reiteracao(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Autos com Maior Reiteração"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_top_reiterations(df)
     except Exception as e:
@@ -273,11 +357,14 @@ async def maior_reiteracao(estado: Optional[str] = Query(None, description="Filt
 
 
 @router.get("/kpis-finais")
-async def kpis_finais(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def kpis_finais(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """KPIs Finais"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_final_kpis(df)
     except Exception as e:
@@ -287,12 +374,13 @@ async def kpis_finais(estado: Optional[str] = Query(None, description="Filtrar p
 @router.get("/analise-correlacao")
 async def analise_correlacao(
     estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira"),
     filtro_objeto: Optional[str] = Query(None, description="Filtrar por objeto da ação (cross-filter)")
 ):
     """Dados para o slide Análise de Impacto: mapa, objeto, tempo médio e base (bar+line)."""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_analise_correlacao(df, filtro_objeto)
     except Exception as e:
@@ -301,7 +389,8 @@ async def analise_correlacao(
 
 @router.get("/casos-objetos-por-uf")
 async def casos_objetos_por_uf(
-    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
 ):
     """
     Contagem de casos/objetos de ações por UF.
@@ -314,7 +403,7 @@ async def casos_objetos_por_uf(
     """
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_casos_objetos_por_uf(df)
     except Exception as e:
@@ -326,7 +415,8 @@ async def casos_objetos_por_uf(
 
 @router.get("/prejuizo-por-uf")
 async def prejuizo_por_uf(
-    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
 ):
     """
     Prejuízo total (soma de impacto financeiro) por UF.
@@ -340,7 +430,7 @@ async def prejuizo_por_uf(
     """
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
         return get_prejuizo_por_uf(df)
     except Exception as e:
@@ -369,21 +459,25 @@ async def areas_responsaveis():
 
 @router.get("/sla-subsidio-por-area")
 async def sla_subsidio_por_area(
-    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira"),
+    limite_dias: float = Query(BENCHMARK_NACIONAL, description="Limite do SLA em dias (padrão: benchmark nacional)")
 ):
     """
     Calcula SLA do subsídio por Área Responsável.
-    Refatorado para calcular SLA_Dias usando 'Data de entrada' e 'DATA ENCERRAMENTO'.
+    SLA_Dias = 'DATA ENCERRAMENTO' - 'Data de entrada', a partir das distribuições pré-computadas.
     Retorna:
-    - dados: Lista com métricas por área (tempo_medio_tramitacao, quantidade, percentual_dentro_sla)
-    - media_nacional_sla: Percentual médio nacional dentro do SLA
+    - dados: Lista com métricas por área (tempo_medio_tramitacao, quantidade, percentual_dentro_sla, mediana_dias, p90_dias)
+    - media_nacional_sla: Percentual nacional dentro do limite
     - media_nacional_tempo: Tempo médio nacional de tramitação (SLA_Dias)
     """
     try:
+        if as_of is None:
+            return get_sla_subsidio_por_area(limite_dias=limite_dias, estado=estado)
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
-        return get_sla_subsidio_por_area(df)
+        return get_sla_subsidio_por_area(df, limite_dias=limite_dias)
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
@@ -391,8 +485,40 @@ async def sla_subsidio_por_area(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/sla-distribuicao")
+async def sla_distribuicao(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira"),
+    metrica: str = Query('sla', description="sla (entrada→encerramento), sla_real ou prazo"),
+    dimensao: str = Query('area', description="Agrupar por area ou objeto"),
+    limite: Optional[float] = Query(None, description="Limite em dias para o percentual dentro do prazo"),
+    quantis: Optional[str] = Query(None, description="Quantis separados por vírgula (ex: 0.5,0.9,0.99)")
+):
+    """
+    Distribuição de dias por área ou objeto: quantidade, média, quantis e % dentro do limite.
+    Consultas sem as_of usam arrays ordenados pré-computados (busca binária por grupo).
+    """
+    try:
+        lista_quantis = [float(q) for q in quantis.split(',') if q.strip()] if quantis else None
+        if as_of is None:
+            return get_sla_distribuicao(metrica=metrica, dimensao=dimensao, limite=limite,
+                                        quantis=lista_quantis, estado=estado)
+        loader = get_loader()
+        df = loader.get_dataframe(as_of=as_of)
+        df = _filter_by_state(df, estado)
+        return get_sla_distribuicao(df, metrica=metrica, dimensao=dimensao, limite=limite, quantis=lista_quantis)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/estatisticas-gerais")
-async def estatisticas_gerais(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def estatisticas_gerais(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira"),
+    exato: bool = Query(True, description="Contagem distinta exata (códigos de dicionário) ou aproximada (HyperLogLog)")
+):
     """
     Estatísticas Gerais: Número de ações, encerramentos e médias globais.
     Retorna:
@@ -403,9 +529,9 @@ async def estatisticas_gerais(estado: Optional[str] = Query(None, description="F
     """
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = _filter_by_state(df, estado)
-        return get_estatisticas_gerais(df)
+        return get_estatisticas_gerais(df, cube=get_cube() if as_of is None else None, estado=estado, exato=exato)
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
@@ -414,7 +540,12 @@ async def estatisticas_gerais(estado: Optional[str] = Query(None, description="F
 
 
 @router.get("/acoes-ganhas-perdidas")
-async def acoes_ganhas_perdidas(estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)")):
+async def acoes_ganhas_perdidas(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira"),
+    limit: int = Query(50, description="Detalhes de acordos por página (máximo 500)"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página de detalhes (detalhes_paginacao.proximo_cursor)")
+):
     """
     Dashboard de Ações Ganhas/Perdidas.
     Retorna estatísticas de ações ganhas (Extinção, Improcedência) e perdidas
@@ -427,14 +558,16 @@ async def acoes_ganhas_perdidas(estado: Optional[str] = Query(None, description=
         logger.info(f"acoes_ganhas_perdidas: Requisição recebida (estado={estado})")
         
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         logger.info(f"acoes_ganhas_perdidas: DataFrame carregado com {len(df)} registros")
         
         df = _filter_by_state(df, estado)
         if estado:
             logger.info(f"acoes_ganhas_perdidas: Filtrado por estado {estado}, {len(df)} registros restantes")
         
-        result = get_dashboard_acoes_ganhas_perdidas(df)
+        result = get_dashboard_acoes_ganhas_perdidas(
+            df, detalhes_limit=limit, detalhes_cursor=cursor,
+            lista=('acoes-ganhas-perdidas', chave_estado(estado), str(as_of)))
         
         # Validar estrutura de resposta
         required_keys = ['ganhas', 'perdidas', 'acordo_antes_sentenca', 'total']
@@ -469,6 +602,8 @@ async def acoes_ganhas_perdidas(estado: Optional[str] = Query(None, description=
         
     except HTTPException:
         raise
+    except SeletorInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
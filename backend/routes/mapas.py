@@ -5,24 +5,30 @@ Rotas para dados de Mapas
 import json
 from pathlib import Path
 from fastapi import APIRouter, HTTPException, Query
+from datetime import date
 from typing import Optional
 from services.data_loader import get_loader
+from services.cache import CachedRoute
 from services.aggregations import get_map_data, apply_global_filters
+from services.cube import get_cube
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.get("/nacional")
 async def mapa_nacional(
     uf: Optional[str] = Query(None, description="Filtrar por estado (UF) - ex: SP, PA"),
-    objeto: Optional[str] = Query(None, description="Filtrar por objeto da ação (cross-filter)")
+    objeto: Optional[str] = Query(None, description="Filtrar por objeto da ação (cross-filter)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira"),
+    estado: Optional[str] = Query(None, description="O mesmo que uf (nome usado pelo filtro de estado do painel)")
 ):
     """Retorna dados para o mapa nacional"""
     try:
+        uf = uf or estado
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         df = apply_global_filters(df, uf=uf, objeto=objeto)
-        result = get_map_data(df)
+        result = get_map_data(df, cube=get_cube() if as_of is None else None, estado=uf, objeto=objeto)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -71,12 +77,13 @@ async def mapa_capitais(
 
 @router.get("/cidades-por-uf")
 async def cidades_por_uf(
-    uf: str = Query(..., description="Sigla do estado (UF) - ex: SP, PA")
+    uf: str = Query(..., description="Sigla do estado (UF) - ex: SP, PA"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
 ):
     """Retorna cidades de um estado específico para expansão no mapa"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         
         uf_upper = uf.strip().upper()
         df_uf = df[df['estado'] == uf_upper].copy()
@@ -2,19 +2,25 @@
 Rotas para dados de Saldo
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from datetime import date
+from typing import Optional
 from services.data_loader import get_loader
-from services.aggregations import get_saldo, get_resumo_saldo
+from services.cache import CachedRoute, cached_section
+from services.transformations import FREQUENCIAS_SERIE
+from services.aggregations import get_saldo, get_resumo_saldo, get_saldo_evolucao
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.get("/")
-async def saldo_entradas_encerramentos():
+async def saldo_entradas_encerramentos(
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Retorna saldo entre entradas e encerramentos"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         result = get_saldo(df)
         return result
     except Exception as e:
@@ -22,12 +28,36 @@ async def saldo_entradas_encerramentos():
 
 
 @router.get("/por-objeto")
-async def saldo_por_objeto():
+async def saldo_por_objeto(
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira")
+):
     """Retorna saldo entre entradas e encerramentos agrupado por objeto da ação"""
     try:
         loader = get_loader()
-        df = loader.get_dataframe()
+        df = loader.get_dataframe(as_of=as_of)
         result = get_resumo_saldo(df)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+
+@router.get("/evolucao")
+async def saldo_evolucao(
+    estado: Optional[str] = Query(None, description="Filtrar por estado (ex: PA, SP)"),
+    as_of: Optional[date] = Query(None, description="Data de referência (AAAA-MM-DD) para reconstruir a carteira"),
+    freq: str = Query('M', description="Granularidade: M (mês), W (semana) ou D (dia)")
+):
+    """Retorna a série do saldo em aberto (backlog acumulado de entradas - encerramentos)"""
+    freq = freq.strip().upper()
+    if freq not in FREQUENCIAS_SERIE:
+        raise HTTPException(status_code=400, detail=f"freq deve ser uma de {FREQUENCIAS_SERIE}")
+    try:
+        def _compute():
+            df = get_loader().get_dataframe(as_of=as_of)
+            if estado and estado.strip():
+                df = df[df['estado'] == estado.strip().upper()].copy()
+            return get_saldo_evolucao(df, freq=freq)
+        return cached_section('saldo_evolucao', _compute, estado=estado, freq=freq, as_of=as_of)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -7,11 +7,20 @@ import numpy as np
 import pandas as pd
 from services.transformations import (
     aggregate_by_object, calculate_evolution, calculate_average_time,
-    calculate_pareto, filter_critical_cases, aggregate_by_state,
+    calculate_pareto, format_critical_cases, aggregate_by_state,
     calculate_sla_by_area, calculate_sentences, calculate_reincidence,
-    calculate_sentences_by_area
+    calculate_sentences_by_area, calculate_time_series, format_sla_by_area
 )
-from typing import Dict, List, Any, Optional
+from services.distributions import (
+    DIMENSOES, METRICAS, QUANTIS_PADRAO, TOTAL, distribution_for, get_distribution
+)
+from services.casos import SeletorInvalido
+from services.cube import SketchCube, construir_cubo
+from services.ordenacoes import Ordenacoes, chave_estado
+from services.paginacao import paginar
+from services.sketches import PERCENTIS_PADRAO, QuantileSketch
+from services.timing import span
+from typing import Dict, Hashable, List, Any, Optional
 
 
 def _json_safe(val):
@@ -39,19 +48,20 @@ def apply_global_filters(df: pd.DataFrame, uf: Optional[str] = None, objeto: Opt
     Returns:
         DataFrame filtrado (cópia)
     """
-    filtered_df = df.copy()
-    
-    # Filtrar por UF (estado)
-    if uf and uf.strip():
-        uf_upper = uf.strip().upper()
-        if 'estado' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['estado'] == uf_upper].copy()
-    
-    # Filtrar por Objeto da Ação
-    if objeto and objeto.strip():
-        objeto_str = objeto.strip()
-        if 'objeto_acao' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['objeto_acao'] == objeto_str].copy()
+    with span('filtro'):
+        filtered_df = df.copy()
+        
+        # Filtrar por UF (estado)
+        if uf and uf.strip():
+            uf_upper = uf.strip().upper()
+            if 'estado' in filtered_df.columns:
+                filtered_df = filtered_df[filtered_df['estado'] == uf_upper].copy()
+        
+        # Filtrar por Objeto da Ação
+        if objeto and objeto.strip():
+            objeto_str = objeto.strip()
+            if 'objeto_acao' in filtered_df.columns:
+                filtered_df = filtered_df[filtered_df['objeto_acao'] == objeto_str].copy()
     
     return filtered_df
 
@@ -322,19 +332,63 @@ def get_resumo_saldo(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
-def get_evolution(df: pd.DataFrame) -> Dict[str, Any]:
-    """Evolução da Carteira: Entradas vs. Encerramentos por Período (Mês)"""
-    evolution = calculate_evolution(df)
+def get_evolution(df: pd.DataFrame, freq: str = 'M') -> Dict[str, Any]:
+    """Evolução da Carteira: Entradas vs. Encerramentos por Período (Mês, Semana ou Dia)"""
+    evolution = calculate_evolution(df, freq=freq)
     
     return {
         'dados': evolution,
-        'total_periodos': len(evolution)
+        'total_periodos': len(evolution),
+        'frequencia': freq
     }
 
 
-def get_map_data(df: pd.DataFrame) -> Dict[str, Any]:
-    """Dados para mapa nacional"""
+def get_saldo_evolucao(df: pd.DataFrame, freq: str = 'M') -> Dict[str, Any]:
+    """
+    Saldo em aberto ao longo do tempo: backlog acumulado (entradas - encerramentos).
+    Complementa o resumo de saldo com a série temporal da carteira em aberto.
+    """
+    serie = calculate_time_series(df, freq=freq)
+    
+    return {
+        'dados': [{'periodo': p['periodo'], 'backlog': p['backlog']} for p in serie],
+        'saldo_atual': serie[-1]['backlog'] if serie else 0,
+        'pico_backlog': max((p['backlog'] for p in serie), default=0),
+        'frequencia': freq
+    }
+
+
+def _percentis_cubo(df: pd.DataFrame, cube: Optional[SketchCube], estado: Optional[str],
+                    objeto: Optional[str]):
+    """
+    Resolve o cubo de sketches e os filtros a aplicar nele: o cubo pré-computado
+    recebe os filtros; um cubo montado a partir do df (já filtrado) não precisa deles.
+    """
+    if cube is None:
+        return construir_cubo(df), {}
+    return cube, {'estado': estado, 'objeto': objeto}
+
+
+def _anexar_percentis(itens: List[Dict], chave: str, sketches: Dict[str, Any], prefixo: str = '') -> None:
+    """Acrescenta p50/p90/p99 do sketch correspondente a cada item (in-place)"""
+    vazio = {nome: None for nome in QuantileSketch().quantiles(PERCENTIS_PADRAO)}
+    for item in itens:
+        sketch = sketches.get(str(item.get(chave)))
+        for nome, valor in (sketch.quantiles(PERCENTIS_PADRAO) if sketch is not None else vazio).items():
+            item[f'{prefixo}{nome}'] = valor
+
+
+def get_map_data(df: pd.DataFrame, cube: Optional[SketchCube] = None,
+                 estado: Optional[str] = None, objeto: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Dados para mapa nacional.
+    Além das médias, cada estado traz p50/p90/p99 de tempo de tramitação e de impacto,
+    obtidos mesclando os sketches das células (UF x Objeto x Área) do cubo.
+    """
     state_data = aggregate_by_state(df)
+    cube, filtros = _percentis_cubo(df, cube, estado, objeto)
+    _anexar_percentis(state_data, 'estado', cube.quantis_por('tempo_tramitacao', 'estado', **filtros), 'tempo_')
+    _anexar_percentis(state_data, 'estado', cube.quantis_por('impacto_financeiro', 'estado', **filtros), 'impacto_')
     
     return {
         'estados': state_data,
@@ -361,13 +415,20 @@ def get_object_by_state(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
-def get_average_time(df: pd.DataFrame) -> Dict[str, Any]:
-    """Tempo Médio de Tramitação"""
-    return calculate_average_time(df)
+def get_average_time(df: pd.DataFrame, cube: Optional[SketchCube] = None,
+                     estado: Optional[str] = None, objeto: Optional[str] = None) -> Dict[str, Any]:
+    """Tempo Médio de Tramitação, com p50/p90/p99 geral, por objeto e por área"""
+    result = calculate_average_time(df)
+    cube, filtros = _percentis_cubo(df, cube, estado, objeto)
+    result['percentis_geral'] = cube.quantis_filtrados('tempo_tramitacao', **filtros).quantiles(PERCENTIS_PADRAO)
+    _anexar_percentis(result['por_objeto'], 'objeto', cube.quantis_por('tempo_tramitacao', 'objeto', **filtros))
+    _anexar_percentis(result['por_area'], 'area', cube.quantis_por('tempo_tramitacao', 'area', **filtros))
+    return result
 
 
-def get_cases_by_impact(df: pd.DataFrame) -> Dict[str, Any]:
-    """Quantidade de Casos x Impacto Médio"""
+def get_cases_by_impact(df: pd.DataFrame, cube: Optional[SketchCube] = None,
+                        estado: Optional[str] = None, objeto: Optional[str] = None) -> Dict[str, Any]:
+    """Quantidade de Casos x Impacto Médio (com p50/p90/p99 do impacto por objeto)"""
     df_copy = df.copy()
     # Criar coluna auxiliar para contagem se data_entrada não existir
     if 'data_entrada' not in df_copy.columns:
@@ -380,135 +441,135 @@ def get_cases_by_impact(df: pd.DataFrame) -> Dict[str, Any]:
     
     grouped.columns = ['objeto', 'quantidade', 'impacto_medio']
     grouped = grouped.sort_values('quantidade', ascending=False)
+    dados = grouped.to_dict('records')
+    cube, filtros = _percentis_cubo(df, cube, estado, objeto)
+    _anexar_percentis(dados, 'objeto', cube.quantis_por('impacto_financeiro', 'objeto', **filtros), 'impacto_')
     
     return {
-        'dados': grouped.to_dict('records')
+        'dados': dados
     }
 
 
-def get_sla_by_area(df: pd.DataFrame) -> Dict[str, Any]:
+def get_sla_by_area(df: Optional[pd.DataFrame] = None, benchmark: float = None,
+                    estado: Optional[str] = None, objeto: Optional[str] = None) -> Dict[str, Any]:
     """
     SLA por Área Interna usando sla_real.
     Retorna dados com benchmark_nacional para o frontend desenhar a linha de corte.
+    Sem df, usa a distribuição pré-computada filtrada por estado/objeto;
+    com df (ex.: reconstrução as_of), monta a distribuição sob demanda.
     """
     from services.data_loader import BENCHMARK_NACIONAL
+
+    if benchmark is None:
+        benchmark = BENCHMARK_NACIONAL
+    if df is not None:
+        dados = calculate_sla_by_area(df, benchmark)
+    else:
+        dist = get_distribution('sla_real', 'area')
+        dados = format_sla_by_area(dist.resumo(estado, objeto), benchmark) if dist else []
     
     return {
-        'dados': calculate_sla_by_area(df),
-        'benchmark_nacional': BENCHMARK_NACIONAL
+        'dados': dados,
+        'benchmark_nacional': benchmark
+    }
+
+
+def _sla_subsidio_vazio(limite_dias: float) -> Dict[str, Any]:
+    return {
+        'dados': [],
+        'media_nacional_sla': 0.0,
+        'media_nacional_tempo': 0.0,
+        'limite_dias': limite_dias
     }
 
 
-def get_sla_subsidio_por_area(df: pd.DataFrame) -> Dict[str, Any]:
+def get_sla_subsidio_por_area(df: Optional[pd.DataFrame] = None, limite_dias: float = None,
+                              estado: Optional[str] = None, objeto: Optional[str] = None) -> Dict[str, Any]:
     """
     Calcula SLA do subsídio por Área Responsável.
-    Refatorado para calcular SLA_Dias usando 'Data de entrada' e 'DATA ENCERRAMENTO'.
+    SLA_Dias = diferença entre 'DATA ENCERRAMENTO' e 'Data de entrada' (casos com as duas datas).
     Lógica:
-    1. Carrega dataframe e converte colunas de data para datetime
-    2. Cria coluna SLA_Dias = diferença entre data_encerramento e data_entrada
-    3. Agrupa por 'Area Responsável' e calcula média de SLA_Dias
-    4. Ordena em ordem decrescente (maior para menor)
+    1. Usa a distribuição ordenada de SLA_Dias por área (pré-computada na base carregada,
+       ou montada sob demanda quando um df já filtrado é passado)
+    2. Média, mediana, p90 e percentual dentro do limite (padrão BENCHMARK_NACIONAL) por área;
+       o percentual é resolvido por busca binária, então qualquer limite tem o mesmo custo
+    3. Ordena em ordem decrescente de tempo médio (maior para menor)
     """
+    from services.data_loader import BENCHMARK_NACIONAL
+
+    if limite_dias is None:
+        limite_dias = BENCHMARK_NACIONAL
     try:
-        df_copy = df.copy()
-        
-        # Verificar se temos as colunas necessárias
-        if 'data_entrada' not in df_copy.columns or 'data_encerramento' not in df_copy.columns:
-            return {
-                'dados': [],
-                'media_nacional_sla': 0.0,
-                'media_nacional_tempo': 0.0
-            }
-        
-        # Converter colunas de data para datetime se ainda não estiverem
-        df_copy['data_entrada'] = pd.to_datetime(df_copy['data_entrada'], errors='coerce')
-        df_copy['data_encerramento'] = pd.to_datetime(df_copy['data_encerramento'], errors='coerce')
-        
-        # Filtrar apenas registros que têm ambas as datas preenchidas
-        df_copy = df_copy[
-            df_copy['data_entrada'].notna() & 
-            df_copy['data_encerramento'].notna()
-        ].copy()
-        
-        if df_copy.empty:
-            return {
-                'dados': [],
-                'media_nacional_sla': 0.0,
-                'media_nacional_tempo': 0.0
-            }
-        
-        # Calcular SLA_Dias = diferença entre data_encerramento e data_entrada
-        df_copy['SLA_Dias'] = (df_copy['data_encerramento'] - df_copy['data_entrada']).dt.days
-        df_copy['SLA_Dias'] = df_copy['SLA_Dias'].clip(lower=0)  # Garantir valores não negativos
-        
-        # Usar 'area_interna' que já mapeia 'Area Responsável'
-        if 'area_interna' not in df_copy.columns:
-            return {
-                'dados': [],
-                'media_nacional_sla': 0.0,
-                'media_nacional_tempo': 0.0
+        dist = distribution_for(df, 'sla', 'area')
+        if dist is None:
+            return _sla_subsidio_vazio(limite_dias)
+        
+        resumo = dist.resumo(estado, objeto, limite=limite_dias) if df is None else dist.resumo(limite=limite_dias)
+        nacional = resumo.pop(TOTAL, None)
+        if not resumo or nacional is None:
+            return _sla_subsidio_vazio(limite_dias)
+        
+        dados = [
+            {
+                'area': area,
+                'tempo_medio_tramitacao': round(r['media'], 2),
+                'quantidade': r['quantidade'],
+                'percentual_dentro_sla': round(r['percentual_dentro'], 2),
+                'mediana_dias': round(r['p50'], 2),
+                'p90_dias': round(r['p90'], 2)
             }
-        
-        # Filtrar áreas válidas
-        df_copy = df_copy[df_copy['area_interna'].notna()].copy()
-        df_copy = df_copy[df_copy['area_interna'] != 'Não Informado'].copy()
-        
-        if df_copy.empty:
-            return {
-                'dados': [],
-                'media_nacional_sla': 0.0,
-                'media_nacional_tempo': 0.0
-            }
-        
-        # Agrupar por área e calcular média de SLA_Dias
-        sla_por_area = df_copy.groupby('area_interna').agg({
-            'SLA_Dias': 'mean'  # Média de SLA_Dias por área
-        }).reset_index()
-        sla_por_area.columns = ['area', 'tempo_medio_tramitacao']
-        
-        # Contar quantidade de casos por área
-        quantidade_por_area = df_copy.groupby('area_interna').size().reset_index(name='quantidade')
-        quantidade_por_area.columns = ['area', 'quantidade']  # Renomear para fazer merge correto
-        sla_por_area = sla_por_area.merge(quantidade_por_area, on='area', how='left')
-        
-        # Calcular média nacional (média geral de SLA_Dias)
-        media_nacional_tempo = df_copy['SLA_Dias'].mean() if len(df_copy) > 0 else 0.0
-        
-        # Calcular percentual dentro do SLA (casos com SLA_Dias <= 23)
-        casos_dentro_sla = (df_copy['SLA_Dias'] <= 23).sum()
-        total_casos = len(df_copy)
-        media_nacional_sla = (casos_dentro_sla / total_casos * 100) if total_casos > 0 else 0.0
-        
-        # Adicionar percentual dentro do SLA por área
-        df_copy['dentro_sla'] = df_copy['SLA_Dias'] <= 23
-        percentual_por_area = df_copy.groupby('area_interna')['dentro_sla'].agg(
-            lambda x: (x.sum() / len(x) * 100) if len(x) > 0 else 0
-        ).reset_index()
-        percentual_por_area.columns = ['area', 'percentual_dentro_sla']  # Renomear para fazer merge correto
-        sla_por_area = sla_por_area.merge(percentual_por_area, on='area', how='left')
-        
+            for area, r in resumo.items()
+        ]
         # Ordenar por tempo_medio_tramitacao em ordem decrescente (maior para menor)
-        sla_por_area = sla_por_area.sort_values('tempo_medio_tramitacao', ascending=False)
-        
-        # Converter para tipos nativos e sanitizar
-        sla_por_area['tempo_medio_tramitacao'] = sla_por_area['tempo_medio_tramitacao'].round(2).astype(float)
-        sla_por_area['quantidade'] = sla_por_area['quantidade'].astype(int)
-        sla_por_area['percentual_dentro_sla'] = sla_por_area['percentual_dentro_sla'].round(2).astype(float)
+        dados.sort(key=lambda x: x['tempo_medio_tramitacao'], reverse=True)
         
         return {
-            'dados': _sanitize_for_json(sla_por_area.to_dict('records')),
-            'media_nacional_sla': float(round(media_nacional_sla, 2)),
-            'media_nacional_tempo': float(round(media_nacional_tempo, 2))
+            'dados': _sanitize_for_json(dados),
+            'media_nacional_sla': float(round(nacional['percentual_dentro'], 2)),
+            'media_nacional_tempo': float(round(nacional['media'], 2)),
+            'mediana_nacional': float(round(nacional['p50'], 2)),
+            'p90_nacional': float(round(nacional['p90'], 2)),
+            'limite_dias': limite_dias
         }
     except Exception as e:
         print(f"get_sla_subsidio_por_area: ERRO: {e}")
         import traceback
         traceback.print_exc()
-        return {
-            'dados': [],
-            'media_nacional_sla': 0.0,
-            'media_nacional_tempo': 0.0
-        }
+        return _sla_subsidio_vazio(limite_dias)
+
+
+def get_sla_distribuicao(df: Optional[pd.DataFrame] = None, metrica: str = 'sla', dimensao: str = 'area',
+                         limite: Optional[float] = None, quantis: Optional[List[float]] = None,
+                         estado: Optional[str] = None, objeto: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Distribuição de dias (SLA, sla_real ou prazo) por área ou objeto.
+    Retorna, por grupo, quantidade, média, quantis pedidos e % dentro do limite.
+    """
+    if metrica not in METRICAS:
+        raise ValueError(f"metrica deve ser uma de {sorted(METRICAS)}")
+    if dimensao not in DIMENSOES:
+        raise ValueError(f"dimensao deve ser uma de {sorted(DIMENSOES)}")
+    quantis = list(quantis) if quantis else list(QUANTIS_PADRAO)
+    if any(q < 0 or q > 1 for q in quantis):
+        raise ValueError("quantis devem estar entre 0 e 1")
+
+    dist = distribution_for(df, metrica, dimensao)
+    resumo = {}
+    if dist is not None:
+        resumo = dist.resumo(estado, objeto, limite, quantis) if df is None else dist.resumo(limite=limite, quantis=quantis)
+    total = resumo.pop(TOTAL, None)
+    dados = sorted(
+        ({'grupo': grupo, **r} for grupo, r in resumo.items()),
+        key=lambda x: x['quantidade'], reverse=True
+    )
+
+    return {
+        'dados': _sanitize_for_json(dados),
+        'total': _sanitize_for_json(total) if total else {'quantidade': 0},
+        'metrica': metrica,
+        'dimensao': dimensao,
+        'limite': limite
+    }
 
 
 def get_areas_responsaveis(df: pd.DataFrame) -> Dict[str, Any]:
@@ -558,62 +619,45 @@ def get_requests_by_deadline(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
-def get_solicitacoes_prazo_por_area(df: pd.DataFrame) -> Dict[str, Any]:
+def get_solicitacoes_prazo_por_area(df: Optional[pd.DataFrame] = None, limite_dias: float = 5,
+                                    estado: Optional[str] = None, objeto: Optional[str] = None) -> Dict[str, Any]:
     """
     Solicitações e Prazo por Área Responsável.
-    Agrupa dados por área e conta casos com prazo <= 5 dias e > 5 dias.
+    Agrupa dados por área e conta casos com prazo <= limite_dias e > limite_dias (padrão 5).
+    As chaves menor_igual_5/maior_5 são mantidas por compatibilidade com o frontend
+    e refletem o limite informado (ver limite_dias na resposta).
     """
     try:
-        df_copy = df.copy()
-        
-        # Verificar se temos as colunas necessárias
-        if 'area_interna' not in df_copy.columns or 'prazo_dias' not in df_copy.columns:
-            return {'dados': []}
-        
-        # Filtrar áreas válidas
-        df_copy = df_copy[df_copy['area_interna'].notna()].copy()
-        df_copy = df_copy[df_copy['area_interna'] != 'Não Informado'].copy()
-        
-        if df_copy.empty:
-            return {'dados': []}
-        
-        # Criar coluna para classificar prazo
-        df_copy['prazo_maior_5'] = df_copy['prazo_dias'] > 5
-        
-        # Agrupar por área e contar casos
-        # Contar casos <= 5 dias
-        menores_igual_5 = df_copy[df_copy['prazo_maior_5'] == False].groupby('area_interna').size().reset_index(name='menor_igual_5')
-        menores_igual_5.columns = ['area', 'menor_igual_5']
-        
-        # Contar casos > 5 dias
-        maiores_5 = df_copy[df_copy['prazo_maior_5'] == True].groupby('area_interna').size().reset_index(name='maior_5')
-        maiores_5.columns = ['area', 'maior_5']
-        
-        # Contar total por área
-        total_por_area = df_copy.groupby('area_interna').size().reset_index(name='total')
-        total_por_area.columns = ['area', 'total']
-        
-        # Fazer merge de todos os dados
-        resultado = total_por_area.merge(menores_igual_5, on='area', how='left')
-        resultado = resultado.merge(maiores_5, on='area', how='left')
-        
-        # Preencher valores NaN com 0
-        resultado['menor_igual_5'] = resultado['menor_igual_5'].fillna(0).astype(int)
-        resultado['maior_5'] = resultado['maior_5'].fillna(0).astype(int)
-        resultado['total'] = resultado['total'].astype(int)
-        
+        dist = distribution_for(df, 'prazo', 'area')
+        if dist is None:
+            return {'dados': [], 'limite_dias': limite_dias}
+        
+        resumo = dist.resumo(estado, objeto, limite=limite_dias) if df is None else dist.resumo(limite=limite_dias)
+        resumo.pop(TOTAL, None)
+        
+        resultado = [
+            {
+                'area': area,
+                'total': r['quantidade'],
+                'menor_igual_5': r['dentro_limite'],
+                'maior_5': r['fora_limite']
+            }
+            for area, r in resumo.items()
+        ]
         # Ordenar por total (maior para menor)
-        resultado = resultado.sort_values('total', ascending=False)
+        resultado.sort(key=lambda x: x['total'], reverse=True)
         
         return {
-            'dados': _sanitize_for_json(resultado.to_dict('records'))
+            'dados': _sanitize_for_json(resultado),
+            'limite_dias': limite_dias
         }
     except Exception as e:
         print(f"get_solicitacoes_prazo_por_area: ERRO: {e}")
         import traceback
         traceback.print_exc()
         return {
-            'dados': []
+            'dados': [],
+            'limite_dias': limite_dias
     }
 
 
@@ -755,10 +799,23 @@ def get_pareto_impact(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
-def get_critical_cases(df: pd.DataFrame) -> Dict[str, Any]:
-    """Casos Críticos - Inclui valor pretendido e separa casos de 2025"""
+def get_critical_cases(df: Optional[pd.DataFrame] = None, limit: int = 20, cursor: Optional[str] = None,
+                       ordens: Optional[Ordenacoes] = None, estado: Optional[str] = None,
+                       lista: Optional[Hashable] = None) -> Dict[str, Any]:
+    """
+    Casos Críticos - Inclui valor pretendido e separa casos de 2025.
+    Paginado (limit/cursor) sobre a ordem por impacto pré-computada em `ordens`; sem
+    ordens (ex.: reconstrução as_of), a ordem é montada sobre df (já filtrado).
+    Os totais são da lista inteira; dados/dados_2025/dados_outros, da página.
+    """
+    if ordens is None:
+        ordens, estado = Ordenacoes(df, por_estado=False, fonte=df), None
+    posicoes = ordens.criticos_de(estado)
+    inicio, fim, paginacao = paginar(len(posicoes), limit, cursor,
+                                     lista if lista is not None else ('casos-criticos', chave_estado(estado)))
     try:
-        critical = filter_critical_cases(df)
+        with span('linhas'):
+            critical = format_critical_cases(ordens.linhas(posicoes[inicio:fim]))
         
         # Garantir que temos os campos necessários
         if critical and len(critical) > 0:
@@ -783,14 +840,16 @@ def get_critical_cases(df: pd.DataFrame) -> Dict[str, Any]:
         # Separar casos de 2025
         casos_2025 = [c for c in critical_sanitized if c.get('ano') == 2025]
         casos_outros = [c for c in critical_sanitized if c.get('ano') != 2025]
+        total_2025 = ordens.criticos_2025.get(chave_estado(estado), 0)
         
         return {
             'dados': critical_sanitized,
             'dados_2025': casos_2025,
             'dados_outros': casos_outros,
-            'total': len(critical_sanitized) if critical_sanitized else 0,
-            'total_2025': len(casos_2025),
-            'total_outros': len(casos_outros)
+            'total': paginacao['total'],
+            'total_2025': total_2025,
+            'total_outros': paginacao['total'] - total_2025,
+            'paginacao': paginacao
         }
     except Exception as e:
         print(f"get_critical_cases: ERRO: {e}")
@@ -827,71 +886,74 @@ def get_sentences_by_area(df: pd.DataFrame) -> Dict[str, Any]:
         }
 
 
-def get_reincidence(df: pd.DataFrame) -> Dict[str, Any]:
-    """Reincidência"""
-    return calculate_reincidence(df)
+def _clientes_distintos_df(df: pd.DataFrame) -> pd.Series:
+    """nome_cliente sem espaços nas pontas, sem vazios (mesma normalização do cubo)"""
+    if 'nome_cliente' not in df.columns:
+        return pd.Series(dtype=object)
+    clientes = df['nome_cliente'].dropna().astype(str).str.strip()
+    return clientes[clientes != '']
 
 
-def get_reincidencia_por_cliente(df: pd.DataFrame, top_n: int = 100) -> Dict[str, Any]:
+def get_reincidence(df: pd.DataFrame, cube: Optional[SketchCube] = None, estado: Optional[str] = None,
+                    exato: bool = True) -> Dict[str, Any]:
+    """
+    Reincidência, com clientes distintos no total e por objeto.
+    Com o cubo, as contagens distintas vêm das células (exatas via códigos ou HyperLogLog).
+    """
+    result = calculate_reincidence(df)
+    if cube is not None:
+        result['clientes_distintos'] = cube.distintos_filtrados('nome_cliente', exato=exato, estado=estado)
+        por_objeto = cube.distintos_por('nome_cliente', 'objeto', exato=exato, estado=estado)
+    else:
+        clientes = _clientes_distintos_df(df)
+        result['clientes_distintos'] = int(clientes.nunique())
+        por_objeto = clientes.groupby(df.loc[clientes.index, 'objeto_acao']).nunique().to_dict() \
+            if 'objeto_acao' in df.columns else {}
+    result['clientes_por_objeto'] = [
+        {'objeto': objeto, 'clientes_distintos': int(qtd)}
+        for objeto, qtd in sorted(por_objeto.items(), key=lambda x: x[1], reverse=True)
+    ]
+    return result
+
+
+def get_reincidencia_por_cliente(df: Optional[pd.DataFrame] = None, top_n: int = 100, cube: Optional[SketchCube] = None,
+                                 estado: Optional[str] = None, exato: bool = True, cursor: Optional[str] = None,
+                                 ordens: Optional[Ordenacoes] = None, lista: Optional[Hashable] = None) -> Dict[str, Any]:
     """
     Reincidência por Cliente.
-    Agrupa por nome_cliente, conta processos e soma impacto_financeiro (resultado).
-    Retorna TOP N clientes ordenados por resultado (prejuízo) decrescente.
+    Agrupa por nome_cliente, conta processos e soma impacto_financeiro (resultado),
+    por resultado (prejuízo) decrescente, em páginas de top_n clientes (cursor).
+    Com `ordens`, a tabela ordenada é a pré-computada da UF; sem, é montada sobre df.
+    Com o cubo, total_clientes vem da contagem distinta das células; total_processos
+    e total_resultado somam todos os clientes, não só a página.
     """
+    if ordens is None:
+        ordens, chave = Ordenacoes(df, por_estado=False, fonte=df), None
+    else:
+        chave = estado
+    tabela = ordens.clientes_de(chave)
+    inicio, fim, paginacao = paginar(len(tabela), top_n, cursor,
+                                     lista if lista is not None else ('reincidencia-por-cliente', chave_estado(estado)))
     try:
-        # Verificar se temos as colunas necessárias
-        if 'nome_cliente' not in df.columns or 'impacto_financeiro' not in df.columns:
+        if tabela.empty:
             return {
                 'dados': [],
                 'total_clientes': 0,
                 'total_processos': 0,
-                'total_resultado': 0.0
+                'total_resultado': 0.0,
+                'paginacao': paginacao
             }
         
-        # Filtrar registros com nome_cliente válido
-        df_copy = df[df['nome_cliente'].notna()].copy()
-        df_copy = df_copy[df_copy['nome_cliente'] != ''].copy()
-        
-        if df_copy.empty:
-            return {
-                'dados': [],
-                'total_clientes': 0,
-                'total_processos': 0,
-                'total_resultado': 0.0
-            }
-        
-        # Agrupar por nome_cliente
-        grouped = df_copy.groupby('nome_cliente').agg({
-            'impacto_financeiro': 'sum'
-        }).reset_index()
-        
-        # Adicionar contagem de processos usando size()
-        process_counts = df_copy.groupby('nome_cliente').size().reset_index(name='qtd_processos')
-        grouped = grouped.merge(process_counts, on='nome_cliente', how='left')
-        
-        # Renomear colunas
-        grouped.columns = ['nome_cliente', 'resultado', 'qtd_processos']
-        
-        # Garantir que qtd_processos não seja NaN
-        grouped['qtd_processos'] = grouped['qtd_processos'].fillna(0).astype(int)
-        
-        # Ordenar por resultado (prejuízo) decrescente
-        grouped = grouped.sort_values('resultado', ascending=False)
-        
-        # Limitar ao TOP N
-        grouped = grouped.head(top_n)
-        
-        # Sanitizar valores para JSON
-        grouped['resultado'] = grouped['resultado'].fillna(0).astype(float)
-        grouped['nome_cliente'] = grouped['nome_cliente'].astype(str)
-        
         # Calcular totais
-        total_clientes = int(df_copy['nome_cliente'].nunique())
-        total_processos = int(len(df_copy))
-        total_resultado = float(_json_safe(grouped['resultado'].sum()))
+        if cube is not None:
+            total_clientes = cube.distintos_filtrados('nome_cliente', exato=exato, estado=estado)
+        else:
+            total_clientes = int(len(tabela))
+        total_processos = int(tabela['qtd_processos'].sum())
+        total_resultado = float(_json_safe(tabela['resultado'].sum()))
         
         # Converter para dict e sanitizar
-        dados_dict = grouped.to_dict('records')
+        dados_dict = tabela.iloc[inicio:fim].to_dict('records')
         for item in dados_dict:
             item['nome_cliente'] = str(item.get('nome_cliente', 'N/A'))
             item['qtd_processos'] = int(_json_safe(item.get('qtd_processos', 0)))
@@ -901,7 +963,8 @@ def get_reincidencia_por_cliente(df: pd.DataFrame, top_n: int = 100) -> Dict[str
             'dados': _sanitize_for_json(dados_dict),
             'total_clientes': total_clientes,
             'total_processos': total_processos,
-            'total_resultado': total_resultado
+            'total_resultado': total_resultado,
+            'paginacao': paginacao
         }
     except Exception as e:
         print(f"get_reincidencia_por_cliente: ERRO: {e}")
@@ -1013,7 +1076,8 @@ def get_final_kpis(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
-def get_estatisticas_gerais(df: pd.DataFrame) -> Dict[str, Any]:
+def get_estatisticas_gerais(df: pd.DataFrame, cube: Optional[SketchCube] = None,
+                            estado: Optional[str] = None, exato: bool = True) -> Dict[str, Any]:
     """
     Estatísticas Gerais: Número de ações, encerramentos e médias globais.
     Inclui valor da causa (valor pretendido) e média de pagamento.
@@ -1021,13 +1085,19 @@ def get_estatisticas_gerais(df: pd.DataFrame) -> Dict[str, Any]:
     Do ponto de vista jurídico: uma "ação" = um processo judicial único.
     Portanto, contamos processos únicos quando numero_processo está disponível,
     senão contamos registros com data_entrada.
+    
+    Com o cubo, processos únicos saem das células (códigos de dicionário no modo exato,
+    HyperLogLog no aproximado) sem percorrer as entradas.
     """
     # Total de ações (entradas)
-    entradas = df[df['data_entrada'].notna()].copy()
+    entradas = df[df['data_entrada'].notna()]
     
     # Juridicamente, uma ação = um processo único
     # Se temos numero_processo, contar processos únicos
-    if 'numero_processo' in entradas.columns:
+    if cube is not None and 'numero_processo' in cube.distintos:
+        total_acoes = (cube.distintos_filtrados('numero_processo', exato=exato, estado=estado)
+                       + cube.sem_chave_filtrados('numero_processo', estado=estado))
+    elif 'numero_processo' in entradas.columns:
         # Contar processos únicos (removendo NaN e strings vazias)
         processos_validos = entradas['numero_processo'].dropna()
         processos_validos = processos_validos[processos_validos.astype(str).str.strip() != '']
@@ -1079,13 +1149,17 @@ def get_estatisticas_gerais(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
-def get_dashboard_acoes_ganhas_perdidas(df: pd.DataFrame) -> Dict[str, Any]:
+def get_dashboard_acoes_ganhas_perdidas(df: pd.DataFrame, detalhes_limit: int = 50,
+                                        detalhes_cursor: Optional[str] = None,
+                                        lista: Optional[Hashable] = None) -> Dict[str, Any]:
     """
     Dashboard de Ações Ganhas/Perdidas.
     Classifica ações encerradas em:
     - Ganhas: Extinção, Improcedência
     - Perdidas: Pagamento Condenação, Acordo Pós Sentença, Condenação Sem Ônus
     - Acordo Antes Sentença: casos específicos (com gráfico de economia)
+    Os detalhes dos acordos saem em páginas (detalhes_limit/detalhes_cursor); quantidade
+    e totais continuam sobre todos os acordos.
     """
     import logging
     logger = logging.getLogger(__name__)
@@ -1185,10 +1259,12 @@ def get_dashboard_acoes_ganhas_perdidas(df: pd.DataFrame) -> Dict[str, Any]:
         economia_total = valor_pretendido_acordo - valor_acordo_total
         percentual_acordo_antes = (qtd_acordo_antes / total_encerrados * 100) if total_encerrados > 0 else 0.0
         
-        # Detalhes do acordo antes sentença
+        # Detalhes do acordo antes sentença (só a página pedida)
+        inicio, fim, detalhes_paginacao = paginar(qtd_acordo_antes, detalhes_limit, detalhes_cursor,
+                                                  lista if lista is not None else 'acoes-ganhas-perdidas')
         detalhes_acordo = []
         if len(acordo_antes) > 0:
-            for _, row in acordo_antes.iterrows():
+            for _, row in acordo_antes.iloc[inicio:fim].iterrows():
                 detalhes_acordo.append({
                     'numero_processo': str(row.get('numero_processo', 'N/A')),
                     'nome_cliente': str(row.get('nome_cliente', 'N/A')),
@@ -1214,7 +1290,8 @@ def get_dashboard_acoes_ganhas_perdidas(df: pd.DataFrame) -> Dict[str, Any]:
                 'valor_pretendido_total': float(_json_safe(valor_pretendido_acordo)),
                 'valor_acordo_total': float(_json_safe(valor_acordo_total)),
                 'economia_total': float(_json_safe(economia_total)),
-                'detalhes': _sanitize_for_json(detalhes_acordo)
+                'detalhes': _sanitize_for_json(detalhes_acordo),
+                'detalhes_paginacao': detalhes_paginacao
             },
             'total': int(total_encerrados)
         }
@@ -1223,6 +1300,8 @@ def get_dashboard_acoes_ganhas_perdidas(df: pd.DataFrame) -> Dict[str, Any]:
         logger.debug(f'get_dashboard_acoes_ganhas_perdidas: Estrutura retornada: {list(result.keys())}')
         
         return result
+    except SeletorInvalido:
+        raise
     except Exception as e:
         logger.error(f'get_dashboard_acoes_ganhas_perdidas: Erro ao processar dados: {str(e)}', exc_info=True)
         # Retornar estrutura vazia em caso de erro
@@ -0,0 +1,458 @@
+"""
+Avisos de Atualização da Base (Server-Sent Events)
+Uma thread verifica a data de modificação dos arquivos da base a cada
+ATUALIZACAO_INTERVALO_S. Quando mudam:
+1. DataLoader.reload() cria uma nova geração (as planilhas são lidas uma vez só, ver abaixo);
+2. as respostas em cache das rotas que não leem nenhuma coluna alterada são copiadas
+   para a nova geração (registro em services/dependencias.py) e seguem quentes; só as
+   demais são recalculadas, nesta thread;
+3. as respostas padrão de cada rota são comparadas, por hash, com as da geração
+   anterior → seções alteradas;
+4. um evento 'geracao' vai para todos os clientes de /api/atualizacoes, com as seções
+   alteradas e uma janela (espalhar_ms) em que cada cliente sorteia quando buscar de novo,
+   em vez de todos recarregarem ao mesmo tempo.
+O id do evento é a versão dos arquivos (datas e tamanhos), igual em todos os workers:
+um cliente que reconecta (Last-Event-ID) em outro worker recebe só o que perdeu.
+
+Onde a verificação roda:
+- gunicorn com PRELOAD=1: no master (iniciar_no_master, chamado em when_ready). Ele relê a
+  base, recalcula as respostas e manda SIGHUP a si mesmo; o gunicorn cria workers novos a
+  partir da memória do master (geração, cache e último evento por copy-on-write) e encerra
+  os antigos. Os workers não verificam nada.
+- sem preload, com vários workers: o worker que segura a trava de arquivo (líder) relê as
+  planilhas e publica a geração como snapshot em ATUALIZACAO_DIR; os demais só carregam esse
+  snapshot, sem reler as planilhas. Se o líder morrer, outro assume na verificação seguinte.
+- um só processo (ou sem fcntl): ele mesmo relê a base.
+
+Configuração por ambiente:
+- ATUALIZACAO_INTERVALO_S: intervalo da verificação (padrão 60; 0 desliga)
+- ATUALIZACAO_ESPALHAMENTO_MS: janela de espalhamento das novas buscas (padrão 30000)
+- ATUALIZACAO_DIR: trava do líder e snapshots publicados (padrão: diretório temporário)
+"""
+
+import asyncio
+import gc
+import hashlib
+import json
+import logging
+import os
+import signal
+import tempfile
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+from services.logs import evento as registrar_evento
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos, cada processo relê a base
+    fcntl = None
+
+INTERVALO_S = float(os.getenv('ATUALIZACAO_INTERVALO_S', '60'))
+ESPALHAMENTO_MS = int(os.getenv('ATUALIZACAO_ESPALHAMENTO_MS', '30000'))
+PASTA = Path(os.getenv('ATUALIZACAO_DIR') or os.path.join(tempfile.gettempdir(), 'dashboard_atualizacoes'))
+
+# Marcador da última geração publicada pelo líder: {'versao', 'snapshot'}
+ARQUIVO_GERACAO = 'geracao.json'
+
+# Comentário periódico no fluxo: proxies não derrubam a conexão ociosa
+HEARTBEAT_S = 15.0
+
+# Espera sugerida ao navegador antes de reconectar (campo retry do SSE)
+RECONEXAO_MS = 10000
+
+# Chaves da resposta que mudam a cada geração sem mudança nos dados (ver services/paginacao.py)
+CHAVES_POR_GERACAO = ('cursor', 'proximo_cursor')
+
+# Eventos pendentes por cliente; um cliente lento perde os mais antigos, não trava os demais
+FILA_MAXIMA = 8
+
+
+def versao_fonte(loader) -> str:
+    """Assinatura dos arquivos da base (caminho, mtime, tamanho); '' sem arquivos"""
+    partes = []
+    for caminho in loader.arquivos_fonte():
+        try:
+            info = caminho.stat()
+        except OSError:
+            continue
+        partes.append(f"{caminho.name}:{info.st_mtime_ns}:{info.st_size}")
+    return hashlib.sha1('|'.join(partes).encode('utf-8')).hexdigest()[:12] if partes else ''
+
+
+def _sem_cursores(valor: Any) -> Any:
+    """Cursores de paginação levam a versão dos dados: mudam a cada geração mesmo sem mudança"""
+    if isinstance(valor, dict):
+        return {k: _sem_cursores(v) for k, v in valor.items() if k not in CHAVES_POR_GERACAO}
+    if isinstance(valor, list):
+        return [_sem_cursores(v) for v in valor]
+    return valor
+
+
+def _hash_resposta(corpo: bytes) -> str:
+    try:
+        corpo = json.dumps(_sem_cursores(json.loads(corpo)), sort_keys=True).encode('utf-8')
+    except ValueError:
+        pass
+    return hashlib.sha1(corpo).hexdigest()
+
+
+def assinaturas_secoes(app) -> Dict[str, str]:
+    """
+    Hash da resposta padrão de cada rota (caminho → sha1). Roda as requisições pela pilha
+    do app, então também deixa essas respostas no cache da geração atual.
+    """
+    from services.warmup import alvos, requisitar
+    assinaturas = {}
+    for caminho, params in alvos(app, []):
+        if params:
+            continue
+        codigo, corpo = asyncio.run(requisitar(app, caminho, params))
+        assinaturas[caminho] = _hash_resposta(corpo) if codigo == 200 else f'status:{codigo}'
+    return assinaturas
+
+
+class _Canal:
+    """Assinantes (event loop, fila) e o último evento publicado"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._assinantes: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self.ultimo: Optional[Dict[str, Any]] = None
+
+    def assinar(self) -> Tuple[asyncio.AbstractEventLoop, asyncio.Queue]:
+        assinatura = (asyncio.get_running_loop(), asyncio.Queue(maxsize=FILA_MAXIMA))
+        with self._lock:
+            self._assinantes.add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura) -> None:
+        with self._lock:
+            self._assinantes.discard(assinatura)
+
+    def assinantes(self) -> int:
+        with self._lock:
+            return len(self._assinantes)
+
+    def publicar(self, evento: Dict[str, Any]) -> None:
+        """Chamado da thread de verificação: entrega em cada event loop de forma segura"""
+        with self._lock:
+            self.ultimo = evento
+            assinantes = list(self._assinantes)
+        for loop, fila in assinantes:
+            try:
+                loop.call_soon_threadsafe(_entregar, fila, evento)
+            except RuntimeError:  # loop já encerrado
+                self.cancelar((loop, fila))
+
+
+def _entregar(fila: asyncio.Queue, evento: Dict[str, Any]) -> None:
+    if fila.full():
+        fila.get_nowait()
+    fila.put_nowait(evento)
+
+
+class _Verificador:
+    def __init__(self):
+        self.versao: Optional[str] = None
+        self.assinaturas: Dict[str, str] = {}
+        # Hash de cada coluna da base na versão acima (services/dependencias.py)
+        self.colunas: Optional[Dict[str, str]] = None
+        self.parar = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        # Master do gunicorn que verifica pelos workers (PRELOAD=1); herdado no fork
+        self.pid_master: Optional[int] = None
+        # Arquivo da trava de líder, aberto enquanto este worker for o líder
+        self.trava = None
+
+
+canal = _Canal()
+_verificador = _Verificador()
+
+# Recarga no master: o fork de um worker espera a geração ficar completa (os.register_at_fork)
+_recarga = threading.RLock()
+
+
+def _nova_trava_recarga() -> None:
+    global _recarga
+    _recarga = threading.RLock()
+
+
+def _pasta() -> Path:
+    """Diretório comum aos workers de um mesmo master (o processo pai de todos)"""
+    return PASTA / f'mestre-{os.getppid()}'
+
+
+def _limpar_pastas_antigas() -> None:
+    """Remove as pastas (e snapshots) de masters que já não existem"""
+    for pasta in PASTA.glob('mestre-*'):
+        try:
+            os.kill(int(pasta.name.split('-', 1)[1]), 0)
+            continue
+        except ProcessLookupError:
+            pass
+        except (ValueError, OSError):
+            continue
+        for arquivo in pasta.iterdir():
+            arquivo.unlink(missing_ok=True)
+        try:
+            pasta.rmdir()
+        except OSError:
+            pass
+
+
+def _lider() -> bool:
+    """True se este worker relê as planilhas: segura a trava de arquivo (ou não há fcntl)"""
+    if fcntl is None or _verificador.trava is not None:
+        return True
+    pasta = _pasta()
+    pasta.mkdir(parents=True, exist_ok=True)
+    arquivo = open(pasta / 'lider.lock', 'a')
+    try:
+        fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        arquivo.close()
+        return False
+    _verificador.trava = arquivo
+    _limpar_pastas_antigas()
+    return True
+
+
+def _publicar_geracao(loader, versao: str) -> None:
+    """Líder: grava a nova geração (snapshot) e depois o marcador que os demais workers leem"""
+    pasta = _pasta()
+    try:
+        snapshot = loader.salvar_snapshot(pasta / f'geracao-{versao}.pkl')
+    except OSError as e:
+        # Sem o snapshot, os demais workers esperam (e assumem se este líder morrer)
+        print(f"Erro ao publicar a nova geração para os workers: {e}")
+        return
+    marcador = pasta / ARQUIVO_GERACAO
+    temporario = marcador.with_name(marcador.name + '.tmp')
+    temporario.write_text(json.dumps({'versao': versao, 'snapshot': snapshot.name}), encoding='utf-8')
+    temporario.replace(marcador)
+    for antigo in pasta.glob('geracao-*.pkl'):
+        if antigo != snapshot:
+            antigo.unlink(missing_ok=True)
+
+
+def _geracao_publicada(loader) -> Optional[Path]:
+    """Snapshot publicado pelo líder para a versão atual dos arquivos; None enquanto não houver"""
+    pasta = _pasta()
+    try:
+        marcador = json.loads((pasta / ARQUIVO_GERACAO).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    snapshot = pasta / str(marcador.get('snapshot') or '')
+    # Marcador de uma versão anterior: o líder ainda está relendo as planilhas
+    if marcador.get('versao') != versao_fonte(loader) or not snapshot.is_file():
+        return None
+    return snapshot
+
+
+def estado_atual() -> Dict[str, Any]:
+    """Geração carregada neste worker (evento 'estado', enviado ao conectar)"""
+    from services.data_loader import get_loader
+    loader = get_loader()
+    return {
+        'versao': _verificador.versao if _verificador.versao is not None else versao_fonte(loader),
+        'geracao': loader.generation,
+        'carregado_em': loader.loaded_at,
+        'registros': len(loader._df) if loader._df is not None else 0,
+    }
+
+
+def verificar(app, snapshot: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """
+    Recarrega e publica se os arquivos mudaram desde a última verificação; devolve o evento.
+    snapshot: geração publicada pelo líder, carregada no lugar das planilhas.
+    """
+    from services.busca import get_indice_busca
+    from services.cache import response_cache, versao_dados
+    from services.cube import get_cube
+    from services.data_loader import get_loader
+    from services.dependencias import afetada, colunas_alteradas, get_assinaturas_colunas
+    from services.warmup import requisitar
+
+    loader = get_loader()
+    versao = versao_fonte(loader)
+    if versao == _verificador.versao:
+        return None
+
+    inicio = time.perf_counter()
+    anterior = _verificador.versao
+    antes = _verificador.assinaturas
+    geracao_anterior = loader.generation
+    colunas_antes = _verificador.colunas if _verificador.colunas is not None else get_assinaturas_colunas()
+    versao_anterior = versao_dados()
+    loader.reload(snapshot)
+    if snapshot is None and _verificador.trava is not None:
+        _publicar_geracao(loader, versao)
+    colunas_depois = get_assinaturas_colunas()
+    versao_nova = versao_dados()
+    # Dia de referência diferente: idades mudaram, nada é reaproveitado
+    alteradas = colunas_alteradas(colunas_antes, colunas_depois) \
+        if versao_anterior[1] == versao_nova[1] else None
+    mantidas, pendentes = response_cache.promover_rotas(
+        versao_anterior, versao_nova, lambda caminho, params: not afetada(caminho, params, alteradas))
+    get_cube()
+    get_indice_busca()
+    for caminho, params in pendentes:
+        if _verificador.parar.is_set():
+            break
+        asyncio.run(requisitar(app, caminho, params))
+    depois = assinaturas_secoes(app)
+    _verificador.versao, _verificador.assinaturas, _verificador.colunas = versao, depois, colunas_depois
+
+    evento = {
+        **estado_atual(),
+        'versao_anterior': anterior,
+        'geracao_anterior': geracao_anterior,
+        'secoes_alteradas': sorted(c for c in set(antes) | set(depois) if antes.get(c) != depois.get(c)),
+        'secoes': len(depois),
+        'colunas_alteradas': sorted(alteradas) if alteradas is not None else None,
+        'respostas_mantidas': mantidas,
+        'respostas_recalculadas': len(pendentes),
+        'espalhar_ms': ESPALHAMENTO_MS,
+        'recarga_s': round(time.perf_counter() - inicio, 3),
+    }
+    canal.publicar(evento)
+    registrar_evento("atualizacoes", "nova_geracao", {
+        **{k: evento[k] for k in ('versao', 'geracao', 'registros', 'secoes', 'recarga_s',
+                                  'respostas_mantidas', 'respostas_recalculadas')},
+        'alteradas': len(evento['secoes_alteradas']),
+        'clientes': canal.assinantes(),
+    }, nivel=logging.INFO)
+    return evento
+
+
+def _registrar_base(app) -> None:
+    """Linha de base: a versão, as respostas e as colunas da carga atual"""
+    from services.data_loader import get_loader
+    from services.dependencias import get_assinaturas_colunas
+    try:
+        _verificador.versao = versao_fonte(get_loader())
+        _verificador.assinaturas = assinaturas_secoes(app)
+        _verificador.colunas = get_assinaturas_colunas()
+    except Exception as e:
+        print(f"Erro ao registrar a base inicial para avisos de atualização: {e}")
+
+
+def _executar(app) -> None:
+    from services import warmup
+    from services.data_loader import get_loader
+
+    # Depois do aquecimento: a linha de base sai do cache
+    while warmup.status()['status'] not in (warmup.PRONTO, warmup.ERRO) and not _verificador.parar.wait(1.0):
+        pass
+    _registrar_base(app)
+    while not _verificador.parar.wait(INTERVALO_S):
+        try:
+            if _lider():
+                verificar(app)
+            elif versao_fonte(get_loader()) != _verificador.versao:
+                snapshot = _geracao_publicada(get_loader())
+                if snapshot is not None:
+                    verificar(app, snapshot)
+        except Exception as e:
+            print(f"Erro ao verificar atualização da base: {e}")
+            traceback.print_exc()
+
+
+def _executar_no_master(app) -> None:
+    from services.data_loader import get_loader
+
+    while not _verificador.parar.wait(INTERVALO_S):
+        try:
+            if versao_fonte(get_loader()) == _verificador.versao:
+                continue
+            with _recarga:
+                # A geração anterior sai da geração permanente do GC; a nova entra no lugar
+                gc.unfreeze()
+                evento = verificar(app)
+                gc.collect()
+                gc.freeze()
+            if evento is not None:
+                # Workers novos a partir desta memória; os antigos terminam as requisições em curso
+                os.kill(os.getpid(), signal.SIGHUP)
+        except Exception as e:
+            print(f"Erro ao verificar atualização da base: {e}")
+            traceback.print_exc()
+
+
+def iniciar_no_master(app) -> None:
+    """
+    gunicorn com PRELOAD=1 (when_ready, antes do primeiro fork): a verificação roda só no
+    master. A linha de base também aquece o cache, que os workers herdam.
+    """
+    if INTERVALO_S <= 0 or _verificador.pid_master is not None:
+        return
+    _verificador.pid_master = os.getpid()
+    _registrar_base(app)
+    os.register_at_fork(before=lambda: _recarga.acquire(), after_in_parent=lambda: _recarga.release(),
+                        after_in_child=_nova_trava_recarga)
+    _verificador.parar.clear()
+    _verificador.thread = threading.Thread(target=_executar_no_master, args=(app,),
+                                           name='atualizacoes', daemon=True)
+    _verificador.thread.start()
+
+
+def iniciar(app) -> None:
+    """Dispara a verificação periódica (lifespan do app); ATUALIZACAO_INTERVALO_S=0 desliga"""
+    if INTERVALO_S <= 0 or (_verificador.thread is not None and _verificador.thread.is_alive()):
+        return
+    # Worker de um master que verifica por ele: só adota as gerações (via SIGHUP)
+    if _verificador.pid_master is not None and _verificador.pid_master != os.getpid():
+        return
+    _verificador.parar.clear()
+    _verificador.thread = threading.Thread(target=_executar, args=(app,), name='atualizacoes', daemon=True)
+    _verificador.thread.start()
+
+
+def parar() -> None:
+    _verificador.parar.set()
+
+
+def _sse(tipo: str, dados: Dict[str, Any], id_evento: Optional[str] = None) -> bytes:
+    linhas = [f"event: {tipo}"]
+    if id_evento:
+        linhas.append(f"id: {id_evento}")
+    linhas.append(f"data: {json.dumps(dados, ensure_ascii=False, separators=(',', ':'))}")
+    return ('\n'.join(linhas) + '\n\n').encode('utf-8')
+
+
+def _perdido(ultimo_id: Optional[str], atual: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Evento para um cliente que reconecta com Last-Event-ID de uma versão anterior"""
+    if not ultimo_id or ultimo_id == atual['versao']:
+        return None
+    ultimo = canal.ultimo
+    if ultimo is not None and ultimo['versao'] == atual['versao'] and ultimo['versao_anterior'] == ultimo_id:
+        return ultimo
+    # Perdeu mais de uma geração (ou veio de outro worker): tudo pode ter mudado
+    return {**atual, 'versao_anterior': ultimo_id, 'secoes_alteradas': None, 'espalhar_ms': ESPALHAMENTO_MS}
+
+
+async def fluxo(ultimo_id: Optional[str] = None) -> AsyncIterator[bytes]:
+    """Corpo de /api/atualizacoes: estado atual, gerações novas e heartbeats"""
+    assinatura = canal.assinar()
+    _, fila = assinatura
+    try:
+        atual = estado_atual()
+        yield f"retry: {RECONEXAO_MS}\n\n".encode('ascii')
+        yield _sse('estado', atual, atual['versao'])
+        perdido = _perdido(ultimo_id, atual)
+        if perdido is not None:
+            yield _sse('geracao', perdido, perdido['versao'])
+        while True:
+            try:
+                evento = await asyncio.wait_for(fila.get(), HEARTBEAT_S)
+            except asyncio.TimeoutError:
+                yield b': ping\n\n'
+                continue
+            yield _sse('geracao', evento, evento['versao'])
+    finally:
+        canal.cancelar(assinatura)
+
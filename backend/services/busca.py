@@ -0,0 +1,188 @@
+"""
+Busca de Clientes e Processos
+Índice em memória sobre os valores distintos de nome_cliente, numero_processo, comarca e
+objeto_acao, montado uma vez por geração da base (aquecimento/preload):
+- normalização sem acento, minúsculas e pontuação como espaço (no número do processo,
+  só letras e dígitos: "0001234-56.2020" e "0001234562020" são a mesma busca);
+- prefixo: valores normalizados ordenados + busca binária;
+- substring: índice invertido de trigramas (vetorizado em numpy), com os ids dos valores
+  em ordem decrescente de ocorrências, então a verificação para cedo nos mais frequentes.
+"""
+
+import bisect
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.casos import SeletorInvalido
+from services.timing import span
+
+# Campos indexados: alias aceito em ?campos= → coluna da base
+CAMPOS_BUSCA = {
+    'cliente': 'nome_cliente',
+    'processo': 'numero_processo',
+    'comarca': 'comarca',
+    'objeto': 'objeto_acao',
+}
+
+# Trigramas só dos primeiros caracteres de cada valor (limita a matriz de bytes)
+LARGURA_MAXIMA = 96
+
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 50
+
+# Candidatos verificados por camada antes de parar (os ids já vêm por frequência)
+CANDIDATOS_POR_CAMADA = 200
+
+# Camadas do ranking (menor = melhor)
+EXATO, PREFIXO, INICIO_PALAVRA, TRECHO = range(4)
+
+_NAO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+def normalizar_texto(texto: Any) -> str:
+    """Sem acentos, minúsculas, pontuação vira espaço"""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii').lower()
+    return _NAO_ALFANUMERICO.sub(' ', texto).strip()
+
+
+def normalizar_codigo(texto: Any) -> str:
+    """Só letras e dígitos (números de processo com ou sem pontuação)"""
+    return normalizar_texto(texto).replace(' ', '')
+
+
+class CampoBusca:
+    """Índice de um campo: valores distintos (por frequência), ordenados e trigramas"""
+
+    def __init__(self, coluna: str, serie: pd.Series):
+        self.coluna = coluna
+        self.normalizar = normalizar_codigo if coluna == 'numero_processo' else normalizar_texto
+        contagem = serie.dropna().astype(str).str.strip()
+        contagem = contagem[contagem != ''].value_counts(sort=True)
+        # id = posição em ordem decrescente de ocorrências
+        self.valores = np.asarray(contagem.index, dtype=object)
+        self.ocorrencias = contagem.to_numpy(dtype=np.int64)
+        self.normalizados = [self.normalizar(v) for v in self.valores]
+
+        ordem = sorted(range(len(self.normalizados)), key=self.normalizados.__getitem__)
+        self._ordenados = [self.normalizados[i] for i in ordem]
+        self._ordem = np.asarray(ordem, dtype=np.int64)
+        self._montar_trigramas()
+
+    def _montar_trigramas(self) -> None:
+        """Pares (trigrama, id) únicos, ordenados por trigrama e depois por id"""
+        self._codigos = np.empty(0, dtype=np.int64)
+        self._ids = np.empty(0, dtype=np.int64)
+        if not self.normalizados:
+            return
+        bytes_ = np.array([v[:LARGURA_MAXIMA].encode('ascii') for v in self.normalizados], dtype='S')
+        largura = bytes_.dtype.itemsize
+        if largura < 3:
+            return
+        matriz = np.frombuffer(bytes_.tobytes(), dtype=np.uint8).reshape(len(bytes_), largura).astype(np.int64)
+        trigramas = (matriz[:, :-2] << 16) | (matriz[:, 1:-1] << 8) | matriz[:, 2:]
+        validos = matriz[:, 2:] != 0  # bytes nulos = fim do valor
+        ids = np.broadcast_to(np.arange(len(bytes_), dtype=np.int64)[:, None], trigramas.shape)[validos]
+        pares = np.unique((trigramas[validos] << 32) | ids)
+        self._codigos = pares >> 32
+        self._ids = pares & 0xFFFFFFFF
+
+    def _postings(self, trigrama: str) -> np.ndarray:
+        b = trigrama.encode('ascii')
+        codigo = (b[0] << 16) | (b[1] << 8) | b[2]
+        inicio = np.searchsorted(self._codigos, codigo, side='left')
+        fim = np.searchsorted(self._codigos, codigo, side='right')
+        return self._ids[inicio:fim]
+
+    def _prefixo(self, consulta: str) -> Iterable[int]:
+        i = bisect.bisect_left(self._ordenados, consulta)
+        encontrados = 0
+        while i < len(self._ordenados) and self._ordenados[i].startswith(consulta):
+            yield int(self._ordem[i])
+            i += 1
+            encontrados += 1
+            if encontrados >= CANDIDATOS_POR_CAMADA:
+                return
+
+    def _trecho(self, consulta: str) -> Iterable[int]:
+        trigramas = {consulta[i:i + 3] for i in range(len(consulta) - 2)}
+        if len(consulta) < 3 or not all(t.isascii() for t in trigramas):
+            return
+        # A lista mais curta gera os candidatos; a verificação por substring cobre as demais
+        candidatos = min((self._postings(t) for t in trigramas), key=len)
+        encontrados = 0
+        for i in candidatos:
+            if consulta in self.normalizados[i]:
+                yield int(i)
+                encontrados += 1
+                if encontrados >= CANDIDATOS_POR_CAMADA:
+                    return
+
+    def buscar(self, consulta: str) -> Dict[int, int]:
+        """id → camada do ranking, para os valores que casam com a consulta"""
+        consulta = self.normalizar(consulta)
+        if not consulta:
+            return {}
+        camadas: Dict[int, int] = {}
+        for i in self._prefixo(consulta):
+            camadas[i] = EXATO if self.normalizados[i] == consulta else PREFIXO
+        for i in self._trecho(consulta):
+            if i not in camadas:
+                palavras = ' ' + self.normalizados[i]
+                camadas[i] = INICIO_PALAVRA if (' ' + consulta) in palavras else TRECHO
+        return camadas
+
+
+class IndiceBusca:
+    """Um CampoBusca por coluna de CAMPOS_BUSCA presente na base"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.campos: Dict[str, CampoBusca] = {
+            alias: CampoBusca(coluna, df[coluna])
+            for alias, coluna in CAMPOS_BUSCA.items() if coluna in df.columns
+        }
+
+    def buscar(self, consulta: str, campos: Optional[List[str]] = None,
+               limite: int = LIMITE_PADRAO) -> List[Dict[str, Any]]:
+        """Resultados ordenados por camada, ocorrências (desc) e tamanho do valor"""
+        resultados = []
+        for alias, campo in self.campos.items():
+            if campos and alias not in campos:
+                continue
+            for i, camada in campo.buscar(consulta).items():
+                resultados.append((camada, -int(campo.ocorrencias[i]), len(campo.valores[i]), alias, i))
+        resultados.sort(key=lambda r: r[:3])
+        return [
+            {
+                'tipo': alias,
+                'campo': self.campos[alias].coluna,
+                'valor': self.campos[alias].valores[i],
+                'ocorrencias': -menos_ocorrencias,
+                'relevancia': ('exato', 'prefixo', 'inicio_palavra', 'trecho')[camada],
+            }
+            for camada, menos_ocorrencias, _, alias, i in resultados[:limite]
+        ]
+
+
+def get_indice_busca() -> IndiceBusca:
+    """Índice sobre a base carregada (um por geração do dataset e dia de referência)"""
+    from services.data_loader import get_loader
+    return get_loader().get_derived('indice_busca', IndiceBusca)
+
+
+def buscar(q: str, campos: Optional[str] = None, limit: int = LIMITE_PADRAO) -> Dict[str, Any]:
+    """Busca por prefixo/trecho nos campos indexados (?campos=cliente,processo,...)"""
+    selecionados = [c.strip() for c in campos.split(',') if c.strip()] if campos else None
+    desconhecidos = [c for c in selecionados or [] if c not in CAMPOS_BUSCA]
+    if desconhecidos:
+        raise SeletorInvalido(f"campos desconhecidos: {', '.join(desconhecidos)} (use {', '.join(CAMPOS_BUSCA)})")
+    if not 1 <= limit <= LIMITE_MAXIMO:
+        raise SeletorInvalido(f"limit deve estar entre 1 e {LIMITE_MAXIMO}")
+    with span('indice'):
+        indice = get_indice_busca()
+    with span('busca'):
+        dados = indice.buscar(q, selecionados, limit)
+    return {'consulta': q, 'dados': dados, 'total': len(dados)}
@@ -0,0 +1,223 @@
+"""
+Cache de Respostas
+Guarda resultados de agregações por (seção, filtros, geração do dataset).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Collection, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from services.compressao import ESCOPO_BRUTO, CorpoCacheado, escolher_codificacao
+from services.metrics import registrar_cache
+from services.projecao import PARAMS_PROJECAO, definir as definir_projecao, parse_projecao, projetar_endpoint
+from services.projecao import restaurar as restaurar_projecao
+from services.timing import TimedRoute, span
+
+# Entradas do cache (respostas de rotas + seções); comporta as variantes por UF de todas as rotas
+CACHE_MAX_ENTRADAS = int(os.getenv('CACHE_MAX_ENTRADAS', '4096'))
+
+# Parâmetros que desligam o cache da rota (?profile=1 precisa medir o cálculo real)
+PARAMS_SEM_CACHE = ('profile',)
+
+
+class ResponseCache:
+    """
+    Cache LRU thread-safe para respostas já agregadas.
+    A chave sempre inclui a geração do DataLoader, então um reload nunca
+    serve dados antigos: as entradas da geração anterior apenas envelhecem.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(secao: str, generation: int, params: Optional[Dict[str, Any]] = None) -> Tuple:
+        """Monta chave estável: parâmetros vazios/None não diferenciam entradas."""
+        itens = tuple(sorted(
+            (k, v.strip().upper() if k in ('estado', 'uf') and isinstance(v, str) else v)
+            for k, v in (params or {}).items()
+            if v is not None and not (isinstance(v, str) and not v.strip())
+        ))
+        return (secao, generation, itens)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        secao = key[0] if isinstance(key, tuple) and key else str(key)
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                valor = self._data[key]
+            else:
+                self.misses += 1
+                valor = default
+        registrar_cache(secao, valor is not default)
+        return valor
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Retorna valor em cache ou calcula (fora do lock) e armazena."""
+        sentinela = object()
+        valor = self.get(key, sentinela)
+        if valor is not sentinela:
+            return valor
+        valor = compute()
+        self.set(key, valor)
+        return valor
+
+    def promover_rotas(self, versao_antiga: Tuple, versao_nova: Tuple,
+                       manter: Callable[[str, Tuple], bool]) -> Tuple[int, list]:
+        """
+        Copia para versao_nova as respostas de rotas da versao_antiga em que
+        manter(caminho, params) é verdadeiro; devolve quantas foram copiadas e os
+        (caminho, params) das demais, para recálculo.
+        """
+        with self._lock:
+            antigas = [(k, v) for k, v in self._data.items()
+                       if k[1] == versao_antiga and isinstance(k[0], str) and k[0].startswith('rota:')]
+        mantidas, pendentes = 0, []
+        for (secao, _, params), valor in antigas:
+            caminho = secao[len('rota:'):]
+            if manter(caminho, params):
+                self.set((secao, versao_nova, params), valor)
+                mantidas += 1
+            else:
+                pendentes.append((caminho, dict(params)))
+        return mantidas, pendentes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entradas': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': (self.hits / total) if total else 0.0
+            }
+
+
+# Instância global do cache
+response_cache = ResponseCache(max_entries=CACHE_MAX_ENTRADAS)
+
+
+def cached_section(secao: str, compute: Callable[[], Any], **params) -> Any:
+    """Atalho para rotas: usa a geração atual do loader na chave do cache."""
+    from services.data_loader import get_loader
+    key = ResponseCache.make_key(secao, get_loader().generation, params)
+    return response_cache.get_or_compute(key, compute)
+
+
+def versao_dados() -> Tuple:
+    """Geração do dataset e dia de referência (idades mudam à meia-noite sem nova geração)"""
+    from services.data_loader import get_loader
+    loader = get_loader()
+    loader._refresh_reference_date()
+    return (loader.generation, str(loader._reference_date))
+
+
+def chave_rota(caminho: str, query_params, aceitos: Optional[Collection[str]] = None) -> Optional[Tuple]:
+    """
+    Chave do cache para um GET (None quando a requisição não deve usar cache). Com
+    aceitos (parâmetros declarados pela rota), os demais não entram na chave: o estado=
+    que o frontend manda a todas as rotas, ou um ?foo=1 qualquer, não criam entradas novas.
+    """
+    params = dict(query_params)
+    if any(p in params for p in PARAMS_SEM_CACHE):
+        return None
+    if aceitos is not None:
+        params = {nome: valor for nome, valor in params.items() if nome in aceitos or nome in PARAMS_PROJECAO}
+    return ResponseCache.make_key(f'rota:{caminho}', versao_dados(), params)
+
+
+def _responder(request: Request, guardado: CorpoCacheado) -> Response:
+    """Resposta a partir do corpo em cache, já comprimida se o cliente aceitar"""
+    codificacao = None if request.scope.get('aquecimento') else \
+        escolher_codificacao(request.headers.get('accept-encoding'))
+    corpo, codificacao = guardado.para(codificacao)
+    # Vary também na versão sem compressão: um cache compartilhado não pode servi-la a
+    # quem aceita gzip/br
+    if codificacao is None:
+        return Response(content=corpo, media_type=guardado.media_type, headers={'Vary': 'Accept-Encoding'})
+    request.scope[ESCOPO_BRUTO] = len(guardado.corpo)
+    return Response(content=corpo, media_type=guardado.media_type,
+                    headers={'Content-Encoding': codificacao, 'Vary': 'Accept-Encoding'})
+
+
+def _erro_as_of(as_of: str) -> Optional[str]:
+    """
+    Mensagem de erro para um as_of posterior à data de referência (os endpoints tratam
+    qualquer exceção como 500); formato inválido fica com a validação do FastAPI (422)
+    """
+    from services.data_loader import AsOfInvalido, get_loader
+    try:
+        get_loader().verificar_as_of(as_of)
+    except AsOfInvalido as e:
+        return str(e)
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+class CachedRoute(TimedRoute):
+    """
+    Rota GET com cache do corpo JSON já serializado, por caminho + parâmetros + versão
+    dos dados. Um acerto não executa o endpoint nem a serialização, e as versões gzip/br
+    ficam na mesma entrada (services/compressao.py). Respostas com erro não são
+    guardadas. Aceita ?fields= e ?format=columnar em qualquer rota (ver
+    services/projecao.py).
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, projetar_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        original = super().get_route_handler()
+        if 'GET' not in (self.methods or ()):
+            return original
+        aceitos = frozenset(p.alias for p in self.dependant.query_params)
+
+        async def handler(request: Request) -> Response:
+            from services.warmup import aguardar_carga
+            await aguardar_carga()
+            if 'as_of' in aceitos and request.query_params.get('as_of'):
+                erro = _erro_as_of(request.query_params['as_of'])
+                if erro is not None:
+                    return JSONResponse({'detail': erro}, status_code=400)
+            try:
+                token = definir_projecao(parse_projecao(request.query_params))
+            except ValueError as e:
+                return JSONResponse({'detail': str(e)}, status_code=400)
+            try:
+                chave = chave_rota(request.url.path, request.query_params, aceitos)
+                if chave is None:
+                    return await original(request)
+                with span('cache'):
+                    guardado = response_cache.get(chave)
+                if guardado is None:
+                    resposta = await original(request)
+                    if resposta.status_code != 200 or not isinstance(getattr(resposta, 'body', None), bytes):
+                        return resposta
+                    guardado = CorpoCacheado(resposta.body, resposta.media_type)
+                    response_cache.set(chave, guardado)
+                return _responder(request, guardado)
+            finally:
+                restaurar_projecao(token)
+
+        return handler
@@ -0,0 +1,221 @@
+"""
+Drill-down de Casos
+Do agregado (uma barra, uma UF no mapa) aos processos que o compõem, sem exportar a
+planilha:
+- índice hash numero_processo → posições das linhas (busca O(1) por processo);
+- listagem paginada dos casos de uma célula (UF x Objeto da Ação x Área), usando as
+  posições por célula do cubo como índice de filtro: cada página custa O(células +
+  tamanho da página), independente do tamanho da base.
+"""
+
+import math
+from datetime import date, datetime
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.cube import DIMENSOES_CUBO, _ALIASES, get_cube
+from services.timing import span
+
+# Colunas devolvidas quando ?fields= não é informado
+CAMPOS_PADRAO = (
+    'numero_processo', 'estado', 'objeto_acao', 'area_interna', 'status', 'nome_cliente',
+    'data_entrada', 'data_encerramento', 'impacto_financeiro', 'tempo_tramitacao', 'critico',
+)
+
+# Casos por página sem ?limit= (máximo: paginacao.LIMITE_MAXIMO)
+LIMITE_PADRAO = 50
+
+
+class SeletorInvalido(ValueError):
+    """Parâmetro de seleção/projeção inválido (a rota responde 400)"""
+
+
+def normalizar_processo(numero: Any) -> str:
+    """Chave do índice: só letras e dígitos, em maiúsculas (0001234-56.2020... == 00012345620200...)"""
+    return ''.join(ch for ch in str(numero) if ch.isalnum()).upper()
+
+
+def chaves_processo(numeros: pd.Series) -> pd.Series:
+    """normalizar_processo vetorizado; NaN onde não há número"""
+    chaves = numeros.astype(str).str.replace(r'[^0-9A-Za-z]', '', regex=True).str.upper()
+    return chaves.where(numeros.notna() & (chaves != '') & (chaves != 'NAN'))
+
+
+class IndiceProcessos:
+    """Posições das linhas de cada número de processo (um processo pode ter várias linhas)"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.posicoes: Dict[str, np.ndarray] = {}
+        if 'numero_processo' not in df.columns or df.empty:
+            return
+        chaves = chaves_processo(df['numero_processo'])
+        self.posicoes = pd.Series(np.arange(len(df))).groupby(chaves.to_numpy(), sort=False).indices
+
+    def buscar(self, numero: Any) -> np.ndarray:
+        return self.posicoes.get(normalizar_processo(numero), np.empty(0, dtype=np.int64))
+
+
+def get_indice_processos() -> IndiceProcessos:
+    """Índice sobre a base carregada (um por geração do dataset e dia de referência)"""
+    from services.data_loader import get_loader
+    return get_loader().get_derived('indice_processos', IndiceProcessos)
+
+
+def parse_campos(campos: Optional[str], disponiveis) -> List[str]:
+    """Projeção pedida em ?fields=a,b,c (padrão: CAMPOS_PADRAO presentes na base)"""
+    disponiveis = list(disponiveis)
+    if not campos or not campos.strip():
+        return [c for c in CAMPOS_PADRAO if c in disponiveis]
+    pedidos = [c.strip() for c in campos.split(',') if c.strip()]
+    desconhecidos = [c for c in pedidos if c not in disponiveis]
+    if desconhecidos:
+        raise SeletorInvalido(f"fields desconhecidos: {', '.join(desconhecidos)}")
+    return list(dict.fromkeys(pedidos))
+
+
+def parse_celula(celula: Optional[str]) -> Dict[str, str]:
+    """
+    Seletor de célula 'dim:valor;dim:valor' (dim em uf/objeto/area ou o nome da coluna
+    do cubo), ex.: celula=objeto:Cobrança indevida;area:Jurídico Interno
+    """
+    filtros: Dict[str, str] = {}
+    if not celula or not celula.strip():
+        return filtros
+    for parte in celula.split(';'):
+        if not parte.strip():
+            continue
+        dim, sep, valor = parte.partition(':')
+        coluna = _ALIASES.get(dim.strip(), dim.strip())
+        if not sep or coluna not in DIMENSOES_CUBO:
+            raise SeletorInvalido(
+                f"seletor de célula inválido: '{parte}' (use dim:valor com dim em "
+                f"{', '.join(list(_ALIASES) + list(DIMENSOES_CUBO))})")
+        filtros[coluna] = valor.strip()
+    return filtros
+
+
+def combinar_filtros(uf: Optional[str], objeto: Optional[str], area: Optional[str],
+                      celula: Dict[str, str]) -> Optional[Dict[str, str]]:
+    """Filtros globais + seletor; None se pedirem valores diferentes para a mesma dimensão"""
+    filtros: Dict[str, str] = {}
+    for coluna, valor in (('estado', uf), ('objeto_acao', objeto), ('area_interna', area), *celula.items()):
+        if valor is None or not str(valor).strip():
+            continue
+        valor = str(valor).strip().upper() if coluna == 'estado' else str(valor).strip()
+        if filtros.get(coluna, valor) != valor:
+            return None
+        filtros[coluna] = valor
+    return filtros
+
+
+def fatiar(partes: List[np.ndarray], inicio: int, fim: int) -> np.ndarray:
+    """Posições [inicio, fim) da concatenação das partes, sem concatená-las"""
+    tamanhos = np.fromiter((len(p) for p in partes), dtype=np.int64, count=len(partes))
+    limites = np.concatenate(([0], np.cumsum(tamanhos)))
+    pedacos = []
+    i = int(np.searchsorted(limites, inicio, side='right')) - 1
+    while 0 <= i < len(partes) and limites[i] < fim:
+        pedacos.append(partes[i][max(inicio - limites[i], 0):min(fim - limites[i], tamanhos[i])])
+        i += 1
+    return np.concatenate(pedacos) if pedacos else np.empty(0, dtype=np.int64)
+
+
+def _valor_json(valor: Any) -> Any:
+    """Valor de célula para JSON: ausentes → None, datas em ISO, numpy → Python"""
+    if valor is None or valor is pd.NaT:
+        return None
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, (bool, np.bool_)):
+        return bool(valor)
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    if isinstance(valor, (float, np.floating)):
+        return None if not math.isfinite(valor) else float(valor)
+    if pd.isna(valor):
+        return None
+    return valor
+
+
+def registros(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Linhas como dicts prontos para JSON"""
+    colunas = list(df.columns)
+    return [{c: _valor_json(v) for c, v in zip(colunas, linha)}
+            for linha in df.itertuples(index=False, name=None)]
+
+
+def selecionar(filtros: Optional[Dict[str, str]], df: Optional[pd.DataFrame] = None) -> List[np.ndarray]:
+    """
+    Posições das linhas que atendem os filtros, em partes (uma por célula do cubo, em
+    ordem de chave). Sem df, usa o cubo da base carregada; com df, filtra o DataFrame.
+    """
+    from services.data_loader import get_loader
+
+    base = df if df is not None else get_loader()._df
+    if filtros is None or base is None or base.empty:
+        return []
+    if df is None:
+        return [pos for _, pos in get_cube().posicoes_filtradas(**filtros)]
+    mask = np.ones(len(df), dtype=bool)
+    for coluna, valor in filtros.items():
+        if coluna in df.columns:
+            mask &= (df[coluna].fillna('Não Informado').astype(str) == valor).to_numpy()
+    return [np.flatnonzero(mask)]
+
+
+def listar_casos(uf: Optional[str] = None, objeto: Optional[str] = None, area: Optional[str] = None,
+                 celula: Optional[str] = None, campos: Optional[str] = None,
+                 limit: int = LIMITE_PADRAO, cursor: Optional[str] = None,
+                 df: Optional[pd.DataFrame] = None, lista: Optional[Hashable] = None) -> Dict[str, Any]:
+    """
+    Casos da célula selecionada (filtros globais + seletor), paginados por cursor
+    (services/paginacao.py) e projetados. A ordem é a das posições por célula do cubo,
+    estável dentro de uma geração. Sem df, usa o cubo da base carregada; com df (ex.:
+    reconstrução as_of), filtra o DataFrame recebido (custo proporcional à base).
+    """
+    from services.data_loader import get_loader
+    from services.paginacao import paginar
+
+    loader = get_loader()
+    base = df if df is not None else loader._df
+    colunas = parse_campos(campos, base.columns if base is not None else [])
+    filtros = combinar_filtros(uf, objeto, area, parse_celula(celula))
+
+    with span('selecao'):
+        partes = selecionar(filtros, df)
+        total = int(sum(len(p) for p in partes))
+        inicio, fim, paginacao = paginar(total, limit, cursor,
+                                         lista if lista is not None else ('casos', uf, objeto, area, celula))
+        posicoes = fatiar(partes, inicio, fim)
+
+    with span('linhas'):
+        if df is None:
+            linhas = loader.linhas(posicoes, colunas)
+        else:
+            linhas = df.iloc[posicoes][colunas]
+        dados = registros(linhas)
+
+    return {
+        'dados': dados,
+        'total': total,
+        'paginacao': paginacao,
+        'campos': colunas,
+        'filtros': filtros or {},
+    }
+
+
+def buscar_processo(numero: str, campos: Optional[str] = None) -> Dict[str, Any]:
+    """Linhas de um número de processo pelo índice hash (formatação do número é ignorada)"""
+    from services.data_loader import get_loader
+
+    loader = get_loader()
+    colunas = parse_campos(campos, loader._df.columns if loader._df is not None else [])
+    with span('indice'):
+        posicoes = get_indice_processos().buscar(numero)
+    with span('linhas'):
+        dados = registros(loader.linhas(posicoes, colunas)) if len(posicoes) else []
+    return {'numero_processo': numero, 'dados': dados, 'total': len(dados), 'campos': colunas}
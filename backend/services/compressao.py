@@ -0,0 +1,174 @@
+"""
+Compressão de Respostas
+gzip (e brotli, se o pacote estiver instalado) conforme o Accept-Encoding do cliente,
+só para corpos a partir de COMPRESSAO_MIN_BYTES e de tipos textuais (JSON, CSV, NDJSON).
+- Rotas em cache (CachedRoute) guardam cada codificação junto do corpo: a compressão
+  roda uma vez por entrada e codificação, nunca por requisição;
+- as demais respostas de corpo único passam pelo CompressaoMiddleware; respostas em
+  streaming (exportação) seguem sem alteração (a exportação tem o próprio gzip=true).
+Tamanho bruto x comprimido por rota vai para as métricas (services/metrics.py).
+"""
+
+import gzip
+import os
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+from services.metrics import _rota, registrar_compressao
+from services.timing import span
+
+# Corpos menores que isso saem sem compressão (o ganho não paga os cabeçalhos e a CPU)
+MIN_BYTES = int(os.getenv('COMPRESSAO_MIN_BYTES', '1024'))
+
+# Níveis: gzip 1-9, brotli 0-11 (5 comprime melhor que gzip 6 em tempo parecido)
+NIVEL_GZIP = int(os.getenv('COMPRESSAO_NIVEL_GZIP', '6'))
+NIVEL_BROTLI = int(os.getenv('COMPRESSAO_NIVEL_BROTLI', '5'))
+
+# Ordem de preferência quando o cliente aceita mais de uma
+CODIFICACOES = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+TIPOS_COMPRIMIVEIS = ('application/json', 'application/x-ndjson', 'text/')
+
+# Chave do escopo ASGI com o tamanho bruto de uma resposta já comprimida (para as métricas)
+ESCOPO_BRUTO = 'compressao_bruto'
+
+
+def escolher_codificacao(accept_encoding: Optional[str]) -> Optional[str]:
+    """Melhor codificação aceita pelo cliente (q=0 recusa); None = sem compressão"""
+    if not accept_encoding:
+        return None
+    aceitas: Dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        nome, _, parametros = item.strip().partition(';')
+        peso = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith('q='):
+            try:
+                peso = float(parametros[2:])
+            except ValueError:
+                peso = 0.0
+        aceitas[nome.strip().lower()] = peso
+    candidatas = [c for c in CODIFICACOES if aceitas.get(c, aceitas.get('*', 0.0)) > 0]
+    if not candidatas:
+        return None
+    return max(candidatas, key=lambda c: aceitas.get(c, aceitas.get('*', 0.0)))
+
+
+def comprimivel(corpo: bytes, media_type: Optional[str]) -> bool:
+    return len(corpo) >= MIN_BYTES and bool(media_type) and media_type.startswith(TIPOS_COMPRIMIVEIS)
+
+
+def comprimir(corpo: bytes, codificacao: str) -> bytes:
+    with span('compressao', codificacao):
+        if codificacao == 'br':
+            return brotli.compress(corpo, quality=NIVEL_BROTLI)
+        # mtime=0: mesmo corpo, mesmos bytes (ETag/CDN estáveis)
+        return gzip.compress(corpo, compresslevel=NIVEL_GZIP, mtime=0)
+
+
+class CorpoCacheado:
+    """
+    Corpo serializado de uma rota em cache e suas versões comprimidas, criadas na
+    primeira requisição que pede cada codificação (corridas só repetem o trabalho).
+    """
+
+    __slots__ = ('corpo', 'media_type', '_variantes')
+
+    def __init__(self, corpo: bytes, media_type: Optional[str]):
+        self.corpo = corpo
+        self.media_type = media_type
+        self._variantes: Dict[str, bytes] = {}
+
+    def para(self, codificacao: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """(corpo, Content-Encoding) a enviar para a codificação escolhida"""
+        if codificacao is None or not comprimivel(self.corpo, self.media_type):
+            return self.corpo, None
+        variante = self._variantes.get(codificacao)
+        if variante is None:
+            variante = self._variantes[codificacao] = comprimir(self.corpo, codificacao)
+        return variante, codificacao
+
+
+def _cabecalho(headers, nome: bytes) -> Optional[bytes]:
+    for chave, valor in headers:
+        if chave.lower() == nome:
+            return valor
+    return None
+
+
+def _com_vary(headers):
+    """Headers com Accept-Encoding no Vary (mantendo o que já houver, como Origin)"""
+    vary = _cabecalho(headers, b'vary')
+    if vary is None:
+        return headers + [(b'vary', b'Accept-Encoding')]
+    if b'accept-encoding' in vary.lower():
+        return headers
+    return [(k, v + b', Accept-Encoding' if k.lower() == b'vary' else v) for k, v in headers]
+
+
+class CompressaoMiddleware:
+    """
+    Middleware ASGI puro: comprime respostas de corpo único ainda não comprimidas e
+    registra bruto x enviado por rota (inclusive das que a CachedRoute já comprimiu).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope.get('aquecimento'):
+            await self.app(scope, receive, send)
+            return
+
+        codificacao = escolher_codificacao(
+            (_cabecalho(scope.get('headers', []), b'accept-encoding') or b'').decode('latin-1'))
+        pendente = {}
+
+        async def enviar(mensagem):
+            if mensagem['type'] == 'http.response.start':
+                # Segura o início até saber se o corpo vem inteiro
+                pendente['inicio'] = mensagem
+                return
+            if mensagem['type'] != 'http.response.body' or 'inicio' not in pendente:
+                await send(mensagem)
+                return
+
+            inicio = pendente.pop('inicio')
+            headers = list(inicio.get('headers', []))
+            corpo = mensagem.get('body', b'')
+            ja_codificado = _cabecalho(headers, b'content-encoding')
+            if mensagem.get('more_body') or ja_codificado is not None:
+                # Streaming ou já comprimido pela CachedRoute: segue como está
+                if ja_codificado is not None and ESCOPO_BRUTO in scope:
+                    registrar_compressao(_rota(scope), ja_codificado.decode('latin-1'),
+                                         scope[ESCOPO_BRUTO], len(corpo))
+                await send(inicio)
+                await send(mensagem)
+                return
+
+            media_type = (_cabecalho(headers, b'content-type') or b'').decode('latin-1')
+            if media_type.startswith(TIPOS_COMPRIMIVEIS):
+                # Comprimida ou não, a resposta depende do Accept-Encoding (caches compartilhados)
+                headers = _com_vary(headers)
+            enviado = None
+            if codificacao is not None and comprimivel(corpo, media_type):
+                comprimido = comprimir(corpo, codificacao)
+                if len(comprimido) < len(corpo):
+                    headers = [(k, v) for k, v in headers if k.lower() != b'content-length']
+                    headers += [
+                        (b'content-encoding', codificacao.encode()),
+                        (b'content-length', str(len(comprimido)).encode()),
+                    ]
+                    registrar_compressao(_rota(scope), codificacao, len(corpo), len(comprimido))
+                    enviado = comprimido
+            if enviado is None:
+                registrar_compressao(_rota(scope), 'identity', len(corpo), len(corpo))
+                enviado = corpo
+            await send({**inicio, 'headers': headers})
+            await send({**mensagem, 'body': enviado})
+
+        await self.app(scope, receive, enviar)
@@ -0,0 +1,261 @@
+"""
+Cubo de Células
+Particiona a base em células (UF x Objeto da Ação x Área) e guarda, por célula,
+sketches mescláveis. Qualquer combinação de filtros/agrupamentos é respondida
+mesclando as células correspondentes, sem percorrer as linhas.
+
+Contagens distintas têm dois modos: aproximado (HyperLogLog, custo fixo por célula)
+e exato (códigos de dicionário únicos por célula, unidos sob demanda).
+
+Bases grandes montam o cubo por map-reduce (services/mapreduce.py): um cubo por partição
+de linhas, em processos separados, mesclados célula a célula (SketchCube.mesclar).
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services import mapreduce
+from services.sketches import HyperLogLog, QuantileSketch, hash_chaves
+
+# Dimensões do cubo (colunas do DataFrame mapeado)
+DIMENSOES_CUBO = ('estado', 'objeto_acao', 'area_interna')
+
+# Métricas numéricas com sketch de quantis por célula
+METRICAS_QUANTIS = ('tempo_tramitacao', 'impacto_financeiro')
+
+# Colunas com contagem distinta por célula → coluna que precisa estar preenchida para a linha
+# contar (processos contam só entradas, como em get_estatisticas_gerais)
+DISTINTOS_CUBO = {
+    'numero_processo': 'data_entrada',
+    'nome_cliente': None,
+}
+
+# Todas as colunas lidas na montagem do cubo
+COLUNAS_CUBO = tuple(dict.fromkeys(
+    DIMENSOES_CUBO + METRICAS_QUANTIS + tuple(DISTINTOS_CUBO) + tuple(c for c in DISTINTOS_CUBO.values() if c)))
+
+# Nomes curtos aceitos nas consultas → coluna do cubo
+_ALIASES = {'uf': 'estado', 'objeto': 'objeto_acao', 'area': 'area_interna'}
+
+
+class SketchCube:
+    """
+    Células do cubo com sketches de quantis para tempo_tramitacao e impacto_financeiro.
+    Células vazias não são materializadas; a chave de cada célula é a tupla de valores
+    das dimensões na ordem de DIMENSOES_CUBO.
+    Com codigos_hash=True (cubo de uma partição, ver mesclar), os códigos únicos por célula
+    são os hashes de 64 bits dos valores, sem dicionário, e os HyperLogLog ficam para a
+    mescla, que os monta a partir dos hashes unidos.
+    """
+
+    def __init__(self, df: pd.DataFrame, metricas: Iterable[str] = METRICAS_QUANTIS,
+                 distintos: Optional[Dict[str, Optional[str]]] = None, codigos_hash: bool = False):
+        self.dimensoes = tuple(d for d in DIMENSOES_CUBO if d in df.columns)
+        self.metricas = tuple(m for m in metricas if m in df.columns)
+        distintos = DISTINTOS_CUBO if distintos is None else distintos
+        self.distintos = tuple(c for c in distintos if c in df.columns)
+        self.total_linhas = len(df)
+        self.celulas: List[Tuple] = []
+        # quantis[metrica][i] = sketch da célula i
+        self.quantis: Dict[str, List[QuantileSketch]] = {m: [] for m in self.metricas}
+        # hll[coluna][i] / codigos[coluna][i] = sketch aproximado / códigos únicos ordenados da célula i
+        self.hll: Dict[str, List[HyperLogLog]] = {c: [] for c in self.distintos}
+        self.codigos: Dict[str, List[np.ndarray]] = {c: [] for c in self.distintos}
+        # linhas elegíveis sem chave (ex.: entradas sem número de processo), por célula
+        self.sem_chave: Dict[str, np.ndarray] = {}
+        # dicionário de cada coluna distinta (código → valor), compartilhado por todas as células
+        self.dicionarios: Dict[str, np.ndarray] = {}
+        # posições das linhas de cada célula (usadas por sketches adicionados depois)
+        self._posicoes: List[np.ndarray] = []
+        self._colunas: Dict[str, np.ndarray] = {}
+
+        if not self.dimensoes or df.empty:
+            return
+
+        chaves = df[list(self.dimensoes)].astype(object).where(df[list(self.dimensoes)].notna(), 'Não Informado')
+        indices = chaves.groupby(list(self.dimensoes), sort=False).indices
+        valores = {m: pd.to_numeric(df[m], errors='coerce').to_numpy(dtype=float) for m in self.metricas}
+
+        codificados = {c: self._codificar(df, c, distintos[c]) for c in self.distintos}
+        sem_chave = {c: [] for c in self.distintos}
+
+        for chave, pos in indices.items():
+            chave = chave if isinstance(chave, tuple) else (chave,)
+            self.celulas.append(tuple(str(c) for c in chave))
+            self._posicoes.append(pos)
+            for m in self.metricas:
+                self.quantis[m].append(QuantileSketch.from_values(valores[m][pos]))
+            for c, (codigos, hashes) in codificados.items():
+                cod = codigos[pos]
+                validos = cod >= 0
+                hashes_celula = hashes[cod[validos]]
+                if codigos_hash:
+                    self.codigos[c].append(np.unique(hashes_celula))
+                else:
+                    self.codigos[c].append(np.unique(cod[validos]))
+                    self.hll[c].append(HyperLogLog.from_hashes(hashes_celula))
+                sem_chave[c].append(int(np.count_nonzero(cod == -1)))
+
+        self.sem_chave = {c: np.asarray(v, dtype=np.int64) for c, v in sem_chave.items()}
+        if codigos_hash:
+            self.dicionarios = {}
+
+        self._colunas = {
+            d: np.array([c[i] for c in self.celulas], dtype=object)
+            for i, d in enumerate(self.dimensoes)
+        }
+
+    @classmethod
+    def mesclar(cls, partes: Sequence[Tuple[int, 'SketchCube']]) -> 'SketchCube':
+        """
+        Cubo da base inteira a partir dos cubos de partições (deslocamento = primeira linha
+        da partição), montados com codigos_hash=True. As células saem na ordem da
+        primeira partição em que aparecem; o conteúdo de cada uma é o do cubo montado de
+        uma vez (as consultas não dependem da ordem das células).
+        """
+        partes = sorted(partes, key=lambda p: p[0])
+        primeira = partes[0][1]
+        cubo = cls(pd.DataFrame())
+        cubo.dimensoes, cubo.metricas, cubo.distintos = primeira.dimensoes, primeira.metricas, primeira.distintos
+        cubo.total_linhas = sum(parte.total_linhas for _, parte in partes)
+
+        # Membros de cada célula: (deslocamento, cubo da partição, índice da célula nele)
+        indices: Dict[Tuple, int] = {}
+        membros: List[List[Tuple[int, SketchCube, int]]] = []
+        for deslocamento, parte in partes:
+            for i, chave in enumerate(parte.celulas):
+                j = indices.setdefault(chave, len(indices))
+                if j == len(membros):
+                    membros.append([])
+                membros[j].append((deslocamento, parte, i))
+
+        cubo.celulas = list(indices)
+        cubo._posicoes = [np.concatenate([p._posicoes[i] + d for d, p, i in grupo]) for grupo in membros]
+        cubo.quantis = {m: [QuantileSketch.merge_all(p.quantis[m][i] for _, p, i in grupo) for grupo in membros]
+                        for m in cubo.metricas}
+        cubo.codigos = {c: [np.unique(np.concatenate([p.codigos[c][i] for _, p, i in grupo])) for grupo in membros]
+                        for c in cubo.distintos}
+        # O HyperLogLog de um conjunto de hashes não depende de repetições: igual ao da base inteira
+        cubo.hll = {c: [HyperLogLog.from_hashes(codigos) for codigos in cubo.codigos[c]] for c in cubo.distintos}
+        cubo.sem_chave = {c: np.asarray([sum(int(p.sem_chave[c][i]) for _, p, i in grupo) for grupo in membros],
+                                        dtype=np.int64) for c in cubo.distintos}
+        cubo._colunas = {
+            d: np.array([c[i] for c in cubo.celulas], dtype=object)
+            for i, d in enumerate(cubo.dimensoes)
+        }
+        return cubo
+
+    def _codificar(self, df: pd.DataFrame, coluna: str, exige: Optional[str]):
+        """
+        Códigos de dicionário da coluna (valores sem espaços nas pontas; vazio/NaN = -1;
+        linhas fora do critério `exige` = -2) e o hash de cada valor do dicionário.
+        """
+        texto = df[coluna].astype(str).str.strip()
+        vazio = df[coluna].isna() | (texto == '')
+        codigos, dicionario = pd.factorize(texto.where(~vazio))
+        codigos = codigos.astype(np.int64)
+        if exige is not None and exige in df.columns:
+            codigos[df[exige].isna().to_numpy()] = -2
+        self.dicionarios[coluna] = np.asarray(dicionario, dtype=object)
+        return codigos, hash_chaves(self.dicionarios[coluna])
+
+    def _mascara(self, filtros: Dict[str, Optional[str]]) -> np.ndarray:
+        """Células que atendem os filtros (UF comparada em maiúsculas, como nas rotas)"""
+        mask = np.ones(len(self.celulas), dtype=bool)
+        for nome, valor in filtros.items():
+            if valor is None or not str(valor).strip():
+                continue
+            coluna = _ALIASES.get(nome, nome)
+            if coluna not in self._colunas:
+                continue
+            alvo = str(valor).strip().upper() if coluna == 'estado' else str(valor).strip()
+            mask &= self._colunas[coluna] == alvo
+        return mask
+
+    def quantis_filtrados(self, metrica: str, **filtros) -> QuantileSketch:
+        """Sketch mesclado de todas as células que atendem os filtros"""
+        if metrica not in self.quantis:
+            return QuantileSketch()
+        sketches = self.quantis[metrica]
+        return QuantileSketch.merge_all(sketches[i] for i in np.flatnonzero(self._mascara(filtros)))
+
+    def quantis_por(self, metrica: str, dimensao: str, **filtros) -> Dict[str, QuantileSketch]:
+        """Sketch mesclado por valor de uma dimensão (ex.: por UF), respeitando os filtros"""
+        coluna = _ALIASES.get(dimensao, dimensao)
+        if metrica not in self.quantis or coluna not in self._colunas:
+            return {}
+        sketches = self.quantis[metrica]
+        selecionadas = np.flatnonzero(self._mascara(filtros))
+        grupos: Dict[str, List[QuantileSketch]] = {}
+        for i in selecionadas:
+            grupos.setdefault(self._colunas[coluna][i], []).append(sketches[i])
+        return {valor: QuantileSketch.merge_all(lista) for valor, lista in grupos.items()}
+
+
+    def distintos_filtrados(self, coluna: str, exato: bool = False, **filtros) -> int:
+        """Quantidade de valores distintos da coluna nas células que atendem os filtros"""
+        if coluna not in self.hll:
+            return 0
+        selecionadas = np.flatnonzero(self._mascara(filtros))
+        if exato:
+            partes = [self.codigos[coluna][i] for i in selecionadas]
+            return int(np.unique(np.concatenate(partes)).size) if partes else 0
+        return HyperLogLog.merge_all(self.hll[coluna][i] for i in selecionadas).count()
+
+    def distintos_por(self, coluna: str, dimensao: str, exato: bool = False, **filtros) -> Dict[str, int]:
+        """Valores distintos da coluna por valor de uma dimensão, respeitando os filtros"""
+        dim = _ALIASES.get(dimensao, dimensao)
+        if coluna not in self.hll or dim not in self._colunas:
+            return {}
+        grupos: Dict[str, List[int]] = {}
+        for i in np.flatnonzero(self._mascara(filtros)):
+            grupos.setdefault(self._colunas[dim][i], []).append(i)
+        if exato:
+            return {valor: int(np.unique(np.concatenate([self.codigos[coluna][i] for i in pos])).size)
+                    for valor, pos in grupos.items()}
+        return {valor: HyperLogLog.merge_all(self.hll[coluna][i] for i in pos).count()
+                for valor, pos in grupos.items()}
+
+    def posicoes_filtradas(self, **filtros) -> List[Tuple[Tuple, np.ndarray]]:
+        """
+        (chave, posições das linhas) de cada célula que atende os filtros, em ordem de chave.
+        É o índice de filtro do drill-down: selecionar custa O(células), não O(linhas).
+        """
+        selecionadas = np.flatnonzero(self._mascara(filtros))
+        return sorted(((self.celulas[i], self._posicoes[i]) for i in selecionadas), key=lambda c: c[0])
+
+    def sem_chave_filtrados(self, coluna: str, **filtros) -> int:
+        """Linhas elegíveis sem valor na coluna (ex.: entradas sem número de processo)"""
+        if coluna not in self.sem_chave or not len(self.sem_chave[coluna]):
+            return 0
+        return int(self.sem_chave[coluna][self._mascara(filtros)].sum())
+
+
+def _cubo_parcial(df: pd.DataFrame) -> SketchCube:
+    """Etapa de map: cubo de uma partição (roda em um processo do pool)"""
+    return SketchCube(df, codigos_hash=True)
+
+
+def construir_cubo(df: pd.DataFrame, processos: Optional[int] = None) -> SketchCube:
+    """SketchCube(df); bases a partir de MAPREDUCE_MIN_LINHAS são montadas por map-reduce"""
+    if not mapreduce.usar(len(df), processos):
+        return SketchCube(df)
+    try:
+        return mapreduce.mapear_reduzir(df, [c for c in COLUNAS_CUBO if c in df.columns],
+                                        _cubo_parcial, SketchCube.mesclar, processos)
+    except Exception as e:
+        print(f"Erro no map-reduce do cubo, montando no processo: {e}")
+        return SketchCube(df)
+
+
+def get_cube() -> SketchCube:
+    """Cubo pré-computado sobre a base carregada (um por geração do dataset e dia de referência)"""
+    from services.data_loader import get_loader
+    return get_loader().get_derived('cubo', construir_cubo)
+
+
+def cube_for(df: Optional[pd.DataFrame]) -> SketchCube:
+    """Cubo pré-computado ou, para um DataFrame já filtrado/reconstruído, montado sob demanda"""
+    return get_cube() if df is None else construir_cubo(df)
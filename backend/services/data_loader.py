@@ -3,13 +3,25 @@ Serviço de Carregamento de Dados
 Única fonte: BASE_UNIFICADA (XLSX ou CSV em backend/data).
 """
 
+import logging
+import os
+import numpy as np
 import pandas as pd
-import json
+import pickle
+import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, timedelta
+from typing import List, Optional
 
-_DEBUG_LOG = Path(r"c:\Users\vini\Desktop\zappa + html v2\.cursor\debug.log")
+from services.logs import evento
+from services.timing import span
+
+# Snapshot binário da base já mapeada (ver DataLoader.salvar_snapshot); se o arquivo
+# existir, é carregado no lugar das planilhas (serverless, workers sem openpyxl no caminho)
+SNAPSHOT_ENV = 'DATA_SNAPSHOT'
+VERSAO_SNAPSHOT = 1
 
 # Constante de benchmark nacional para SLA
 BENCHMARK_NACIONAL = 23
@@ -20,8 +32,99 @@ _COLUNAS_VAZIAS = [
 ]
 
 
+def _hoje() -> pd.Timestamp:
+    """Data de referência padrão: hoje à meia-noite"""
+    return pd.Timestamp(datetime.now()).normalize()
+
+
+def _set_tempo_tramitacao(df: pd.DataFrame, referencia: pd.Timestamp) -> None:
+    """Tempo de tramitação (em dias) entre data_entrada e a data de referência"""
+    if 'data_entrada' in df.columns:
+        dias = (referencia - pd.to_datetime(df['data_entrada'], errors='coerce')).dt.days
+        df['tempo_tramitacao'] = dias.fillna(0).astype(int)
+    else:
+        df['tempo_tramitacao'] = 0
+
+
+def _set_critico(df: pd.DataFrame) -> None:
+    """Casos críticos: impacto ou tempo de tramitação acima de 2x a mediana"""
+    if 'impacto_financeiro' in df.columns:
+        impacto_medio = df['impacto_financeiro'].median()
+        tempo_medio = df['tempo_tramitacao'].median()
+        df['critico'] = (
+            (df['impacto_financeiro'] > impacto_medio * 2) |
+            (df['tempo_tramitacao'] > tempo_medio * 2)
+        )
+    else:
+        df['critico'] = False
+
+
+def _apply_reference_date(df: pd.DataFrame, referencia: pd.Timestamp) -> None:
+    """Recalcula, no lugar, todos os campos que dependem da data de referência"""
+    _set_tempo_tramitacao(df, referencia)
+    df['prazo_dias'] = df['tempo_tramitacao'].clip(upper=30)
+    if 'reiteracoes_orig' not in df.columns:
+        # Reiterações estimadas pelo tempo de tramitação
+        df['reiteracoes'] = (df['tempo_tramitacao'] / 30).astype(int).clip(upper=20)
+    _set_critico(df)
+
+
+def parse_reference_date(as_of) -> pd.Timestamp:
+    """Converte date/str (AAAA-MM-DD ou DD/MM/AAAA) em Timestamp à meia-noite"""
+    if isinstance(as_of, str) and '/' in as_of:
+        return pd.to_datetime(as_of.strip(), format='%d/%m/%Y').normalize()
+    return pd.Timestamp(as_of).normalize()
+
+
+class AsOfInvalido(ValueError):
+    """as_of que não dá para reconstruir (posterior à data de referência da base)"""
+
+
+def reconstruct_as_of(df: pd.DataFrame, as_of) -> pd.DataFrame:
+    """
+    Reconstrói a carteira como estava em as_of, com comparações vetorizadas de datas:
+    - Casos com data_entrada posterior a as_of ainda não existiam e são removidos
+      (casos sem data_entrada são mantidos, pois não é possível datá-los)
+    - Encerramentos posteriores a as_of são desfeitos: data/motivo limpos e status 'Em Tramitação'
+    - sla_real, tempo_tramitacao, prazo_dias, reiteracoes estimadas, critico e reincidencia
+      são recalculados para a data de referência
+    Retorna uma cópia; o DataFrame carregado não é alterado.
+    """
+    referencia = parse_reference_date(as_of)
+
+    if 'data_entrada' in df.columns:
+        data_entrada = pd.to_datetime(df['data_entrada'], errors='coerce')
+        snapshot = df.loc[data_entrada.isna() | (data_entrada <= referencia)].copy()
+    else:
+        snapshot = df.copy()
+
+    if 'data_encerramento' in snapshot.columns:
+        data_enc = pd.to_datetime(snapshot['data_encerramento'], errors='coerce')
+        encerra_depois = data_enc > referencia
+        if encerra_depois.any():
+            snapshot.loc[encerra_depois, 'data_encerramento'] = pd.NaT
+            snapshot.loc[encerra_depois, 'status'] = 'Em Tramitação'
+            if 'motivo_encerramento' in snapshot.columns:
+                snapshot['motivo_encerramento'] = snapshot['motivo_encerramento'].astype(object)
+                snapshot.loc[encerra_depois, 'motivo_encerramento'] = None
+
+        if 'data_entrada' in snapshot.columns:
+            sla = (pd.to_datetime(snapshot['data_encerramento'], errors='coerce') -
+                   pd.to_datetime(snapshot['data_entrada'], errors='coerce')).dt.days
+            snapshot['sla_real'] = sla.clip(lower=0).fillna(0).astype(float)
+
+    _apply_reference_date(snapshot, referencia)
+
+    if 'nome_cliente' in snapshot.columns:
+        client_counts = snapshot['nome_cliente'].value_counts()
+        snapshot['reincidencia'] = snapshot['nome_cliente'].map(client_counts) > 1
+
+    return snapshot
+
+
 class DataLoader:
     def __init__(self, data_file: str = None):
+        self._iniciar_estado()
         backend_dir = Path(__file__).parent.parent
         base_dir = backend_dir.parent
 
@@ -29,9 +132,6 @@ class DataLoader:
         # Prioridade: 1) Material Casos Críticos, 2) novos casos (mais recente)
         # Buscar arquivos por padrão para evitar problemas de encoding
         data_dir = backend_dir / "data"
-        self.xlsx_principal = None
-        self.xlsx_novos_casos = None
-        self.xlsx_secundario = None  # Mantido para compatibilidade
         
         # Buscar arquivo principal (Material Casos Críticos)
         for file in data_dir.glob("*.xlsx"):
@@ -52,20 +152,60 @@ class DataLoader:
                 self.xlsx_secundario = file
                 break
         
+        snapshot = os.getenv(SNAPSHOT_ENV)
+        self.snapshot = Path(snapshot) if snapshot else None
+        self._load_data()
+
+    @classmethod
+    def sem_arquivos(cls, origem: str = None) -> 'DataLoader':
+        """
+        Loader sem fontes e sem carga (base sintética dos benchmarks): a base é atribuída
+        depois, em _df, com o mesmo estado inicial de um loader criado por DataLoader()
+        """
+        loader = cls.__new__(cls)
+        loader._iniciar_estado()
+        loader.origem = origem
+        return loader
+
+    def _iniciar_estado(self):
+        """Fontes vazias e estado de carga, cache e derivados antes da primeira carga"""
+        self.xlsx_principal = None
+        self.xlsx_novos_casos = None
+        self.xlsx_secundario = None  # Mantido para compatibilidade
         self.csv_principal = None  # Não usar mais CSV antigo
+        self.snapshot = None
+        # Origem da última carga: 'snapshot' ou 'planilhas'
+        self.origem = None
+        # Colunas de texto guardadas como categóricas (ver compactar) → valor ausente original
+        self.compacto = False
+        self._colunas_compactas = {}
 
         self._df = None
-        self._load_data()
-
-    def _load_data(self):
+        # Geração do dataset: incrementada a cada carga, usada como chave de cache
+        self.generation = 0
+        self.loaded_at = None
+        # Duração da última carga (s), exposta em /metrics
+        self.load_duration = None
+        self._reference_date = None
+        self._lock = threading.Lock()
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+        # Colunas-chave de gerações anteriores (geração → tabela), para o diff entre cargas
+        self._chaves_anteriores = OrderedDict()
+
+    def _load_data(self, snapshot: Optional[Path] = None):
         """Carrega dados das novas bases atualizadas: Material Casos Críticos e novos casos.
-        Mescla ambos arquivos quando disponíveis, priorizando 'novos casos' para colunas duplicadas."""
-        # #region agent log
-        try:
-            with open(_DEBUG_LOG, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"timestamp":int(time.time()*1000),"location":"data_loader._load_data","message":"entry","data":{"xlsx_principal_exists":self.xlsx_principal.exists() if self.xlsx_principal else False,"xlsx_novos_casos_exists":self.xlsx_novos_casos.exists() if self.xlsx_novos_casos else False},"sessionId":"debug-session","hypothesisId":"H1"}) + "\n")
-        except Exception: pass
-        # #endregion
+        Mescla ambos arquivos quando disponíveis, priorizando 'novos casos' para colunas duplicadas.
+        snapshot: gravado por outro processo (ver services/atualizacoes.py); padrão DATA_SNAPSHOT."""
+        inicio_carga = time.perf_counter()
+        snapshot = snapshot if snapshot is not None else self.snapshot
+        if snapshot is not None and snapshot.exists() and self._carregar_snapshot(snapshot):
+            self._finalizar_carga(inicio_carga, 'snapshot')
+            return
+        evento("data_loader._load_data", "entry", {
+            "xlsx_principal_exists": bool(self.xlsx_principal and self.xlsx_principal.exists()),
+            "xlsx_novos_casos_exists": bool(self.xlsx_novos_casos and self.xlsx_novos_casos.exists()),
+        }, hipotese="H1")
         
         df_principal = pd.DataFrame()
         df_novos = pd.DataFrame()
@@ -84,12 +224,7 @@ class DataLoader:
                         df_raw = pd.read_excel(self.xlsx_principal, sheet_name=sheet, engine='openpyxl')
                         df_principal = self._map_columns(df_raw)
                         print(f"Dados carregados do principal: {len(df_principal)} registros da sheet '{sheet}'")
-                        # #region agent log
-                        try:
-                            with open(_DEBUG_LOG, "a", encoding="utf-8") as f:
-                                f.write(json.dumps({"timestamp":int(time.time()*1000),"location":"data_loader._load_data","message":"loaded","data":{"source":"xlsx_principal","sheet":sheet,"nrows":len(df_principal)},"sessionId":"debug-session","hypothesisId":"H1"}) + "\n")
-                        except Exception: pass
-                        # #endregion
+                        evento("data_loader._load_data", "loaded", {"source": "xlsx_principal", "sheet": sheet, "nrows": len(df_principal)}, hipotese="H1")
                 except Exception as e:
                     print(f"Erro ao carregar arquivo principal: {e}")
                     import traceback
@@ -108,12 +243,7 @@ class DataLoader:
                         df_raw = pd.read_excel(self.xlsx_novos_casos, sheet_name=sheet, engine='openpyxl')
                         df_novos = self._map_columns(df_raw)
                         print(f"Dados carregados dos novos casos: {len(df_novos)} registros da sheet '{sheet}'")
-                        # #region agent log
-                        try:
-                            with open(_DEBUG_LOG, "a", encoding="utf-8") as f:
-                                f.write(json.dumps({"timestamp":int(time.time()*1000),"location":"data_loader._load_data","message":"loaded","data":{"source":"xlsx_novos_casos","sheet":sheet,"nrows":len(df_novos)},"sessionId":"debug-session","hypothesisId":"H1"}) + "\n")
-                        except Exception: pass
-                        # #endregion
+                        evento("data_loader._load_data", "loaded", {"source": "xlsx_novos_casos", "sheet": sheet, "nrows": len(df_novos)}, hipotese="H1")
                 except Exception as e:
                     print(f"Erro ao carregar arquivo de novos casos: {e}")
                     import traceback
@@ -154,16 +284,63 @@ class DataLoader:
                     self._df = pd.DataFrame(columns=_COLUNAS_VAZIAS)
             
         except Exception as e:
-            # #region agent log
-            try:
-                with open(_DEBUG_LOG, "a", encoding="utf-8") as f:
-                    f.write(json.dumps({"timestamp":int(time.time()*1000),"location":"data_loader._load_data","message":"exception","data":{"err":str(e),"errtype":type(e).__name__},"sessionId":"debug-session","hypothesisId":"H1"}) + "\n")
-            except Exception: pass
-            # #endregion
+            evento("data_loader._load_data", "exception", {"err": str(e), "errtype": type(e).__name__},
+                   hipotese="H1", nivel=logging.WARNING)
             print(f"Erro ao carregar Base Unificada: {e}")
             import traceback
             traceback.print_exc()
             self._df = pd.DataFrame(columns=_COLUNAS_VAZIAS)
+
+        self._reference_date = _hoje()
+        self._finalizar_carga(inicio_carga, 'planilhas')
+
+    def _finalizar_carga(self, inicio_carga: float, origem: str):
+        """Nova geração do dataset; idades atualizadas se a base veio de outro dia"""
+        self._refresh_reference_date()
+        self.generation += 1
+        self.loaded_at = time.time()
+        self.load_duration = time.perf_counter() - inicio_carga
+        self.origem = origem
+
+    def salvar_snapshot(self, caminho) -> Path:
+        """
+        Grava a base já mapeada (com campos derivados) em formato binário (pickle), para
+        cargas sem reler as planilhas. Só carregar snapshots gerados por este próprio build.
+        """
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_name(caminho.name + '.tmp')
+        with open(temporario, 'wb') as f:
+            pickle.dump({
+                'versao': VERSAO_SNAPSHOT,
+                'gerado_em': time.time(),
+                'data_referencia': self._reference_date,
+                'colunas_compactas': self._colunas_compactas,
+                'df': self._df,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        temporario.replace(caminho)
+        return caminho
+
+    def _carregar_snapshot(self, caminho: Path) -> bool:
+        """Carrega um snapshot de salvar_snapshot; False (cai nas planilhas) se inválido"""
+        try:
+            with open(caminho, 'rb') as f:
+                conteudo = pickle.load(f)
+            if not isinstance(conteudo, dict) or conteudo.get('versao') != VERSAO_SNAPSHOT:
+                print(f"Snapshot ignorado (versão incompatível): {caminho}")
+                return False
+            self._df = conteudo['df']
+            self._colunas_compactas = dict(conteudo.get('colunas_compactas') or {})
+            self.compacto = bool(self._colunas_compactas)
+            # Idades ficam como na geração; _finalizar_carga recalcula para hoje
+            self._reference_date = conteudo.get('data_referencia')
+            print(f"Dados carregados do snapshot: {len(self._df)} registros ({caminho.name})")
+            return True
+        except Exception as e:
+            print(f"Erro ao carregar snapshot {caminho}: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
     
     def _find_sheet(self, xl: pd.ExcelFile, prefer_keywords: list = None) -> str:
         """Encontra a sheet apropriada no arquivo Excel"""
@@ -449,13 +626,8 @@ class DataLoader:
     
     def _calculate_derived_fields(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calcula campos derivados necessários para o dashboard"""
-        # Tempo de tramitação (em dias)
-        if 'data_entrada' in df.columns:
-            hoje = datetime.now()
-            df['tempo_tramitacao'] = (hoje - df['data_entrada']).dt.days
-            df['tempo_tramitacao'] = df['tempo_tramitacao'].fillna(0).astype(int)
-        else:
-            df['tempo_tramitacao'] = 0
+        # Tempo de tramitação (em dias) em relação a hoje; recalculado por dia em get_dataframe
+        _set_tempo_tramitacao(df, _hoje())
 
         # Área interna: preferir Area Responsável (CSV), senão Área Jurídica
         if 'area_responsavel_orig' in df.columns:
@@ -556,15 +728,7 @@ class DataLoader:
         else:
             df['erro_sistemico'] = False
 
-        if 'impacto_financeiro' in df.columns:
-            impacto_medio = df['impacto_financeiro'].median()
-            tempo_medio = df['tempo_tramitacao'].median()
-            df['critico'] = (
-                (df['impacto_financeiro'] > impacto_medio * 2) |
-                (df['tempo_tramitacao'] > tempo_medio * 2)
-            )
-        else:
-            df['critico'] = False
+        _set_critico(df)
 
         # Manter descumprimento_obrigacao para uso em alertas
         # Remover apenas colunas auxiliares temporárias (mantendo originais para referência se necessário)
@@ -572,21 +736,192 @@ class DataLoader:
 
         return df
 
-    def get_dataframe(self):
-        """Retorna o DataFrame completo"""
-        return self._df.copy()
+    def get_dataframe(self, as_of=None):
+        """
+        Retorna o DataFrame completo.
+        Com as_of, reconstrói a carteira como estava naquela data (sem recarregar a base).
+        """
+        if as_of is not None:
+            self.verificar_as_of(as_of)
+            with span('as_of'):
+                return reconstruct_as_of(self._visao(), as_of)
+        self._refresh_reference_date()
+        with span('copia'):
+            if self.compacto:
+                return self._visao(copia=True)
+            return self._df.copy()
+
+    def verificar_as_of(self, as_of) -> pd.Timestamp:
+        """
+        Data de reconstrução como Timestamp; AsOfInvalido se for posterior à data de
+        referência (hoje): a carteira do futuro sairia com idades calculadas até lá.
+        """
+        referencia = parse_reference_date(as_of)
+        self._refresh_reference_date()
+        limite = pd.Timestamp(self._reference_date if self._reference_date is not None else _hoje()).normalize()
+        if referencia > limite:
+            raise AsOfInvalido(f"as_of ({referencia.date()}) posterior à data de referência da base ({limite.date()})")
+        return referencia
+
+    def compactar(self):
+        """
+        Guarda as colunas de texto (object) como categóricas: o DataFrame passa a ter só
+        arrays numéricos (códigos) e dicionários pequenos. Com preload no gunicorn, os
+        workers herdam essas páginas por fork sem duplicá-las: ler uma coluna object
+        incrementa o refcount de cada string e copia a página inteira em cada worker.
+        Os leitores continuam recebendo colunas object (get_dataframe/get_derived).
+        """
+        if self._df is None or self.compacto:
+            return
+        df = self._df.copy(deep=False)
+        colunas = {}
+        for coluna in df.columns:
+            if df[coluna].dtype != object:
+                continue
+            # O categórico guarda ausentes como código -1: o valor original (None ou NaN)
+            # é lembrado para a volta; colunas com os dois ficam como estão
+            ausentes = df[coluna][df[coluna].isna()]
+            tipos = {v is None for v in ausentes.unique()} if len(ausentes) else {False}
+            if len(tipos) > 1:
+                continue
+            try:
+                df[coluna] = df[coluna].astype('category')
+            except (TypeError, ValueError):
+                # Valores não hasheáveis/comparáveis ficam como estão
+                continue
+            colunas[coluna] = None if tipos == {True} else np.nan
+        with self._lock:
+            self._df = df
+            self._colunas_compactas = colunas
+            self.compacto = True
+        with self._derived_lock:
+            self._derived = {}
+
+    def _visao(self, copia: bool = False) -> pd.DataFrame:
+        """
+        Base com as colunas compactadas de volta em object. Sem cópia, as demais colunas
+        são compartilhadas com a base carregada (somente leitura).
+        """
+        if not self.compacto:
+            return self._df.copy() if copia else self._df
+        df = self._df.copy(deep=copia)
+        for coluna, ausente in self._colunas_compactas.items():
+            if coluna not in df.columns or not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+                continue
+            categorico = df[coluna].array
+            codigos = categorico.codes
+            if len(categorico.categories):
+                valores = np.asarray(categorico.categories, dtype=object).take(codigos)
+            else:
+                valores = np.empty(len(codigos), dtype=object)
+            valores[codigos == -1] = ausente
+            df[coluna] = pd.Series(valores, index=df.index, name=coluna)
+        return df
+
+    def linhas(self, posicoes, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Linhas da base pelas posições, só com as colunas pedidas. Custo proporcional às
+        linhas pedidas: colunas compactadas voltam a object só nessas linhas.
+        """
+        self._refresh_reference_date()
+        df = self._df
+        if colunas is None:
+            colunas = list(df.columns)
+        colunas = [c for c in colunas if c in df.columns]
+        posicoes = np.asarray(posicoes, dtype=np.int64)
+        # take nas linhas antes de projetar: iloc com lista de colunas percorre a base inteira
+        parte = df.take(posicoes)[colunas]
+        for coluna in colunas:
+            if self.compacto and coluna in self._colunas_compactas and \
+                    isinstance(parte[coluna].dtype, pd.CategoricalDtype):
+                valores = parte[coluna].to_numpy(dtype=object)
+                valores[pd.isna(valores)] = self._colunas_compactas[coluna]
+                parte[coluna] = valores
+        return parte
+
+    def get_derived(self, nome: str, builder):
+        """
+        Estruturas derivadas da base (índices, distribuições), construídas uma vez
+        por geração do dataset e dia de referência. O builder recebe o DataFrame
+        carregado (sem cópia) e não deve alterá-lo.
+        """
+        self._refresh_reference_date()
+        chave = (nome, self.generation, self._reference_date)
+        valor = self._derived.get(chave)
+        if valor is None and chave not in self._derived:
+            with self._derived_lock:
+                if chave not in self._derived:
+                    # Descartar estruturas de gerações/dias anteriores
+                    for antiga in [k for k in self._derived if k[1:] != chave[1:]]:
+                        del self._derived[antiga]
+                    with span('derivados'):
+                        self._derived[chave] = builder(self._visao())
+            valor = self._derived[chave]
+        return valor
+
+    def _refresh_reference_date(self):
+        """
+        Recalcula idades (tempo_tramitacao e derivados) quando o dia muda,
+        para que um worker de longa duração não sirva idades congeladas na carga.
+        O DataFrame novo substitui o anterior de uma vez (leitores concorrentes seguem com o antigo).
+        """
+        hoje = _hoje()
+        if self._reference_date == hoje or self._df is None:
+            return
+        with self._lock:
+            if self._reference_date == hoje:
+                return
+            df = self._df.copy()
+            _apply_reference_date(df, hoje)
+            self._df = df
+            self._reference_date = hoje
     
-    def reload(self):
-        """Recarrega os dados"""
-        self._load_data()
+    def arquivos_fonte(self) -> List[Path]:
+        """Arquivos lidos pela carga (snapshot, se configurado e presente; senão as planilhas)"""
+        if self.snapshot is not None and self.snapshot.exists():
+            return [self.snapshot]
+        return [p for p in (self.xlsx_principal, self.xlsx_novos_casos) if p is not None and p.exists()]
+
+    def _guardar_chaves(self):
+        """Guarda as colunas-chave da geração atual antes de ela ser substituída (services/diff.py)"""
+        if self._df is None or self.generation == 0:
+            return
+        from services.diff import GERACOES_MANTIDAS, chaves_processos
+        self._chaves_anteriores[self.generation] = self.get_derived('chaves_diff', chaves_processos)
+        while len(self._chaves_anteriores) > GERACOES_MANTIDAS:
+            self._chaves_anteriores.popitem(last=False)
+
+    def geracoes_anteriores(self) -> List[int]:
+        return list(self._chaves_anteriores)
+
+    def chaves_da_geracao(self, geracao: int) -> Optional[pd.DataFrame]:
+        return self._chaves_anteriores.get(geracao)
+
+    def reload(self, snapshot: Optional[Path] = None):
+        """
+        Recarrega os dados (nova geração). Uma base compactada volta compactada: a carga
+        das planilhas produz colunas object, que _visao/linhas deixam passar até lá.
+        snapshot: adota a geração já carregada por outro processo, sem reler as planilhas.
+        """
+        compacto = self.compacto
+        self._guardar_chaves()
+        self._load_data(snapshot)
+        if compacto and (self.origem != 'snapshot' or not self.compacto):
+            with self._lock:
+                self.compacto = False
+                self._colunas_compactas = {}
+            self.compactar()
 
 
 # Instância global do loader
 _loader = None
+_loader_lock = threading.Lock()
 
 def get_loader():
-    """Singleton do DataLoader"""
+    """Singleton do DataLoader (a carga em segundo plano e uma requisição não criam dois)"""
     global _loader
     if _loader is None:
-        _loader = DataLoader()
+        with _loader_lock:
+            if _loader is None:
+                _loader = DataLoader()
     return _loader
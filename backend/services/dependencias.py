@@ -0,0 +1,124 @@
+"""
+Dependências das Seções
+Registro das colunas da base (já mapeadas, inclusive as derivadas como sla_real e
+critico) que cada rota lê, direta ou indiretamente (o cubo, por exemplo). Depois de um
+reload, uma resposta em cache cuja rota não lê nenhuma coluna alterada continua válida:
+é copiada para a nova versão dos dados em vez de recalculada (services/atualizacoes.py).
+
+A alteração de cada coluna é detectada por um hash do conteúdo (assinaturas_colunas),
+calculado uma vez por geração. Rotas fora do registro, com TODAS_AS_COLUNAS ou em
+POR_GERACAO são sempre recalculadas, assim como qualquer resposta quando o dia de
+referência muda (idades).
+
+Ao criar uma rota ou mudar as colunas que uma agregação lê, atualizar DEPENDENCIAS: uma
+coluna esquecida aqui deixa a seção servindo a geração anterior até o próximo reload
+que altere outra coluna declarada.
+"""
+
+import hashlib
+from typing import Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+import pandas as pd
+
+from services import cube
+
+# Dependência de qualquer coluna (seleção de campos livre, registros completos)
+TODAS_AS_COLUNAS = None
+
+# Colunas lidas pelo cubo: toda rota servida por ele depende delas
+COLUNAS_CUBO = frozenset(cube.COLUNAS_CUBO)
+
+_DATAS = frozenset({'data_entrada', 'data_encerramento'})
+_SLA = frozenset({'area_interna', 'estado', 'objeto_acao'}) | _DATAS
+
+DEPENDENCIAS: Dict[str, Optional[FrozenSet[str]]] = {
+    '/api/entradas/por-objeto': frozenset({'data_entrada', 'estado', 'impacto_financeiro', 'objeto_acao'}),
+    '/api/encerramentos/por-objeto': frozenset({
+        'data_encerramento', 'estado', 'impacto_financeiro', 'motivo_encerramento', 'objeto_acao'}),
+    '/api/saldo/': frozenset({'impacto_financeiro', 'motivo_encerramento'}),
+    '/api/saldo/por-objeto': frozenset({'data_entrada', 'motivo_encerramento', 'objeto_acao'}),
+    '/api/saldo/evolucao': _DATAS | {'estado', 'motivo_encerramento'},
+    '/api/mapas/nacional': COLUNAS_CUBO,
+    '/api/mapas/capitais': frozenset(),
+    '/api/mapas/cidades-por-uf': frozenset({'comarca', 'data_entrada', 'estado', 'impacto_financeiro'}),
+    '/api/indicadores/evolucao': _DATAS | {'estado', 'motivo_encerramento'},
+    '/api/indicadores/objeto-por-estado': frozenset({'estado', 'objeto_acao'}),
+    '/api/indicadores/tempo-medio': COLUNAS_CUBO,
+    '/api/indicadores/casos-impacto': COLUNAS_CUBO,
+    '/api/indicadores/sla-area': frozenset({'area_interna', 'estado', 'objeto_acao', 'sla_real'}),
+    '/api/indicadores/solicitacoes-prazo': frozenset({'data_entrada', 'estado', 'impacto_financeiro', 'prazo_dias'}),
+    '/api/indicadores/solicitacoes-prazo-por-area': frozenset({'area_interna', 'estado', 'objeto_acao', 'prazo_dias'}),
+    '/api/indicadores/volume-custo': frozenset({'custo_encerramento', 'estado', 'motivo_encerramento'}),
+    '/api/indicadores/reiteracoes': frozenset({'data_entrada', 'estado', 'objeto_acao', 'reiteracoes'}),
+    '/api/indicadores/pareto': frozenset({'estado', 'impacto_financeiro', 'objeto_acao'}),
+    '/api/indicadores/casos-criticos': TODAS_AS_COLUNAS,
+    '/api/indicadores/sentencas': frozenset({'estado', 'sentenca'}),
+    '/api/indicadores/sentencas-por-area': frozenset({'area_interna', 'estado', 'sentenca'}),
+    '/api/indicadores/reincidencia': COLUNAS_CUBO | {'reincidencia'},
+    '/api/indicadores/reincidencia-por-cliente': COLUNAS_CUBO | {'critico'},
+    '/api/indicadores/tipos-acoes-2025': frozenset({'data_entrada', 'estado', 'impacto_financeiro', 'tipo_acao'}),
+    '/api/indicadores/erro-sistemico': frozenset({
+        'data_entrada', 'erro_sistemico', 'estado', 'impacto_financeiro', 'objeto_acao', 'valor_causa'}),
+    '/api/indicadores/maior-reiteracao': frozenset({'estado', 'impacto_financeiro', 'objeto_acao', 'reiteracoes'}),
+    '/api/indicadores/kpis-finais': frozenset({'critico', 'estado', 'impacto_financeiro', 'motivo_encerramento'}),
+    '/api/indicadores/analise-correlacao': frozenset({
+        'data_entrada', 'estado', 'impacto_financeiro', 'objeto_acao', 'tempo_tramitacao'}),
+    '/api/indicadores/casos-objetos-por-uf': frozenset({'estado', 'objeto_acao'}),
+    '/api/indicadores/prejuizo-por-uf': frozenset({'estado', 'impacto_financeiro'}),
+    '/api/indicadores/areas-responsaveis': frozenset({'area_interna'}),
+    '/api/indicadores/sla-subsidio-por-area': _SLA,
+    '/api/indicadores/sla-distribuicao': _SLA | {'prazo_dias'},
+    '/api/indicadores/estatisticas-gerais': COLUNAS_CUBO | {'motivo_encerramento', 'valor_causa'},
+    '/api/indicadores/acoes-ganhas-perdidas': frozenset({
+        'estado', 'impacto_financeiro', 'motivo_encerramento', 'sentenca', 'valor_causa'}),
+    # ?fields= escolhe qualquer coluna da base
+    '/api/casos': TODAS_AS_COLUNAS,
+    '/api/busca': frozenset({'comarca', 'nome_cliente', 'numero_processo', 'objeto_acao'}),
+}
+
+# Respostas que mudam a cada geração mesmo sem mudança nos dados: cursores de paginação
+# levam a versão (services/paginacao.py) e o diff compara com a geração anterior
+POR_GERACAO = frozenset({
+    '/api/casos',
+    '/api/indicadores/casos-criticos',
+    '/api/indicadores/reincidencia-por-cliente',
+    '/api/indicadores/acoes-ganhas-perdidas',
+    '/api/diff',
+})
+
+# Parâmetros que leem a base por outro caminho (carteira reconstruída em outra data)
+PARAMS_SEM_REGISTRO = ('as_of',)
+
+
+def _hash_coluna(serie: pd.Series) -> str:
+    valores = pd.util.hash_pandas_object(serie, index=False).to_numpy()
+    return hashlib.sha1(valores.tobytes()).hexdigest()
+
+
+def assinaturas_colunas(df: pd.DataFrame) -> Dict[str, str]:
+    """Hash do conteúdo de cada coluna (coluna → sha1), na ordem das linhas"""
+    return {coluna: _hash_coluna(df[coluna]) for coluna in df.columns}
+
+
+def get_assinaturas_colunas() -> Dict[str, str]:
+    """Assinaturas da base carregada (uma vez por geração)"""
+    from services.data_loader import get_loader
+    return get_loader().get_derived('assinaturas_colunas', assinaturas_colunas)
+
+
+def colunas_alteradas(antes: Dict[str, str], depois: Dict[str, str]) -> Set[str]:
+    """Colunas novas, removidas ou com conteúdo diferente"""
+    return {c for c in set(antes) | set(depois) if antes.get(c) != depois.get(c)}
+
+
+def afetada(caminho: str, params: Iterable[Tuple[str, object]], alteradas: Optional[Set[str]]) -> bool:
+    """
+    A resposta em cache de caminho + params precisa ser recalculada?
+    alteradas=None significa que qualquer coluna pode ter mudado.
+    """
+    if alteradas is None or caminho in POR_GERACAO or caminho not in DEPENDENCIAS:
+        return True
+    if any(nome in PARAMS_SEM_REGISTRO for nome, _ in params):
+        return True
+    colunas = DEPENDENCIAS[caminho]
+    return colunas is TODAS_AS_COLUNAS or not colunas.isdisjoint(alteradas)
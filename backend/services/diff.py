@@ -0,0 +1,160 @@
+"""
+Diferenças entre Gerações da Base
+O que entrou, saiu, mudou de status ou de impacto desde uma carga anterior, por
+numero_processo (normalizado como em services/casos.py). A cada reload o DataLoader
+guarda, da geração que sai, só as colunas-chave (hash do processo, UF, objeto, status,
+impacto; ver chaves_processos), então o diff não precisa de uma segunda carga da base.
+A comparação é um merge vetorizado pelos hashes; processos com várias linhas valem
+pela última (como na mescla das planilhas, 'novos casos' por último).
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.casos import SeletorInvalido, chaves_processo
+from services.ordenacoes import chave_estado
+from services.timing import span
+
+# Gerações anteriores guardadas para ?since= (cada uma custa ~40 bytes por processo)
+GERACOES_MANTIDAS = int(os.getenv('DIFF_GERACOES_MANTIDAS', '4'))
+
+# Colunas comparadas, além do número do processo
+COLUNAS_DIFF = ('estado', 'objeto_acao', 'status', 'impacto_financeiro')
+
+CONTAGENS = ('adicionados', 'removidos', 'status_alterado', 'impacto_alterado')
+
+
+def chaves_processos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Uma linha por processo, indexada pelo hash (uint64) do número normalizado, com as
+    colunas de COLUNAS_DIFF (texto como categórico). Linhas sem número ficam de fora.
+    """
+    if 'numero_processo' not in df.columns or df.empty:
+        return pd.DataFrame({c: pd.Series(dtype=object) for c in COLUNAS_DIFF},
+                            index=pd.Index([], dtype=np.uint64, name='processo'))
+    chaves = chaves_processo(df['numero_processo'])
+    validas = chaves.notna().to_numpy()
+    hashes = pd.util.hash_array(chaves.to_numpy(dtype=object)[validas])
+    dados = {}
+    for coluna in COLUNAS_DIFF:
+        if coluna not in df.columns:
+            dados[coluna] = pd.Series(np.nan, index=range(int(validas.sum())))
+            continue
+        valores = df[coluna].to_numpy()[validas]
+        if coluna == 'impacto_financeiro':
+            dados[coluna] = pd.to_numeric(pd.Series(valores), errors='coerce').astype(float)
+        else:
+            dados[coluna] = pd.Series(valores, dtype=object).astype('category')
+    tabela = pd.DataFrame(dados)
+    tabela.index = pd.Index(hashes, name='processo')
+    return tabela[~tabela.index.duplicated(keep='last')]
+
+
+def _texto(serie: pd.Series) -> np.ndarray:
+    return serie.astype(object).to_numpy(dtype=object)
+
+
+def comparar(antes: pd.DataFrame, depois: pd.DataFrame, estado: Optional[str] = None) -> Dict[str, Any]:
+    """Contagens de diferenças (total, por UF, por objeto) e transições de status"""
+    uf = chave_estado(estado)
+    if uf is not None:
+        antes = antes[_texto(antes['estado']) == uf]
+        depois = depois[_texto(depois['estado']) == uf]
+
+    with span('diff'):
+        juntos = antes.merge(depois, left_index=True, right_index=True, how='outer',
+                             suffixes=('_antes', '_depois'), indicator=True)
+        lado = juntos['_merge'].to_numpy()
+        ambos = lado == 'both'
+        adicionados = lado == 'right_only'
+        removidos = lado == 'left_only'
+
+        status_antes, status_depois = _texto(juntos['status_antes']), _texto(juntos['status_depois'])
+        iguais = (status_antes == status_depois) | (pd.isna(status_antes) & pd.isna(status_depois))
+        status_alterado = ambos & ~iguais
+
+        impacto_antes = juntos['impacto_financeiro_antes'].to_numpy(dtype=float)
+        impacto_depois = juntos['impacto_financeiro_depois'].to_numpy(dtype=float)
+        impacto_alterado = ambos & ~np.isclose(impacto_antes, impacto_depois, equal_nan=True)
+        # Variação do impacto total: entra o novo, sai o antigo, alterados pela diferença
+        delta = np.nan_to_num(impacto_depois) * ~removidos - np.nan_to_num(impacto_antes) * ~adicionados
+
+        # Só as linhas com alguma diferença seguem para o agrupamento
+        mudou = adicionados | removidos | status_alterado | impacto_alterado
+        alteradas = juntos[mudou]
+        removidas = removidos[mudou]
+
+        # Processos removidos são contados na UF/objeto que tinham; os demais, nos atuais
+        def dimensao(coluna: str) -> np.ndarray:
+            valores = np.where(removidas, _texto(alteradas[f'{coluna}_antes']), _texto(alteradas[f'{coluna}_depois']))
+            return np.where(pd.isna(valores), 'Não Informado', valores).astype(str)
+
+        tabela = pd.DataFrame({
+            'uf': dimensao('estado'),
+            'objeto': dimensao('objeto_acao'),
+            'adicionados': adicionados[mudou],
+            'removidos': removidas,
+            'status_alterado': status_alterado[mudou],
+            'impacto_alterado': impacto_alterado[mudou],
+            'impacto_delta': delta[mudou],
+        })
+
+        transicoes = pd.DataFrame({
+            'de': status_antes[status_alterado], 'para': status_depois[status_alterado],
+        }).fillna('Não Informado').value_counts().reset_index(name='quantidade')
+
+    return {
+        'totais': {
+            **{c: int(tabela[c].sum()) for c in CONTAGENS},
+            'impacto_delta': round(float(tabela['impacto_delta'].sum()), 2),
+            'processos_antes': int(len(antes)),
+            'processos_depois': int(len(depois)),
+        },
+        'transicoes_status': transicoes.to_dict('records'),
+        'por_uf': _por(tabela, 'uf'),
+        'por_objeto': _por(tabela, 'objeto'),
+    }
+
+
+def _por(tabela: pd.DataFrame, dimensao: str) -> List[Dict[str, Any]]:
+    grupos = tabela.groupby(dimensao, sort=False)[list(CONTAGENS) + ['impacto_delta']].sum()
+    grupos['total'] = grupos[list(CONTAGENS)].sum(axis=1)
+    grupos = grupos.sort_values(['total', 'impacto_delta'], ascending=False, kind='stable')
+    return [
+        {dimensao: chave, **{c: int(linha[c]) for c in CONTAGENS},
+         'impacto_delta': round(float(linha['impacto_delta']), 2)}
+        for chave, linha in grupos.iterrows()
+    ]
+
+
+def get_chaves_atuais() -> pd.DataFrame:
+    """Colunas-chave da base carregada (uma vez por geração)"""
+    from services.data_loader import get_loader
+    return get_loader().get_derived('chaves_diff', chaves_processos)
+
+
+def get_diff(since: Optional[int] = None, estado: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Diferenças da geração `since` para a atual (padrão: a anterior mais recente guardada).
+    Sem gerações anteriores (nenhum reload ainda), diff vazio com since=None.
+    """
+    from services.data_loader import get_loader
+    loader = get_loader()
+    disponiveis = loader.geracoes_anteriores()
+    if since is None:
+        since = disponiveis[-1] if disponiveis else None
+    base = {'since': since, 'geracao': loader.generation, 'geracoes_disponiveis': disponiveis}
+
+    if since is None or since == loader.generation:
+        vazio = pd.DataFrame({c: pd.Series(dtype=object) for c in COLUNAS_DIFF})
+        atuais = get_chaves_atuais() if since is not None else vazio
+        return {**base, **comparar(atuais, atuais, estado)}
+    antes = loader.chaves_da_geracao(since)
+    if antes is None:
+        raise SeletorInvalido(
+            f"geração {since} não disponível para comparação (guardadas: "
+            f"{', '.join(map(str, disponiveis)) or 'nenhuma'}; atual: {loader.generation})")
+    return {**base, **comparar(antes, get_chaves_atuais(), estado)}
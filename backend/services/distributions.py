@@ -0,0 +1,199 @@
+"""
+Distribuições Pré-computadas
+Arrays ordenados de dias (SLA, prazo) por grupo (área, objeto) e por filtro global (UF, objeto).
+Permitem responder "% dentro de X dias", média, mediana e percentis para QUALQUER limite
+em O(log n) por grupo, sem recalcular SLA_Dias a partir das datas a cada requisição.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Rótulo do grupo que reúne todos os registros do nível (média/percentual nacional)
+TOTAL = '__total__'
+
+# Quantis padrão expostos nas respostas
+QUANTIS_PADRAO = (0.5, 0.9)
+
+# Dimensões de agrupamento aceitas → coluna do DataFrame
+DIMENSOES = {
+    'area': 'area_interna',
+    'objeto': 'objeto_acao',
+}
+
+
+def _normalizar_uf(uf: Optional[str]) -> Optional[str]:
+    if uf and str(uf).strip():
+        return str(uf).strip().upper()
+    return None
+
+
+def _normalizar_objeto(objeto: Optional[str]) -> Optional[str]:
+    if objeto and str(objeto).strip():
+        return str(objeto).strip()
+    return None
+
+
+class GroupedDistribution:
+    """
+    Valores ordenados por grupo, materializados em quatro níveis de filtro global:
+    (todos), (UF), (objeto) e (UF, objeto). Cada nível guarda, por grupo, o array
+    ordenado e a soma dos valores (média em O(1)).
+    """
+
+    def __init__(self, valores: pd.Series, grupos: pd.Series,
+                 estados: Optional[pd.Series] = None, objetos: Optional[pd.Series] = None):
+        valores = pd.to_numeric(valores, errors='coerce')
+        validos = valores.notna() & grupos.notna()
+        base = pd.DataFrame({
+            'valor': valores[validos].astype(float).to_numpy(),
+            'grupo': grupos[validos].astype(str).to_numpy(),
+        })
+        if estados is not None:
+            base['uf'] = estados[validos].astype(str).str.strip().str.upper().to_numpy()
+        if objetos is not None:
+            base['objeto'] = objetos[validos].astype(str).str.strip().to_numpy()
+
+        # Ordenar uma única vez: qualquer subconjunto extraído em ordem de posição já sai ordenado
+        base = base.sort_values('valor', kind='stable').reset_index(drop=True)
+        valores_ordenados = base['valor'].to_numpy()
+
+        self._niveis: Dict[Tuple[Optional[str], Optional[str]], Dict[str, Tuple[np.ndarray, float]]] = {}
+        niveis = [[]]
+        if 'uf' in base.columns:
+            niveis.append(['uf'])
+        if 'objeto' in base.columns:
+            niveis.append(['objeto'])
+        if 'uf' in base.columns and 'objeto' in base.columns:
+            niveis.append(['uf', 'objeto'])
+
+        for chaves in niveis:
+            for nivel_chave, por_grupo in self._indices(base, chaves):
+                self._niveis[nivel_chave] = {
+                    grupo: (valores_ordenados[pos], float(valores_ordenados[pos].sum()))
+                    for grupo, pos in por_grupo.items()
+                }
+
+    @staticmethod
+    def _indices(base: pd.DataFrame, chaves: List[str]):
+        """Gera (chave_do_nível, {grupo: posições}) incluindo o grupo TOTAL"""
+        if not chaves:
+            yield (None, None), {**base.groupby('grupo', sort=False).indices, TOTAL: np.arange(len(base))}
+            return
+        total_nivel = base.groupby(chaves, sort=False).indices
+        por_grupo = base.groupby(chaves + ['grupo'], sort=False).indices
+        agrupado: Dict[Tuple, Dict[str, np.ndarray]] = {}
+        for chave, pos in por_grupo.items():
+            *nivel, grupo = chave
+            agrupado.setdefault(tuple(nivel), {})[grupo] = pos
+        for nivel, pos in total_nivel.items():
+            nivel = nivel if isinstance(nivel, tuple) else (nivel,)
+            grupos = agrupado.get(nivel, {})
+            grupos[TOTAL] = pos
+            uf = nivel[chaves.index('uf')] if 'uf' in chaves else None
+            objeto = nivel[chaves.index('objeto')] if 'objeto' in chaves else None
+            yield (uf, objeto), grupos
+
+    def grupos(self, uf: Optional[str] = None, objeto: Optional[str] = None) -> Dict[str, Tuple[np.ndarray, float]]:
+        """Arrays ordenados por grupo para o filtro global; vazio se o filtro não tem registros"""
+        return self._niveis.get((_normalizar_uf(uf), _normalizar_objeto(objeto)), {})
+
+    def resumo(self, uf: Optional[str] = None, objeto: Optional[str] = None,
+               limite: Optional[float] = None, quantis: Sequence[float] = QUANTIS_PADRAO) -> Dict[str, Dict[str, Any]]:
+        """Estatísticas por grupo (inclui TOTAL): quantidade, média, dentro do limite e quantis"""
+        return {
+            grupo: estatisticas(valores, soma, limite, quantis)
+            for grupo, (valores, soma) in self.grupos(uf, objeto).items()
+        }
+
+
+def quantil_ordenado(valores: np.ndarray, q: float) -> float:
+    """Quantil com interpolação linear (mesmo critério de np.quantile) sobre array já ordenado"""
+    n = len(valores)
+    if n == 0:
+        return 0.0
+    pos = q * (n - 1)
+    baixo = int(math.floor(pos))
+    alto = min(baixo + 1, n - 1)
+    return float(valores[baixo] + (valores[alto] - valores[baixo]) * (pos - baixo))
+
+
+def estatisticas(valores: np.ndarray, soma: float, limite: Optional[float] = None,
+                 quantis: Sequence[float] = QUANTIS_PADRAO) -> Dict[str, Any]:
+    """Resumo de um array ordenado; o limite é resolvido com busca binária"""
+    n = len(valores)
+    resultado = {
+        'quantidade': int(n),
+        'media': float(soma / n) if n else 0.0,
+    }
+    for q in quantis:
+        resultado[f'p{int(round(q * 100))}'] = quantil_ordenado(valores, q)
+    if limite is not None:
+        dentro = int(np.searchsorted(valores, limite, side='right'))
+        resultado['dentro_limite'] = dentro
+        resultado['fora_limite'] = int(n - dentro)
+        resultado['percentual_dentro'] = (dentro / n * 100) if n else 0.0
+    return resultado
+
+
+def _areas_validas(df: pd.DataFrame) -> pd.Series:
+    area = df['area_interna']
+    return area.notna() & (area != 'Não Informado')
+
+
+def build_sla_dias(df: pd.DataFrame, dimensao: str = 'area', por_filtro: bool = True) -> Optional[GroupedDistribution]:
+    """SLA_Dias = data_encerramento - data_entrada (>= 0), apenas casos com as duas datas"""
+    coluna = DIMENSOES[dimensao]
+    if 'data_entrada' not in df.columns or 'data_encerramento' not in df.columns or coluna not in df.columns:
+        return None
+    entrada = pd.to_datetime(df['data_entrada'], errors='coerce')
+    encerramento = pd.to_datetime(df['data_encerramento'], errors='coerce')
+    mask = entrada.notna() & encerramento.notna()
+    if dimensao == 'area':
+        mask &= _areas_validas(df)
+    sla = (encerramento[mask] - entrada[mask]).dt.days.clip(lower=0)
+    return _build(df, mask, sla, coluna, por_filtro)
+
+
+def build_coluna(df: pd.DataFrame, valor_col: str, dimensao: str = 'area', por_filtro: bool = True) -> Optional[GroupedDistribution]:
+    """Distribuição de uma coluna já derivada na carga (sla_real, prazo_dias, tempo_tramitacao)"""
+    coluna = DIMENSOES[dimensao]
+    if valor_col not in df.columns or coluna not in df.columns:
+        return None
+    mask = pd.Series(True, index=df.index)
+    if dimensao == 'area':
+        mask &= _areas_validas(df)
+    return _build(df, mask, df.loc[mask, valor_col], coluna, por_filtro)
+
+
+def _build(df: pd.DataFrame, mask: pd.Series, valores: pd.Series, coluna: str, por_filtro: bool) -> GroupedDistribution:
+    estados = df.loc[mask, 'estado'] if por_filtro and 'estado' in df.columns else None
+    objetos = df.loc[mask, 'objeto_acao'] if por_filtro and 'objeto_acao' in df.columns else None
+    return GroupedDistribution(valores, df.loc[mask, coluna], estados, objetos)
+
+
+# Métricas disponíveis para consulta: nome → (construtor, descrição)
+METRICAS = {
+    'sla': (lambda df, dim, pf: build_sla_dias(df, dim, pf), 'Dias entre entrada e encerramento'),
+    'sla_real': (lambda df, dim, pf: build_coluna(df, 'sla_real', dim, pf), 'sla_real calculado na carga (0 se aberto)'),
+    'prazo': (lambda df, dim, pf: build_coluna(df, 'prazo_dias', dim, pf), 'Prazo em dias (tempo de tramitação limitado a 30)'),
+}
+
+
+def get_distribution(metrica: str, dimensao: str = 'area') -> Optional[GroupedDistribution]:
+    """Distribuição pré-computada sobre a base carregada (uma por geração do dataset)"""
+    from services.data_loader import get_loader
+    construtor = METRICAS[metrica][0]
+    return get_loader().get_derived(
+        f'distribuicao:{metrica}:{dimensao}',
+        lambda df: construtor(df, dimensao, True)
+    )
+
+
+def distribution_for(df: Optional[pd.DataFrame], metrica: str, dimensao: str = 'area') -> Optional[GroupedDistribution]:
+    """Usa a distribuição pré-computada ou, se um DataFrame já filtrado for passado, monta uma sob demanda"""
+    if df is None:
+        return get_distribution(metrica, dimensao)
+    return METRICAS[metrica][0](df, dimensao, False)
@@ -0,0 +1,179 @@
+"""
+Exportação de Linhas em Streaming
+As linhas por trás de um gráfico (mesmos filtros do dashboard e do drill-down) saem em
+blocos de LINHAS_POR_BLOCO: cada bloco é lido da base pelas posições, serializado e
+enviado antes do próximo, então a memória do worker não cresce com o resultado.
+Formatos: CSV (sep ';' e decimal ',', como a base em CSV), NDJSON e Parquet (um row
+group por bloco; requer pyarrow, fixado nos requirements). Gzip opcional, em streaming.
+"""
+
+import io
+import os
+import zlib
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependência opcional
+    pa = pq = None
+
+from services.casos import SeletorInvalido, combinar_filtros, fatiar, parse_celula, selecionar
+
+LINHAS_POR_BLOCO = int(os.getenv('EXPORTACAO_LINHAS_POR_BLOCO', '20000'))
+
+# Nível do gzip opcional (compressão em streaming; rápido importa mais que o tamanho)
+NIVEL_GZIP = 6
+
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def parse_colunas(campos: Optional[str], disponiveis) -> List[str]:
+    """Projeção de ?fields=a,b,c; sem campos, todas as colunas da base"""
+    disponiveis = list(disponiveis)
+    if not campos or not campos.strip():
+        return disponiveis
+    pedidos = [c.strip() for c in campos.split(',') if c.strip()]
+    desconhecidos = [c for c in pedidos if c not in disponiveis]
+    if desconhecidos:
+        raise SeletorInvalido(f"fields desconhecidos: {', '.join(desconhecidos)}")
+    return list(dict.fromkeys(pedidos))
+
+
+class _Saida(io.RawIOBase):
+    """Arquivo só de escrita que acumula os bytes até serem enviados (o Parquet usa tell())"""
+
+    def __init__(self):
+        super().__init__()
+        self._partes: List[bytes] = []
+        self._posicao = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, dados) -> int:
+        dados = bytes(dados)
+        self._partes.append(dados)
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self._posicao
+
+    def esvaziar(self) -> bytes:
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+
+def _esquema_parquet(dtypes: pd.Series):
+    """Esquema fixo a partir dos dtypes da base (blocos só com ausentes não viram null)"""
+    campos = []
+    for coluna, dtype in dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            tipo = pa.bool_()
+        elif pd.api.types.is_integer_dtype(dtype):
+            tipo = pa.int64()
+        elif pd.api.types.is_float_dtype(dtype):
+            tipo = pa.float64()
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            tipo = pa.timestamp('ns')
+        else:
+            tipo = pa.string()
+        campos.append(pa.field(coluna, tipo))
+    return pa.schema(campos)
+
+
+def _texto(bloco: pd.DataFrame, esquema) -> pd.DataFrame:
+    """Colunas string do esquema como str/None (a base tem object com tipos mistos)"""
+    for campo in esquema:
+        if pa.types.is_string(campo.type):
+            valores = bloco[campo.name].to_numpy(dtype=object)
+            ausentes = pd.isna(valores)
+            bloco[campo.name] = np.where(ausentes, None, valores.astype(str))
+    return bloco
+
+
+def _serializar(blocos: Iterator[pd.DataFrame], formato: str, dtypes: pd.Series) -> Iterator[bytes]:
+    if formato == 'csv':
+        primeiro = True
+        for bloco in blocos:
+            yield bloco.to_csv(index=False, header=primeiro, sep=';', decimal=',',
+                               date_format='%Y-%m-%d').encode('utf-8')
+            primeiro = False
+        if primeiro:
+            yield (';'.join(dtypes.index) + '\n').encode('utf-8')
+    elif formato == 'ndjson':
+        for bloco in blocos:
+            if not bloco.empty:
+                yield bloco.to_json(orient='records', lines=True, date_format='iso',
+                                    force_ascii=False).encode('utf-8').rstrip(b'\n') + b'\n'
+    else:
+        esquema = _esquema_parquet(dtypes)
+        saida = _Saida()
+        with pq.ParquetWriter(saida, esquema, compression='snappy') as escritor:
+            for bloco in blocos:
+                tabela = pa.Table.from_pandas(_texto(bloco, esquema), schema=esquema, preserve_index=False)
+                escritor.write_table(tabela)
+                yield saida.esvaziar()
+        yield saida.esvaziar()
+
+
+def _gzip(partes: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for parte in partes:
+        comprimido = compressor.compress(parte)
+        if comprimido:
+            yield comprimido
+    yield compressor.flush()
+
+
+def exportar(formato: str = 'csv', uf: Optional[str] = None, objeto: Optional[str] = None,
+             area: Optional[str] = None, celula: Optional[str] = None, campos: Optional[str] = None,
+             gzip: bool = False, df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """
+    Valida os parâmetros e devolve o iterador de bytes, o media type e o nome do arquivo.
+    A seleção usa as posições por célula do cubo (sem df) ou filtra df (reconstrução as_of).
+    """
+    from services.data_loader import get_loader
+
+    formato = formato.strip().lower()
+    if formato not in FORMATOS:
+        raise SeletorInvalido(f"formato deve ser um de {', '.join(FORMATOS)}")
+    if formato == 'parquet' and pq is None:
+        raise SeletorInvalido("formato parquet requer o pacote pyarrow instalado no servidor")
+
+    loader = get_loader()
+    base = df if df is not None else loader._df
+    colunas = parse_colunas(campos, base.columns if base is not None else [])
+    filtros = combinar_filtros(uf, objeto, area, parse_celula(celula))
+    partes = selecionar(filtros, df)
+    total = int(sum(len(p) for p in partes))
+    geracao = loader.generation
+    dtypes = base[colunas].dtypes if base is not None else pd.Series(dtype=object)
+
+    def blocos() -> Iterator[pd.DataFrame]:
+        for inicio in range(0, total, LINHAS_POR_BLOCO):
+            posicoes = fatiar(partes, inicio, min(inicio + LINHAS_POR_BLOCO, total))
+            if df is not None:
+                yield df.iloc[posicoes][colunas].copy()
+                continue
+            # As posições valem para a geração em que foram selecionadas
+            if loader.generation != geracao:
+                raise RuntimeError("a base foi recarregada durante a exportação")
+            yield loader.linhas(posicoes, colunas)
+
+    media_type, extensao = FORMATOS[formato]
+    corpo = _serializar(blocos(), formato, dtypes)
+    sufixo = '_'.join(str(v).replace(' ', '-') for v in (filtros or {}).values())
+    nome = f"casos{'_' + sufixo if sufixo else ''}.{extensao}"
+    if gzip:
+        corpo, media_type, nome = _gzip(corpo), 'application/gzip', nome + '.gz'
+    return {'corpo': corpo, 'media_type': media_type, 'arquivo': nome, 'total': total}
@@ -0,0 +1,204 @@
+"""
+Logs Estruturados
+Eventos de diagnóstico (antigo debug.log) gravados fora do caminho da requisição:
+quem chama só enfileira o registro (QueueHandler, sem bloquear); a formatação JSON e a
+escrita em arquivo acontecem na thread do QueueListener.
+
+Configuração por ambiente:
+- LOG_NIVEL: DEBUG, INFO, WARNING... (padrão: DEBUG em desenvolvimento com arquivo de
+  debug disponível; WARNING nos demais casos)
+- LOG_AMOSTRAGEM: fração (0 a 1) dos eventos DEBUG mantidos (padrão 1.0)
+- LOG_ARQUIVO: arquivo JSON lines (padrão: .cursor/debug.log na raiz, em desenvolvimento,
+  se a pasta existir; sem arquivo, os eventos vão para stderr)
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+NOME_LOGGER = 'dashboard.eventos'
+
+# Registros aguardando escrita; com a fila cheia, novos eventos são descartados (nunca bloqueia)
+TAMANHO_FILA = 10000
+
+# Identificador de sessão mantido no formato do antigo debug.log
+SESSAO_DEBUG = 'debug-session'
+
+_logger = logging.getLogger(NOME_LOGGER)
+_logger.propagate = False
+
+_amostragem = 1.0
+_arquivo: Optional[Path] = None
+_listener: Optional[QueueListener] = None
+_pid_listener: Optional[int] = None
+_fila: Optional[queue.Queue] = None
+_lock = threading.Lock()
+_descartados = 0
+
+
+def _arquivo_padrao() -> Optional[Path]:
+    """Arquivo de debug: LOG_ARQUIVO ou .cursor/debug.log (apenas em desenvolvimento)"""
+    arquivo = os.getenv('LOG_ARQUIVO')
+    if arquivo:
+        return Path(arquivo)
+    if os.getenv('ENVIRONMENT', 'development') != 'development':
+        return None
+    pasta = Path(__file__).resolve().parent.parent.parent / '.cursor'
+    return pasta / 'debug.log' if pasta.is_dir() else None
+
+
+def _nivel_padrao(arquivo: Optional[Path]) -> int:
+    nome = os.getenv('LOG_NIVEL')
+    if nome:
+        nivel = logging.getLevelName(nome.strip().upper())
+        if isinstance(nivel, int):
+            return nivel
+    return logging.DEBUG if arquivo is not None else logging.WARNING
+
+
+def _amostragem_padrao() -> float:
+    try:
+        return min(1.0, max(0.0, float(os.getenv('LOG_AMOSTRAGEM', '1.0'))))
+    except ValueError:
+        return 1.0
+
+
+class _FormatoJSON(logging.Formatter):
+    """Uma linha JSON por evento, no mesmo formato do antigo debug.log"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        evento = {
+            'timestamp': int(record.created * 1000),
+            'level': record.levelname,
+            'location': getattr(record, 'local', record.name),
+            'message': record.getMessage(),
+            'data': getattr(record, 'dados', {}),
+            'sessionId': SESSAO_DEBUG,
+        }
+        hipotese = getattr(record, 'hipotese', None)
+        if hipotese:
+            evento['hypothesisId'] = hipotese
+        if record.exc_info:
+            evento['exc'] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+class _FilaSemBloqueio(QueueHandler):
+    """
+    QueueHandler que não formata na thread de quem chama (o prepare padrão faz o
+    format/json.dumps ali) e descarta, contando, quando a fila está cheia.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        global _descartados
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _descartados += 1
+
+
+def configurar(nivel: Optional[int] = None, amostragem: Optional[float] = None,
+               arquivo: Optional[Path] = None) -> None:
+    """
+    (Re)configura o subsistema: nível, amostragem e destino. Sem argumentos, usa as
+    variáveis de ambiente. O listener é iniciado sob demanda no primeiro evento.
+    """
+    global _amostragem, _arquivo, _fila
+    parar()
+    _arquivo = arquivo if arquivo is not None else _arquivo_padrao()
+    _logger.setLevel(nivel if nivel is not None else _nivel_padrao(_arquivo))
+    _amostragem = _amostragem_padrao() if amostragem is None else min(1.0, max(0.0, amostragem))
+
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+    _fila = queue.Queue(maxsize=TAMANHO_FILA)
+    _logger.addHandler(_FilaSemBloqueio(_fila))
+
+
+def definir_nivel(nivel: int) -> None:
+    """Altera o nível em tempo de execução (ex.: logging.DEBUG para investigar um worker)"""
+    _logger.setLevel(nivel)
+
+
+def _destino() -> logging.Handler:
+    if _arquivo is not None:
+        try:
+            _arquivo.parent.mkdir(parents=True, exist_ok=True)
+            handler: logging.Handler = logging.FileHandler(_arquivo, encoding='utf-8', delay=True)
+        except OSError:
+            handler = logging.StreamHandler()
+    else:
+        handler = logging.StreamHandler()
+    handler.setFormatter(_FormatoJSON())
+    return handler
+
+
+def _garantir_listener() -> None:
+    """Inicia o listener no processo atual (após fork, cada worker inicia o seu)"""
+    global _listener, _pid_listener
+    pid = os.getpid()
+    if _pid_listener == pid:
+        return
+    with _lock:
+        if _pid_listener == pid:
+            return
+        _listener = QueueListener(_fila, _destino(), respect_handler_level=False)
+        _listener.start()
+        _pid_listener = pid
+
+
+def parar() -> None:
+    """Esvazia a fila e encerra o listener (chamado no shutdown do app e no exit)"""
+    global _listener, _pid_listener
+    with _lock:
+        if _listener is not None and _pid_listener == os.getpid():
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+        _listener = None
+        _pid_listener = None
+
+
+def habilitado(nivel: int = logging.DEBUG) -> bool:
+    """Permite evitar montar dados caros quando o evento seria descartado"""
+    return _logger.isEnabledFor(nivel)
+
+
+def evento(local: str, mensagem: str, dados: Optional[Dict[str, Any]] = None,
+           nivel: int = logging.DEBUG, hipotese: Optional[str] = None, exc_info: bool = False) -> None:
+    """
+    Registra um evento estruturado. Custa uma verificação de nível quando desabilitado;
+    eventos DEBUG passam pela amostragem. Nunca faz I/O na thread de quem chama.
+    """
+    if not _logger.isEnabledFor(nivel):
+        return
+    if nivel <= logging.DEBUG and _amostragem < 1.0 and random.random() >= _amostragem:
+        return
+    _garantir_listener()
+    _logger.log(nivel, mensagem, exc_info=exc_info,
+                extra={'local': local, 'dados': dados or {}, 'hipotese': hipotese})
+
+
+def estatisticas() -> Dict[str, Any]:
+    """Estado do subsistema (nível, amostragem, fila e descartes)"""
+    return {
+        'nivel': logging.getLevelName(_logger.level),
+        'amostragem': _amostragem,
+        'fila': _fila.qsize() if _fila is not None else 0,
+        'descartados': _descartados,
+        'arquivo': str(_arquivo) if _arquivo is not None else 'stderr',
+    }
+
+
+configurar()
+atexit.register(parar)
@@ -0,0 +1,187 @@
+"""
+Map-Reduce em Processos
+Para bases grandes, estruturas derivadas caras (o cubo de sketches) são montadas em
+partes: a base é dividida em intervalos de linhas, cada processo de um pool calcula o
+agregado parcial da sua partição e o processo principal mescla os parciais
+(contagens somadas, sketches mesclados, chaves unidas).
+
+Hoje só a montagem do cubo usa o motor (cube.construir_cubo); as funções servidas pelo
+cubo (mapa, tempo médio, impacto, estatísticas, reincidência) ganham com ele sem
+mudar. Os demais groupbys de aggregations.py continuam num processo só: rodam por
+requisição e ficam no cache de rotas, e cada execução aqui paga a gravação das colunas
+(~0,7 s por milhão de linhas) antes de qualquer ganho. Levá-los para cá exige manter
+a pasta gravada por geração, como estrutura derivada.
+
+Os processos não recebem a base por pickle: as colunas usadas são gravadas, uma vez por
+execução, em arquivos .npy numa pasta temporária e cada processo as abre com memmap,
+lendo só as linhas da sua partição (as páginas ficam no cache do sistema, compartilhadas).
+Texto vai como códigos de dicionário (int32) ou, com muitos valores distintos, em
+largura fixa; datas, como int64.
+
+O pool usa forkserver (spawn onde não houver): os processos não herdam a memória do
+worker web. Ele é criado para cada execução e fechado ao fim dela (montagens do cubo
+são raras: carga, recarga, virada do dia), então nenhum processo com pandas fica
+ocioso entre execuções. Um processo criado por fork de quem iniciou o forkserver
+(workers do gunicorn com preload, cujo master montou o cubo) usa spawn: o forkserver
+do pai não é filho dele.
+
+Configuração por ambiente:
+- MAPREDUCE_PROCESSOS: processos do pool (padrão: núcleos disponíveis ao processo divididos
+  pelos workers web de WEB_CONCURRENCY; 1 desliga)
+- MAPREDUCE_MIN_LINHAS: bases menores são processadas no próprio processo (padrão 1000000)
+- MAPREDUCE_DIR: onde criar as pastas temporárias (padrão: o temporário do sistema)
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.timing import span
+
+
+def _processos_padrao() -> int:
+    """Núcleos que este processo pode usar (afinidade/cpuset), divididos entre os workers web"""
+    nucleos = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    return max(1, nucleos // max(1, int(os.getenv('WEB_CONCURRENCY', '1'))))
+
+
+PROCESSOS = int(os.getenv('MAPREDUCE_PROCESSOS') or _processos_padrao())
+MIN_LINHAS = int(os.getenv('MAPREDUCE_MIN_LINHAS', '1000000'))
+PASTA_BASE = os.getenv('MAPREDUCE_DIR') or None
+
+# Texto com até essa fração de valores distintos (numa amostra de ~AMOSTRA_CARDINALIDADE
+# linhas) é gravado como dicionário; acima, como texto de largura fixa
+FRACAO_DICIONARIO = 0.05
+AMOSTRA_CARDINALIDADE = 10000
+
+MODO = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Processo que iniciou o forkserver (herdado no fork: outro pid = forkserver do pai)
+_pid_forkserver: Optional[int] = None
+
+
+def usar(linhas: int, processos: Optional[int] = None) -> bool:
+    """
+    Vale dividir uma base com essa quantidade de linhas entre processos? Nunca dentro de
+    um processo filho (pool daqui ou do aquecimento): lá a montagem segue no próprio processo.
+    """
+    return ((processos or PROCESSOS) > 1 and linhas >= MIN_LINHAS
+            and multiprocessing.parent_process() is None)
+
+
+def particoes(linhas: int, quantidade: int) -> List[Tuple[int, int]]:
+    """Intervalos [inicio, fim) de tamanhos iguais (±1) cobrindo as linhas"""
+    limites = np.linspace(0, linhas, max(1, min(quantidade, linhas)) + 1).astype(np.int64)
+    return [(int(a), int(b)) for a, b in zip(limites[:-1], limites[1:])]
+
+
+def _gravar_texto(serie: pd.Series, pasta: str, coluna: str) -> str:
+    """
+    Poucos valores distintos (estimado por amostra): códigos int32 + dicionário; muitos
+    (número do processo, cliente): o próprio texto em largura fixa + máscara de ausentes,
+    sem o custo de fatorar a coluna inteira no processo principal.
+    """
+    amostra = serie.iloc[::max(1, len(serie) // AMOSTRA_CARDINALIDADE)]
+    if amostra.nunique(dropna=True) <= max(1, len(amostra)) * FRACAO_DICIONARIO:
+        codigos, dicionario = pd.factorize(serie)
+        np.save(os.path.join(pasta, f'{coluna}.codigos.npy'), codigos.astype(np.int32))
+        np.save(os.path.join(pasta, f'{coluna}.dicionario.npy'), np.asarray(dicionario, dtype=object).astype(str))
+        return 'codigos'
+    valores = serie.to_numpy(dtype=object)
+    nulos = pd.isna(valores)
+    if nulos.any():
+        valores = np.where(nulos, '', valores)
+        np.save(os.path.join(pasta, f'{coluna}.nulos.npy'), nulos)
+    np.save(os.path.join(pasta, f'{coluna}.npy'), valores.astype(str))
+    return 'texto'
+
+
+def gravar(df: pd.DataFrame, colunas: Sequence[str], pasta: str) -> Dict[str, str]:
+    """Grava as colunas em pasta para leitura por memmap; devolve o manifesto (coluna → tipo)"""
+    manifesto = {}
+    for coluna in colunas:
+        serie = df[coluna]
+        if pd.api.types.is_datetime64_any_dtype(serie.dtype) and getattr(serie.dtype, 'tz', None) is None:
+            valores = serie.to_numpy()
+            np.save(os.path.join(pasta, f'{coluna}.npy'), valores.view(np.int64))
+            manifesto[coluna] = str(valores.dtype)
+        elif pd.api.types.is_numeric_dtype(serie.dtype) and not isinstance(serie.dtype, pd.CategoricalDtype):
+            # Inteiros/booleanos anuláveis (pd.NA) vão como float com NaN
+            valores = serie.to_numpy(dtype=float, na_value=np.nan) \
+                if pd.api.types.is_extension_array_dtype(serie.dtype) else serie.to_numpy()
+            np.save(os.path.join(pasta, f'{coluna}.npy'), valores)
+            manifesto[coluna] = 'numero'
+        else:
+            manifesto[coluna] = _gravar_texto(serie, pasta, coluna)
+    return manifesto
+
+
+def _abrir(pasta: str, nome: str) -> np.ndarray:
+    return np.load(os.path.join(pasta, nome), mmap_mode='r')
+
+
+def ler_particao(pasta: str, manifesto: Dict[str, str], inicio: int, fim: int) -> pd.DataFrame:
+    """Linhas [inicio, fim) das colunas gravadas; texto volta como object (None nos ausentes)"""
+    dados = {}
+    for coluna, tipo in manifesto.items():
+        if tipo == 'codigos':
+            codigos = np.asarray(_abrir(pasta, f'{coluna}.codigos.npy')[inicio:fim])
+            dicionario = np.append(_abrir(pasta, f'{coluna}.dicionario.npy').astype(object), None)
+            dados[coluna] = dicionario[codigos]  # código -1 → último item (None)
+        elif tipo == 'texto':
+            valores = _abrir(pasta, f'{coluna}.npy')[inicio:fim].astype(object)
+            if os.path.exists(os.path.join(pasta, f'{coluna}.nulos.npy')):
+                valores[_abrir(pasta, f'{coluna}.nulos.npy')[inicio:fim]] = None
+            dados[coluna] = valores
+        else:
+            valores = np.asarray(_abrir(pasta, f'{coluna}.npy')[inicio:fim])
+            dados[coluna] = valores if tipo == 'numero' else valores.view(tipo)
+    return pd.DataFrame(dados, index=pd.RangeIndex(inicio, fim))
+
+
+def _executar(pasta: str, manifesto: Dict[str, str], inicio: int, fim: int, mapear: Callable) -> Any:
+    """Tarefa de um processo do pool: agregado parcial de uma partição"""
+    return mapear(ler_particao(pasta, manifesto, inicio, fim))
+
+
+def _contexto():
+    """Contexto do pool: forkserver, ou spawn num filho de fork de quem iniciou o forkserver"""
+    global _pid_forkserver
+    if MODO != 'forkserver':
+        return multiprocessing.get_context(MODO)
+    if _pid_forkserver is None:
+        _pid_forkserver = os.getpid()
+    elif _pid_forkserver != os.getpid():
+        # O multiprocessing verifica o forkserver com waitpid, que falha fora do processo pai
+        return multiprocessing.get_context('spawn')
+    return multiprocessing.get_context('forkserver')
+
+
+def mapear_reduzir(df: pd.DataFrame, colunas: Sequence[str], mapear: Callable[[pd.DataFrame], Any],
+                   reduzir: Callable[[List[Tuple[int, Any]]], Any], processos: Optional[int] = None) -> Any:
+    """
+    reduzir([(inicio, mapear(particao)), ...]) com uma partição por processo.
+    `mapear` roda em outro processo: precisa ser uma função de módulo (importável) e
+    recebe só `colunas`, com o índice original das linhas; `reduzir` recebe os parciais
+    em ordem de linha.
+    """
+    processos = processos or PROCESSOS
+    pasta = tempfile.mkdtemp(prefix='mapreduce-', dir=PASTA_BASE)
+    try:
+        with span('mapreduce', 'gravar'):
+            manifesto = gravar(df, colunas, pasta)
+        with span('mapreduce', 'mapear'), \
+                ProcessPoolExecutor(max_workers=processos, mp_context=_contexto()) as executor:
+            futuros = [(inicio, executor.submit(_executar, pasta, manifesto, inicio, fim, mapear))
+                       for inicio, fim in particoes(len(df), processos)]
+            parciais = [(inicio, futuro.result()) for inicio, futuro in futuros]
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+    with span('mapreduce', 'reduzir'):
+        return reduzir(parciais)
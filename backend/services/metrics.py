@@ -0,0 +1,199 @@
+"""
+Métricas (formato Prometheus)
+Latência e tamanho de resposta por rota (bruto x comprimido), acertos do cache, geração/duração da carga e
+RSS por worker. Com gunicorn, cada worker grava em PROMETHEUS_MULTIPROC_DIR (ver
+gunicorn.conf.py) e /metrics agrega todos os processos.
+"""
+
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+# METRICAS=0 nem importa o prometheus_client (ex.: serverless, onde não há scraping)
+METRICAS_DISPONIVEIS = False
+if os.getenv('METRICAS', '1') != '0':
+    try:
+        from prometheus_client import (
+            CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+        )
+        from prometheus_client import multiprocess
+        METRICAS_DISPONIVEIS = True
+    except ImportError:  # pragma: no cover - dependência opcional em ambientes mínimos
+        pass
+
+# Diretório compartilhado entre workers (definido antes de importar o app)
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+# Buckets de latência (s): rotas em cache respondem em ms; agregações sobre a base, em centenas de ms
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets de tamanho de resposta (bytes)
+BUCKETS_TAMANHO = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Intervalo mínimo entre atualizações das métricas de processo (RSS, geração) por worker
+INTERVALO_PROCESSO_S = 5.0
+
+# Rótulo de rota para caminhos sem rota registrada (evita cardinalidade ilimitada)
+ROTA_NAO_MAPEADA = 'nao_mapeada'
+
+if METRICAS_DISPONIVEIS:
+    LATENCIA = Histogram(
+        'dashboard_http_request_duration_seconds', 'Latência das requisições por rota',
+        ['method', 'rota', 'status'], buckets=BUCKETS_LATENCIA)
+    TAMANHO = Histogram(
+        'dashboard_http_response_size_bytes', 'Tamanho do corpo da resposta por rota',
+        ['rota'], buckets=BUCKETS_TAMANHO)
+    CACHE_ACERTOS = Counter('dashboard_cache_hits_total', 'Acertos do cache de respostas', ['secao'])
+    CACHE_FALHAS = Counter('dashboard_cache_misses_total', 'Falhas do cache de respostas', ['secao'])
+    CACHE_ENTRADAS = Gauge('dashboard_cache_entries', 'Entradas no cache de respostas',
+                           multiprocess_mode='liveall')
+    GERACAO = Gauge('dashboard_dataset_generation', 'Geração do dataset carregada no worker',
+                    multiprocess_mode='liveall')
+    LINHAS = Gauge('dashboard_dataset_rows', 'Registros do dataset carregado', multiprocess_mode='liveall')
+    DURACAO_CARGA = Gauge('dashboard_dataset_load_duration_seconds', 'Duração da última carga da base',
+                          multiprocess_mode='liveall')
+    RSS = Gauge('dashboard_process_resident_memory_bytes', 'Memória residente (RSS) do worker',
+                multiprocess_mode='liveall')
+    # shared = páginas ainda compartilhadas com o master/outros workers (copy-on-write intacto);
+    # private = páginas só deste worker; pss = RSS com as compartilhadas divididas entre os processos
+    MEMORIA = Gauge('dashboard_process_memory_bytes', 'Memória do worker por tipo (smaps_rollup)',
+                    ['tipo'], multiprocess_mode='liveall')
+    # Bytes do corpo antes e depois da compressão, por rota e codificação (identity = sem compressão)
+    BYTES_BRUTOS = Counter('dashboard_http_response_raw_bytes_total', 'Bytes do corpo antes da compressão',
+                           ['rota', 'codificacao'])
+    BYTES_ENVIADOS = Counter('dashboard_http_response_encoded_bytes_total',
+                             'Bytes do corpo enviados (após compressão)', ['rota', 'codificacao'])
+
+_ultima_atualizacao = 0.0
+
+
+def rss_bytes() -> int:
+    """RSS atual do processo (Linux: /proc/self/statm; demais: pico via resource)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        try:
+            import resource
+            pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return pico if os.uname().sysname == 'Darwin' else pico * 1024
+        except Exception:
+            return 0
+
+
+def memoria_processo() -> Dict[str, int]:
+    """
+    Memória compartilhada x privada do processo (Linux: /proc/self/smaps_rollup, em bytes).
+    Vazio em sistemas sem smaps_rollup.
+    """
+    campos = {}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for linha in f:
+                partes = linha.split()
+                if len(partes) >= 3 and partes[-1] == 'kB':
+                    campos[partes[0].rstrip(':')] = int(partes[1]) * 1024
+    except (OSError, ValueError):
+        return {}
+    return {
+        'rss': campos.get('Rss', 0),
+        'pss': campos.get('Pss', 0),
+        'shared': campos.get('Shared_Clean', 0) + campos.get('Shared_Dirty', 0),
+        'private': campos.get('Private_Clean', 0) + campos.get('Private_Dirty', 0),
+    }
+
+
+def registrar_cache(secao: str, acerto: bool) -> None:
+    """Chamado pelo ResponseCache a cada consulta"""
+    if not METRICAS_DISPONIVEIS:
+        return
+    (CACHE_ACERTOS if acerto else CACHE_FALHAS).labels(secao=secao).inc()
+
+
+def registrar_compressao(rota: str, codificacao: str, bruto: int, enviado: int) -> None:
+    """Chamado pelo CompressaoMiddleware a cada resposta de corpo único"""
+    if not METRICAS_DISPONIVEIS:
+        return
+    BYTES_BRUTOS.labels(rota=rota, codificacao=codificacao).inc(bruto)
+    BYTES_ENVIADOS.labels(rota=rota, codificacao=codificacao).inc(enviado)
+
+
+def atualizar_processo(forcar: bool = False) -> None:
+    """Atualiza as métricas do worker atual (no máximo a cada INTERVALO_PROCESSO_S)"""
+    global _ultima_atualizacao
+    if not METRICAS_DISPONIVEIS:
+        return
+    agora = time.monotonic()
+    if not forcar and agora - _ultima_atualizacao < INTERVALO_PROCESSO_S:
+        return
+    _ultima_atualizacao = agora
+
+    RSS.set(rss_bytes())
+    for tipo, valor in memoria_processo().items():
+        MEMORIA.labels(tipo=tipo).set(valor)
+    from services import data_loader
+    loader = data_loader._loader
+    if loader is not None:
+        GERACAO.set(loader.generation)
+        DURACAO_CARGA.set(getattr(loader, 'load_duration', None) or 0.0)
+        LINHAS.set(len(loader._df) if loader._df is not None else 0)
+    from services.cache import response_cache
+    CACHE_ENTRADAS.set(response_cache.stats()['entradas'])
+
+
+def gerar_metricas() -> Tuple[bytes, str]:
+    """Texto no formato Prometheus (agregado entre workers quando em modo multiprocesso)"""
+    if not METRICAS_DISPONIVEIS:
+        return b'# metricas desabilitadas ou prometheus_client nao instalado\n', CONTENT_TYPE_LATEST
+    atualizar_processo(forcar=True)
+    if MULTIPROC_DIR:
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        return generate_latest(registro), CONTENT_TYPE_LATEST
+    from prometheus_client import REGISTRY
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def _rota(scope) -> str:
+    """Template da rota (ex.: /api/indicadores/sla-area), nunca o caminho com parâmetros"""
+    rota = scope.get('route')
+    caminho = getattr(rota, 'path', None)
+    return caminho or ROTA_NAO_MAPEADA
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro (sem BaseHTTPMiddleware, que copia o corpo da resposta):
+    mede o tempo até o último pedaço do corpo e soma os bytes enviados.
+    """
+
+    def __init__(self, app, ignorar: Optional[Tuple[str, ...]] = ('/metrics',)):
+        self.app = app
+        self.ignorar = ignorar or ()
+
+    async def __call__(self, scope, receive, send):
+        if (scope['type'] != 'http' or not METRICAS_DISPONIVEIS or scope.get('path') in self.ignorar
+                or scope.get('aquecimento')):
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        estado = {'status': 500, 'bytes': 0}
+
+        async def enviar(mensagem):
+            if mensagem['type'] == 'http.response.start':
+                estado['status'] = mensagem['status']
+            elif mensagem['type'] == 'http.response.body':
+                estado['bytes'] += len(mensagem.get('body', b''))
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            rota = _rota(scope)
+            LATENCIA.labels(method=scope.get('method', 'GET'), rota=rota,
+                            status=str(estado['status'])).observe(time.perf_counter() - inicio)
+            TAMANHO.labels(rota=rota).observe(estado['bytes'])
+            atualizar_processo()
@@ -0,0 +1,97 @@
+"""
+Ordenações Pré-computadas
+Ordem completa das listas paginadas, por UF (e para a base inteira), montada uma vez por
+geração da base: uma página é só uma fatia dessa ordem, sem reordenar nem reagrupar a
+cada requisição, e os totais vêm do tamanho/soma das listas.
+- casos críticos: posições das linhas com critico=True por impacto_financeiro decrescente
+  (sem casos críticos na seleção, todas as linhas na mesma ordem, como antes);
+- reincidência por cliente: tabela cliente → resultado e qtd_processos, por resultado
+  decrescente.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+COLUNAS_CLIENTES = ['nome_cliente', 'resultado', 'qtd_processos']
+
+
+def chave_estado(estado: Optional[str]) -> Optional[str]:
+    """UF como as rotas filtram (maiúsculas); None = base inteira"""
+    return estado.strip().upper() if estado and estado.strip() else None
+
+
+def tabela_reincidencia_clientes(df: pd.DataFrame) -> pd.DataFrame:
+    """Processos e soma de impacto_financeiro por cliente, por resultado decrescente"""
+    if 'nome_cliente' not in df.columns or 'impacto_financeiro' not in df.columns:
+        return pd.DataFrame(columns=COLUNAS_CLIENTES)
+    validos = df[df['nome_cliente'].notna() & (df['nome_cliente'] != '')]
+    if validos.empty:
+        return pd.DataFrame(columns=COLUNAS_CLIENTES)
+    grupos = validos.groupby('nome_cliente')['impacto_financeiro']
+    tabela = pd.DataFrame({'resultado': grupos.sum(), 'qtd_processos': grupos.size()}).reset_index()
+    tabela['resultado'] = tabela['resultado'].fillna(0).astype(float)
+    tabela['qtd_processos'] = tabela['qtd_processos'].fillna(0).astype(int)
+    tabela['nome_cliente'] = tabela['nome_cliente'].astype(str)
+    tabela = tabela.sort_values('resultado', ascending=False, kind='stable')
+    return tabela[COLUNAS_CLIENTES].reset_index(drop=True)
+
+
+class Ordenacoes:
+    """
+    Listas ordenadas por UF. `fonte` é o DataFrame de onde as posições são lidas; sem
+    fonte (estrutura derivada da base carregada), as linhas vêm de DataLoader.linhas.
+    """
+
+    def __init__(self, df: pd.DataFrame, por_estado: bool = True, fonte: Optional[pd.DataFrame] = None):
+        self._fonte = fonte
+        self.criticos: Dict[Optional[str], np.ndarray] = {}
+        self.criticos_2025: Dict[Optional[str], int] = {}
+        self.clientes: Dict[Optional[str], pd.DataFrame] = {}
+
+        estados = df['estado'].to_numpy(dtype=object) if por_estado and 'estado' in df.columns else None
+        ufs: List[Optional[str]] = [None]
+        if estados is not None:
+            ufs += sorted({str(uf) for uf in pd.unique(estados) if isinstance(uf, str) and uf.strip()})
+
+        # Ordem global por impacto decrescente (ausentes no fim); cada UF filtra preservando a ordem
+        impacto = pd.to_numeric(df['impacto_financeiro'], errors='coerce').to_numpy(dtype=float) \
+            if 'impacto_financeiro' in df.columns else np.zeros(len(df))
+        ordem = np.argsort(np.where(np.isnan(impacto), np.inf, -impacto), kind='stable')
+        critico = (df['critico'] == True).to_numpy() if 'critico' in df.columns else np.zeros(len(df), dtype=bool)  # noqa: E712
+        anos = pd.to_datetime(df['data_entrada'], errors='coerce').dt.year.to_numpy() \
+            if 'data_entrada' in df.columns else np.full(len(df), np.nan)
+
+        for uf in ufs:
+            na_uf = np.ones(len(df), dtype=bool) if uf is None else (estados == uf)
+            selecao = na_uf & critico
+            if not selecao.any():
+                selecao = na_uf
+            posicoes = ordem[selecao[ordem]]
+            self.criticos[uf] = posicoes
+            self.criticos_2025[uf] = int(np.count_nonzero(anos[posicoes] == 2025))
+
+        self.clientes[None] = tabela_reincidencia_clientes(df)
+        if len(ufs) > 1:
+            for uf, parte in df.groupby('estado', sort=False):
+                if uf in ufs:
+                    self.clientes[uf] = tabela_reincidencia_clientes(parte)
+
+    def criticos_de(self, estado: Optional[str]) -> np.ndarray:
+        return self.criticos.get(chave_estado(estado), np.empty(0, dtype=np.int64))
+
+    def clientes_de(self, estado: Optional[str]) -> pd.DataFrame:
+        return self.clientes.get(chave_estado(estado), pd.DataFrame(columns=COLUNAS_CLIENTES))
+
+    def linhas(self, posicoes: np.ndarray) -> pd.DataFrame:
+        if self._fonte is not None:
+            return self._fonte.iloc[posicoes]
+        from services.data_loader import get_loader
+        return get_loader().linhas(posicoes)
+
+
+def get_ordenacoes() -> Ordenacoes:
+    """Ordenações sobre a base carregada (uma por geração do dataset e dia de referência)"""
+    from services.data_loader import get_loader
+    return get_loader().get_derived('ordenacoes', Ordenacoes)
@@ -0,0 +1,57 @@
+"""
+Paginação por Cursor
+Listas longas (casos críticos, reincidência por cliente, detalhes de acordos) saem em
+páginas de `limit` itens. O cursor é opaco: guarda a posição na ordem pré-computada e
+uma assinatura da lista (rota + filtros) e da versão dos dados, então um cursor de outra
+lista ou de uma base já recarregada é recusado em vez de pular ou repetir itens.
+"""
+
+import base64
+import hashlib
+import json
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from services.casos import SeletorInvalido
+
+LIMITE_MAXIMO = 500
+
+
+def _assinatura(lista: Hashable) -> str:
+    from services.cache import versao_dados
+    return hashlib.sha1(repr((lista, versao_dados())).encode('utf-8')).hexdigest()[:12]
+
+
+def codificar_cursor(inicio: int, lista: Hashable) -> str:
+    dados = json.dumps({'i': inicio, 'v': _assinatura(lista)}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(dados).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor: Optional[str], lista: Hashable) -> int:
+    """Posição inicial guardada no cursor (0 sem cursor)"""
+    if not cursor:
+        return 0
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        inicio, assinatura = int(dados['i']), dados['v']
+    except (ValueError, KeyError, TypeError) as e:
+        raise SeletorInvalido("cursor inválido") from e
+    if assinatura != _assinatura(lista) or inicio < 0:
+        raise SeletorInvalido("cursor de outra lista ou de uma versão anterior dos dados; recomece sem cursor")
+    return inicio
+
+
+def paginar(total: int, limit: int, cursor: Optional[str], lista: Hashable) -> Tuple[int, int, Dict[str, Any]]:
+    """
+    (inicio, fim, metadados) da página. `lista` identifica a ordem paginada (ex.:
+    ('casos-criticos', 'SP')); os metadados vão na resposta como `paginacao`.
+    """
+    if not 1 <= limit <= LIMITE_MAXIMO:
+        raise SeletorInvalido(f"limit deve estar entre 1 e {LIMITE_MAXIMO}")
+    inicio = min(decodificar_cursor(cursor, lista), total)
+    fim = min(inicio + limit, total)
+    return inicio, fim, {
+        'limit': limit,
+        'total': int(total),
+        'cursor': cursor,
+        'proximo_cursor': codificar_cursor(fim, lista) if fim < total else None,
+    }
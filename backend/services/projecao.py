@@ -0,0 +1,129 @@
+"""
+Projeção de Campos e Formato Colunar
+Qualquer rota com CachedRoute aceita:
+- ?fields=a,b,c: nas listas de registros (listas de dicts) da resposta, mantém só esses
+  campos (na ordem pedida); listas que não têm nenhum dos campos ficam como estão, assim
+  como as chaves de topo (totais, metadados);
+- ?format=columnar: cada lista de registros vira um dict de arrays paralelos
+  ({"objeto": [...], "quantidade": [...]}), sem repetir as chaves a cada item.
+A transformação roda sobre o resultado do endpoint, antes da serialização; o cache de
+respostas guarda cada combinação de parâmetros separadamente. Um campo que não existe em
+nenhum registro da resposta dá 400, como um format inválido (sem registros na resposta,
+por exemplo um filtro vazio, não há como conferir e a projeção não muda nada).
+As rotas que devolvem linhas da base (/api/casos, /api/exportar) usam o mesmo ?fields=
+para escolher as colunas.
+"""
+
+import contextvars
+import functools
+import inspect
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+FORMATOS = ('records', 'columnar')
+
+# Parâmetros tratados aqui, fora da assinatura dos endpoints (entram na chave do cache)
+PARAMS_PROJECAO = ('fields', 'format')
+
+# (campos, colunar) da requisição atual; None = sem transformação
+_projecao: contextvars.ContextVar[Optional[Tuple[Optional[List[str]], bool]]] = \
+    contextvars.ContextVar('projecao', default=None)
+
+
+def parse_projecao(query_params) -> Optional[Tuple[Optional[List[str]], bool]]:
+    """(campos, colunar) a partir de ?fields= e ?format=; ValueError se format for inválido"""
+    fields = query_params.get('fields')
+    formato = (query_params.get('format') or 'records').strip().lower()
+    if formato not in FORMATOS:
+        raise ValueError(f"format deve ser um de {', '.join(FORMATOS)}")
+    campos = [c.strip() for c in fields.split(',') if c.strip()] if fields else None
+    if not campos and formato == 'records':
+        return None
+    return campos or None, formato == 'columnar'
+
+
+def _registros(valor: Any) -> bool:
+    return isinstance(valor, list) and bool(valor) and all(isinstance(v, dict) for v in valor)
+
+
+def _chaves_registros(valor: Any, chaves: Set[str]) -> bool:
+    """Acumula em chaves os campos dos registros de valor (recursivo); há algum registro?"""
+    if isinstance(valor, dict):
+        return any([_chaves_registros(v, chaves) for v in valor.values()])
+    if not isinstance(valor, list):
+        return False
+    if not _registros(valor):
+        return any([_chaves_registros(v, chaves) for v in valor])
+    for registro in valor:
+        chaves.update(registro)
+        for v in registro.values():
+            _chaves_registros(v, chaves)
+    return True
+
+
+def validar_campos(valor: Any, campos: Optional[List[str]]) -> None:
+    """HTTPException 400 se algum campo pedido não existe em nenhum registro de valor"""
+    if not campos:
+        return
+    chaves: Set[str] = set()
+    if not _chaves_registros(valor, chaves):
+        return
+    desconhecidos = [c for c in campos if c not in chaves]
+    if desconhecidos:
+        raise HTTPException(status_code=400, detail=f"fields desconhecidos: {', '.join(desconhecidos)}")
+
+
+def projetar(valor: Any, campos: Optional[List[str]] = None, colunar: bool = False) -> Any:
+    """Aplica a projeção/formato a todas as listas de registros de valor (recursivo)"""
+    if isinstance(valor, dict):
+        return {k: projetar(v, campos, colunar) for k, v in valor.items()}
+    if not isinstance(valor, list):
+        return valor
+    if not _registros(valor):
+        return [projetar(v, campos, colunar) for v in valor]
+
+    chaves: Dict[str, None] = {}
+    for registro in valor:
+        chaves.update(dict.fromkeys(registro))
+    selecionadas = [c for c in campos if c in chaves] if campos else []
+    if selecionadas:
+        chaves = dict.fromkeys(selecionadas)
+    if colunar:
+        return {k: [projetar(r.get(k), campos, colunar) for r in valor] for k in chaves}
+    if selecionadas:
+        return [{k: projetar(r[k], campos, colunar) for k in chaves if k in r} for r in valor]
+    return [projetar(r, campos, colunar) for r in valor]
+
+
+def definir(projecao: Optional[Tuple[Optional[List[str]], bool]]) -> contextvars.Token:
+    return _projecao.set(projecao)
+
+
+def restaurar(token: contextvars.Token) -> None:
+    _projecao.reset(token)
+
+
+def projetar_endpoint(endpoint):
+    """Envolve o endpoint: o resultado (dict/lista) passa por projetar() se a requisição pediu"""
+    if getattr(endpoint, '__projecao__', False):
+        return endpoint
+
+    def _aplicar(resultado):
+        projecao = _projecao.get()
+        if projecao is None or not isinstance(resultado, (dict, list)):
+            return resultado
+        validar_campos(resultado, projecao[0])
+        return projetar(resultado, *projecao)
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def projetado(*args, **kwargs):
+            return _aplicar(await endpoint(*args, **kwargs))
+    else:
+        @functools.wraps(endpoint)
+        def projetado(*args, **kwargs):
+            return _aplicar(endpoint(*args, **kwargs))
+
+    projetado.__projecao__ = True
+    return projetado
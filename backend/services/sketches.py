@@ -0,0 +1,215 @@
+"""
+Sketches Mescláveis
+Resumos compactos que podem ser somados entre células do cubo (UF x Objeto x Área)
+para responder percentis e contagens distintas de qualquer combinação de filtros
+sem percorrer linhas.
+"""
+
+import math
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Erro relativo padrão dos quantis (1%)
+ALPHA_PADRAO = 0.01
+
+# Percentis expostos nas respostas
+PERCENTIS_PADRAO = (0.5, 0.9, 0.99)
+
+# Valores com módulo abaixo disso caem no balde do zero
+_MIN_INDEXAVEL = 1e-9
+
+# Precisão padrão do HyperLogLog: 2^12 registradores (~1,6% de erro padrão, 4 KB por sketch)
+HLL_PRECISAO_PADRAO = 12
+
+
+class QuantileSketch:
+    """
+    Sketch de quantis com erro relativo garantido (DDSketch).
+    Cada valor x > 0 cai no balde k = ceil(log_gamma(x)), gamma = (1 + alpha) / (1 - alpha);
+    o quantil estimado fica a no máximo alpha (relativo) do valor exato.
+    Mesclar sketches é somar contagens de baldes: a ordem de mesclagem não altera o resultado.
+    Baldes são guardados esparsos (chaves ordenadas + contagens), então células pequenas custam pouco.
+    """
+
+    __slots__ = ('alpha', 'gamma', '_log_gamma', 'chaves', 'contagens',
+                 'chaves_neg', 'contagens_neg', 'zeros', 'count', 'minimo', 'maximo')
+
+    def __init__(self, alpha: float = ALPHA_PADRAO):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        vazio_i = np.empty(0, dtype=np.int64)
+        self.chaves = vazio_i
+        self.contagens = vazio_i
+        self.chaves_neg = vazio_i
+        self.contagens_neg = vazio_i
+        self.zeros = 0
+        self.count = 0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    @classmethod
+    def from_values(cls, valores, alpha: float = ALPHA_PADRAO) -> 'QuantileSketch':
+        """Constrói o sketch a partir de um array (NaN/inf são ignorados)"""
+        sketch = cls(alpha)
+        v = np.asarray(valores, dtype=float)
+        v = v[np.isfinite(v)]
+        if v.size == 0:
+            return sketch
+        sketch.count = int(v.size)
+        sketch.minimo = float(v.min())
+        sketch.maximo = float(v.max())
+        sketch.zeros = int(np.count_nonzero(np.abs(v) < _MIN_INDEXAVEL))
+        sketch.chaves, sketch.contagens = sketch._baldes(v[v >= _MIN_INDEXAVEL])
+        sketch.chaves_neg, sketch.contagens_neg = sketch._baldes(-v[v <= -_MIN_INDEXAVEL])
+        return sketch
+
+    def _baldes(self, positivos: np.ndarray):
+        if positivos.size == 0:
+            vazio = np.empty(0, dtype=np.int64)
+            return vazio, vazio
+        chaves = np.ceil(np.log(positivos) / self._log_gamma).astype(np.int64)
+        return np.unique(chaves, return_counts=True)
+
+    @classmethod
+    def merge_all(cls, sketches: Iterable['QuantileSketch'], alpha: float = ALPHA_PADRAO) -> 'QuantileSketch':
+        """Mescla vários sketches (mesmo alpha) em uma única passada"""
+        sketches = [s for s in sketches if s is not None and s.count]
+        resultado = cls(sketches[0].alpha if sketches else alpha)
+        if not sketches:
+            return resultado
+        resultado.count = sum(s.count for s in sketches)
+        resultado.zeros = sum(s.zeros for s in sketches)
+        resultado.minimo = min(s.minimo for s in sketches)
+        resultado.maximo = max(s.maximo for s in sketches)
+        resultado.chaves, resultado.contagens = _somar_baldes(
+            [s.chaves for s in sketches], [s.contagens for s in sketches])
+        resultado.chaves_neg, resultado.contagens_neg = _somar_baldes(
+            [s.chaves_neg for s in sketches], [s.contagens_neg for s in sketches])
+        return resultado
+
+    def merge(self, outro: 'QuantileSketch') -> 'QuantileSketch':
+        return QuantileSketch.merge_all([self, outro], self.alpha)
+
+    def _valor(self, chave) -> np.ndarray:
+        return 2 * np.power(self.gamma, chave) / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        """Quantil q (0..1) com erro relativo <= alpha; 0.0 para sketch vazio"""
+        if self.count == 0:
+            return 0.0
+        if q <= 0:
+            return self.minimo
+        if q >= 1:
+            return self.maximo
+        rank = q * (self.count - 1)
+
+        # Ordem crescente de valor: negativos (maior módulo primeiro), zeros, positivos
+        acumulado_neg = np.cumsum(self.contagens_neg[::-1])
+        total_neg = int(acumulado_neg[-1]) if acumulado_neg.size else 0
+        if rank < total_neg:
+            i = int(np.searchsorted(acumulado_neg, rank, side='right'))
+            valor = -self._valor(self.chaves_neg[::-1][i])
+        elif rank < total_neg + self.zeros:
+            valor = 0.0
+        else:
+            acumulado = np.cumsum(self.contagens)
+            i = int(np.searchsorted(acumulado, rank - total_neg - self.zeros, side='right'))
+            valor = self._valor(self.chaves[min(i, len(self.chaves) - 1)])
+        return float(min(max(valor, self.minimo), self.maximo))
+
+    def quantiles(self, qs: Sequence[float] = PERCENTIS_PADRAO) -> Dict[str, float]:
+        """Dicionário {'p50': ..., 'p90': ...} arredondado para JSON"""
+        return {f'p{_rotulo(q)}': round(self.quantile(q), 2) for q in qs}
+
+
+def _rotulo(q: float) -> str:
+    """0.5 → '50', 0.99 → '99', 0.999 → '99.9'"""
+    p = q * 100
+    return str(int(round(p))) if abs(p - round(p)) < 1e-9 else f'{p:g}'
+
+
+def _somar_baldes(chaves: Sequence[np.ndarray], contagens: Sequence[np.ndarray]):
+    todas = np.concatenate(chaves) if chaves else np.empty(0, dtype=np.int64)
+    if todas.size == 0:
+        vazio = np.empty(0, dtype=np.int64)
+        return vazio, vazio
+    unicas, inverso = np.unique(todas, return_inverse=True)
+    somas = np.bincount(inverso, weights=np.concatenate(contagens), minlength=len(unicas))
+    return unicas, somas.astype(np.int64)
+
+
+def percentis(valores, qs: Sequence[float] = PERCENTIS_PADRAO, alpha: Optional[float] = None) -> Dict[str, float]:
+    """Atalho: percentis aproximados de um array via sketch"""
+    return QuantileSketch.from_values(valores, alpha or ALPHA_PADRAO).quantiles(qs)
+
+
+def _bit_length(valores: np.ndarray) -> np.ndarray:
+    """Número de bits significativos de cada uint64 (0 para 0), sem perda de precisão"""
+    alto = (valores >> np.uint64(32)).astype(np.float64)
+    baixo = (valores & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(alto > 0, 32 + np.frexp(alto)[1], np.frexp(baixo)[1]).astype(np.int64)
+
+
+def hash_chaves(valores) -> np.ndarray:
+    """Hash 64 bits estável (entre processos e execuções) de um array de chaves"""
+    return pd.util.hash_array(np.asarray(valores, dtype=object))
+
+
+class HyperLogLog:
+    """
+    Contagem distinta aproximada (HyperLogLog).
+    Cada chave é transformada em hash de 64 bits: os p bits altos escolhem o registrador e o
+    registrador guarda a maior posição do primeiro bit 1 nos bits restantes.
+    Mesclar é o máximo elemento a elemento, então qualquer união de células custa O(2^p).
+    """
+
+    __slots__ = ('precisao', 'registradores')
+
+    def __init__(self, precisao: int = HLL_PRECISAO_PADRAO):
+        self.precisao = precisao
+        self.registradores = np.zeros(1 << precisao, dtype=np.uint8)
+
+    @classmethod
+    def from_hashes(cls, hashes: np.ndarray, precisao: int = HLL_PRECISAO_PADRAO) -> 'HyperLogLog':
+        """Constrói o sketch a partir de hashes uint64 (ver hash_chaves)"""
+        sketch = cls(precisao)
+        h = np.asarray(hashes, dtype=np.uint64)
+        if h.size == 0:
+            return sketch
+        bits_resto = 64 - precisao
+        indices = (h >> np.uint64(bits_resto)).astype(np.int64)
+        resto = h & np.uint64((1 << bits_resto) - 1)
+        rho = (bits_resto - _bit_length(resto) + 1).astype(np.uint8)
+        np.maximum.at(sketch.registradores, indices, rho)
+        return sketch
+
+    @classmethod
+    def from_values(cls, valores, precisao: int = HLL_PRECISAO_PADRAO) -> 'HyperLogLog':
+        return cls.from_hashes(hash_chaves(valores), precisao)
+
+    @classmethod
+    def merge_all(cls, sketches: Iterable['HyperLogLog'], precisao: int = HLL_PRECISAO_PADRAO) -> 'HyperLogLog':
+        """União de vários sketches (mesma precisão)"""
+        sketches = [s for s in sketches if s is not None]
+        resultado = cls(sketches[0].precisao if sketches else precisao)
+        if sketches:
+            np.maximum.reduce([s.registradores for s in sketches], out=resultado.registradores)
+        return resultado
+
+    def merge(self, outro: 'HyperLogLog') -> 'HyperLogLog':
+        return HyperLogLog.merge_all([self, outro], self.precisao)
+
+    def count(self) -> int:
+        """Estimativa do número de chaves distintas (com correção de linear counting para poucos valores)"""
+        m = len(self.registradores)
+        vazios = int(np.count_nonzero(self.registradores == 0))
+        if vazios == m:
+            return 0
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimativa = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registradores.astype(np.int64))))
+        if estimativa <= 2.5 * m and vazios:
+            estimativa = m * math.log(m / vazios)
+        return int(round(estimativa))
@@ -0,0 +1,216 @@
+"""
+Server-Timing
+Spans leves por etapa da requisição (cópia do DataFrame, filtros, agregação, serialização,
+JSON), emitidos no cabeçalho Server-Timing para aparecer no DevTools do navegador.
+Com ?profile=1, a requisição roda sob cProfile e a resposta é o resumo do perfil.
+"""
+
+import contextvars
+import cProfile
+import functools
+import inspect
+import io
+import json
+import os
+import pstats
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+# Spans da requisição atual: nome → [duração acumulada (s), descrição]; None = fora de requisição
+_spans: contextvars.ContextVar[Optional[Dict[str, list]]] = contextvars.ContextVar('server_timing', default=None)
+
+# Instante em que o endpoint retornou (início da serialização pelo FastAPI)
+_fim_endpoint: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar('fim_endpoint', default=None)
+
+# ?profile=1 fica disponível fora de produção, ou em produção com PROFILE_HABILITADO=1
+PROFILE_HABILITADO = (
+    os.getenv('ENVIRONMENT', 'development') != 'production' or os.getenv('PROFILE_HABILITADO') == '1'
+)
+
+# Funções listadas no resumo do perfil
+LINHAS_PERFIL = 25
+
+_NOME_INVALIDO = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+@contextmanager
+def span(nome: str, descricao: Optional[str] = None):
+    """Mede um trecho; fora de uma requisição instrumentada, custa só a leitura da contextvar"""
+    spans = _spans.get()
+    if spans is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(nome, time.perf_counter() - inicio, descricao)
+
+
+def registrar(nome: str, duracao: float, descricao: Optional[str] = None) -> None:
+    """Soma a duração ao span (chamadas repetidas da mesma etapa são acumuladas)"""
+    spans = _spans.get()
+    if spans is None:
+        return
+    atual = spans.setdefault(nome, [0.0, descricao])
+    atual[0] += duracao
+
+
+def _total_spans() -> float:
+    spans = _spans.get() or {}
+    return sum(d for d, _ in spans.values())
+
+
+def cabecalho(spans: Dict[str, list], total: Optional[float] = None) -> str:
+    """Valor do cabeçalho Server-Timing (durações em ms)"""
+    partes = []
+    for nome, (duracao, descricao) in spans.items():
+        item = f"{_NOME_INVALIDO.sub('_', nome)};dur={duracao * 1000:.2f}"
+        if descricao:
+            item += f';desc="{descricao}"'
+        partes.append(item)
+    if total is not None:
+        partes.append(f"total;dur={total * 1000:.2f}")
+    return ', '.join(partes)
+
+
+class TimedRoute(APIRoute):
+    """
+    Rota que mede o endpoint: o tempo não coberto por spans internos (cópia, filtro...)
+    vira o span 'agregacao'; o que vem depois do endpoint (jsonable_encoder) vira 'serializacao'.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _medir_endpoint(endpoint), **kwargs)
+
+
+def _medir_endpoint(endpoint):
+    # Endpoints síncronos rodam no threadpool e ficam só com os spans internos
+    if not inspect.iscoroutinefunction(endpoint) or getattr(endpoint, '__server_timing__', False):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def medido(*args, **kwargs):
+        if _spans.get() is None:
+            return await endpoint(*args, **kwargs)
+        antes = _total_spans()
+        inicio = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            fim = time.perf_counter()
+            internos = _total_spans() - antes
+            registrar('agregacao', max(0.0, (fim - inicio) - internos))
+            _fim_endpoint.set(fim)
+
+    medido.__server_timing__ = True
+    return medido
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse padrão do app: mede a serialização do FastAPI e o json.dumps"""
+
+    def render(self, content: Any) -> bytes:
+        fim_endpoint = _fim_endpoint.get()
+        if fim_endpoint is not None:
+            registrar('serializacao', time.perf_counter() - fim_endpoint)
+            _fim_endpoint.set(None)
+        with span('json'):
+            return super().render(content)
+
+
+def _resumo_perfil(perfil: cProfile.Profile) -> Dict[str, List[Dict[str, Any]]]:
+    """Top funções por tempo cumulativo e por tempo próprio"""
+    estatisticas = pstats.Stats(perfil, stream=io.StringIO())
+    linhas = []
+    for (arquivo, linha, funcao), (_, chamadas, proprio, cumulativo, _) in estatisticas.stats.items():
+        linhas.append({
+            'funcao': funcao,
+            'local': f"{os.path.basename(arquivo)}:{linha}",
+            'chamadas': chamadas,
+            'tempo_proprio_ms': round(proprio * 1000, 3),
+            'tempo_cumulativo_ms': round(cumulativo * 1000, 3),
+        })
+    return {
+        'por_tempo_cumulativo': sorted(linhas, key=lambda l: -l['tempo_cumulativo_ms'])[:LINHAS_PERFIL],
+        'por_tempo_proprio': sorted(linhas, key=lambda l: -l['tempo_proprio_ms'])[:LINHAS_PERFIL],
+    }
+
+
+def _pediu_perfil(scope) -> bool:
+    if not PROFILE_HABILITADO:
+        return False
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    return query.get('profile', ['0'])[-1] in ('1', 'true')
+
+
+class ServerTimingMiddleware:
+    """
+    Abre o contexto de spans da requisição e acrescenta Server-Timing à resposta.
+    Com ?profile=1, descarta a resposta normal e devolve o resumo do cProfile.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        spans: Dict[str, list] = {}
+        token = _spans.set(spans)
+        inicio = time.perf_counter()
+        perfil = cProfile.Profile() if _pediu_perfil(scope) else None
+
+        if perfil is not None:
+            resposta = {'status': 500, 'bytes': 0}
+
+            async def descartar(mensagem):
+                if mensagem['type'] == 'http.response.start':
+                    resposta['status'] = mensagem['status']
+                elif mensagem['type'] == 'http.response.body':
+                    resposta['bytes'] += len(mensagem.get('body', b''))
+
+            try:
+                perfil.enable()
+                await self.app(scope, receive, descartar)
+            finally:
+                perfil.disable()
+                _spans.reset(token)
+            total = time.perf_counter() - inicio
+            corpo = json.dumps({
+                'rota': scope.get('path'),
+                'status_original': resposta['status'],
+                'bytes_original': resposta['bytes'],
+                'total_ms': round(total * 1000, 3),
+                'etapas_ms': {nome: round(d * 1000, 3) for nome, (d, _) in spans.items()},
+                'perfil': _resumo_perfil(perfil),
+            }, ensure_ascii=False).encode('utf-8')
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(corpo)).encode()),
+                (b'server-timing', cabecalho(spans, total).encode('latin-1')),
+                (b'timing-allow-origin', b'*'),
+            ]})
+            await send({'type': 'http.response.body', 'body': corpo})
+            return
+
+        async def enviar(mensagem):
+            if mensagem['type'] == 'http.response.start':
+                headers = list(mensagem.get('headers', []))
+                headers.append((b'server-timing', cabecalho(spans, time.perf_counter() - inicio).encode('latin-1')))
+                headers.append((b'timing-allow-origin', b'*'))
+                mensagem = {**mensagem, 'headers': headers}
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _spans.reset(token)
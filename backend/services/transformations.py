@@ -3,6 +3,7 @@ Transformações de Dados
 Funções para transformar e preparar dados para visualização
 """
 
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
@@ -41,117 +42,121 @@ def aggregate_by_object(df: pd.DataFrame, group_col: str = 'objeto_acao') -> Lis
     return grouped.to_dict('records')
 
 
-def calculate_evolution(df: pd.DataFrame, date_col: str = 'data_entrada') -> List[Dict]:
-    """Calcula evolução temporal separando Entradas e Encerramentos"""
-    df_copy = df.copy()
-    
-    # Processar Entradas: TODOS os registros com data_entrada preenchida
-    # Um registro pode ser entrada em um mês e encerrado em outro mês
-    # Portanto, contamos como entrada no mês da data_entrada, independente do status
-    if 'data_entrada' in df_copy.columns:
-        entradas_df = df_copy[df_copy['data_entrada'].notna()].copy()
-        entradas_df['data_entrada'] = pd.to_datetime(entradas_df['data_entrada'], errors='coerce')
-        entradas_df = entradas_df[entradas_df['data_entrada'].notna()]
-        if len(entradas_df) > 0:
-            entradas_df['mes_ano'] = entradas_df['data_entrada'].dt.to_period('M')
-            entradas_df['count'] = 1
-            entradas_evolution = entradas_df.groupby('mes_ano').agg({
-                'count': 'sum'
-            }).reset_index()
-            entradas_evolution['mes_ano'] = entradas_evolution['mes_ano'].astype(str)
-            entradas_evolution.columns = ['periodo', 'entradas']
-        else:
-            entradas_evolution = pd.DataFrame(columns=['periodo', 'entradas'])
-    else:
-        entradas_evolution = pd.DataFrame(columns=['periodo', 'entradas'])
-    
-    # Processar Encerramentos: usar lógica correta que exclui "Ativo", "Sem sentença", "Fase recurso"
-    # A função _is_encerrado está em aggregations.py, mas para evitar importação circular,
-    # vamos replicar a lógica aqui (ou importar no topo do arquivo se necessário)
-    # Valores que NÃO são encerramentos (coluna U)
-    nao_encerrados_valores = [
-        'ativo', 'ativos', 'atividade', 'atividades',
-        'sem sentença', 'sem sentenca', 'sem sentenç', 'sem senten',
-        'fase de recurso', 'fase recurso', 'recurso', 'recursos',
-        'em recurso', 'em fase de recurso'
-    ]
-    
-    if 'motivo_encerramento' in df_copy.columns:
-        motivo = df_copy['motivo_encerramento'].astype(str).str.lower().str.strip()
-        encerrados_mask = (
-            motivo.notna() & 
-            (motivo != '') & 
+# Valores de motivo_encerramento que NÃO são encerramentos (coluna U).
+# A função _is_encerrado está em aggregations.py; replicada aqui para evitar importação circular.
+_NAO_ENCERRADOS_VALORES = [
+    'ativo', 'ativos', 'atividade', 'atividades',
+    'sem sentença', 'sem sentenca', 'sem sentenç', 'sem senten',
+    'fase de recurso', 'fase recurso', 'recurso', 'recursos',
+    'em recurso', 'em fase de recurso'
+]
+
+# Frequências suportadas pela série temporal
+FREQUENCIAS_SERIE = ('M', 'W', 'D')
+
+
+def _encerrados_mask(df: pd.DataFrame) -> pd.Series:
+    """Máscara de encerramentos: motivo_encerramento válido ou, sem ele, status == 'Encerrado'."""
+    if 'motivo_encerramento' in df.columns:
+        motivo = df['motivo_encerramento'].astype(str).str.lower().str.strip()
+        return (
+            motivo.notna() &
+            (motivo != '') &
             (motivo != 'nan') &
-            ~motivo.str.contains('|'.join(nao_encerrados_valores), case=False, na=False, regex=True)
+            ~motivo.str.contains('|'.join(_NAO_ENCERRADOS_VALORES), case=False, na=False, regex=True)
         )
+    if 'status' in df.columns:
+        return df['status'] == 'Encerrado'
+    return pd.Series(False, index=df.index)
+
+
+def _period_ordinals(values: pd.Series, freq: str) -> np.ndarray:
+    """
+    Codifica datas como ordinais inteiros do período (NaT devem ser removidos antes).
+    M: meses desde 1970-01; W: semanas (segunda-feira) desde 1969-12-29; D: dias desde 1970-01-01.
+    """
+    datas = pd.to_datetime(values, errors='coerce').to_numpy(dtype='datetime64[ns]')
+    if freq == 'M':
+        return datas.astype('datetime64[M]').astype(np.int64)
+    dias = datas.astype('datetime64[D]').astype(np.int64)
+    if freq == 'W':
+        # 1970-01-01 foi quinta-feira: deslocar 3 dias para alinhar semanas na segunda
+        return (dias + 3) // 7
+    return dias
+
+
+def _period_labels(ordinais: np.ndarray, freq: str) -> List[str]:
+    """Converte ordinais de período de volta para rótulos (YYYY-MM ou data de início YYYY-MM-DD)."""
+    if freq == 'M':
+        return ordinais.astype('datetime64[M]').astype(str).tolist()
+    if freq == 'W':
+        return (ordinais * 7 - 3).astype('datetime64[D]').astype(str).tolist()
+    return ordinais.astype('datetime64[D]').astype(str).tolist()
+
+
+def calculate_time_series(df: pd.DataFrame, freq: str = 'M') -> List[Dict]:
+    """
+    Série temporal de Entradas, Encerramentos e saldo em aberto (backlog acumulado).
+    Datas são codificadas como ordinais inteiros e contadas com um único np.bincount
+    sobre o vetor intercalado (período * 2 + tipo), sem groupby nem merge de períodos.
+    O backlog é a soma acumulada de entradas - encerramentos em todo o intervalo,
+    inclusive meses sem movimento; são retornados apenas os períodos com movimento.
+    """
+    if freq not in FREQUENCIAS_SERIE:
+        raise ValueError(f"Frequência inválida: {freq}. Use uma de {FREQUENCIAS_SERIE}")
+
+    # Entradas: TODOS os registros com data_entrada preenchida, independente do status
+    if 'data_entrada' in df.columns:
+        datas_entrada = pd.to_datetime(df['data_entrada'], errors='coerce')
+        ord_entradas = _period_ordinals(datas_entrada[datas_entrada.notna()], freq)
     else:
-        # Fallback: usar status
-        encerrados_mask = (df_copy['status'] == 'Encerrado')
-    encerrados_df = df_copy[encerrados_mask].copy()
-    
-    # Processar Encerramentos
-    if 'data_encerramento' in encerrados_df.columns:
-        encerrados_df['data_encerramento'] = pd.to_datetime(encerrados_df['data_encerramento'], errors='coerce')
-        encerrados_df = encerrados_df[encerrados_df['data_encerramento'].notna()]
-        if len(encerrados_df) > 0:
-            encerrados_df['mes_ano'] = encerrados_df['data_encerramento'].dt.to_period('M')
-            encerrados_df['count'] = 1
-            encerrados_evolution = encerrados_df.groupby('mes_ano').agg({
-                'count': 'sum'
-            }).reset_index()
-            encerrados_evolution['mes_ano'] = encerrados_evolution['mes_ano'].astype(str)
-            encerrados_evolution.columns = ['periodo', 'encerramentos']
-        else:
-            encerrados_evolution = pd.DataFrame(columns=['periodo', 'encerramentos'])
-    else:
-        # Se não tem data_encerramento, usar data_entrada como fallback
-        if 'data_entrada' in encerrados_df.columns:
-            encerrados_df['data_entrada'] = pd.to_datetime(encerrados_df['data_entrada'], errors='coerce')
-            encerrados_df = encerrados_df[encerrados_df['data_entrada'].notna()]
-            if len(encerrados_df) > 0:
-                encerrados_df['mes_ano'] = encerrados_df['data_entrada'].dt.to_period('M')
-                encerrados_df['count'] = 1
-                encerrados_evolution = encerrados_df.groupby('mes_ano').agg({
-                    'count': 'sum'
-                }).reset_index()
-                encerrados_evolution['mes_ano'] = encerrados_evolution['mes_ano'].astype(str)
-                encerrados_evolution.columns = ['periodo', 'encerramentos']
-            else:
-                encerrados_evolution = pd.DataFrame(columns=['periodo', 'encerramentos'])
-        else:
-            encerrados_evolution = pd.DataFrame(columns=['periodo', 'encerramentos'])
-    
-    # Fazer merge dos períodos
-    if len(entradas_evolution) > 0 or len(encerrados_evolution) > 0:
-        # Obter todos os períodos únicos
-        todos_periodos = set()
-        if len(entradas_evolution) > 0:
-            todos_periodos.update(entradas_evolution['periodo'].tolist())
-        if len(encerrados_evolution) > 0:
-            todos_periodos.update(encerrados_evolution['periodo'].tolist())
-        
-        # Criar DataFrame com todos os períodos
-        evolution = pd.DataFrame({'periodo': sorted(todos_periodos)})
-        
-        # Fazer merge com entradas e encerramentos
-        if len(entradas_evolution) > 0:
-            evolution = evolution.merge(entradas_evolution, on='periodo', how='left')
-        else:
-            evolution['entradas'] = 0
-        
-        if len(encerrados_evolution) > 0:
-            evolution = evolution.merge(encerrados_evolution, on='periodo', how='left')
-        else:
-            evolution['encerramentos'] = 0
-        
-        # Preencher NaN com 0
-        evolution = evolution.fillna(0)
-        evolution['entradas'] = evolution['entradas'].astype(int)
-        evolution['encerramentos'] = evolution['encerramentos'].astype(int)
+        datas_entrada = None
+        ord_entradas = np.empty(0, dtype=np.int64)
+
+    # Encerramentos: lógica que exclui "Ativo", "Sem sentença", "Fase recurso";
+    # sem data_encerramento, usar data_entrada como fallback
+    encerrados_mask = _encerrados_mask(df)
+    if 'data_encerramento' in df.columns:
+        datas_enc = pd.to_datetime(df.loc[encerrados_mask, 'data_encerramento'], errors='coerce')
+    elif datas_entrada is not None:
+        datas_enc = datas_entrada[encerrados_mask]
     else:
-        evolution = pd.DataFrame(columns=['periodo', 'entradas', 'encerramentos'])
-    
-    return evolution.to_dict('records')
+        datas_enc = pd.Series([], dtype='datetime64[ns]')
+    ord_encerrados = _period_ordinals(datas_enc[datas_enc.notna()], freq)
+
+    if len(ord_entradas) == 0 and len(ord_encerrados) == 0:
+        return []
+
+    inicio = min(ord_entradas.min() if len(ord_entradas) else np.iinfo(np.int64).max,
+                 ord_encerrados.min() if len(ord_encerrados) else np.iinfo(np.int64).max)
+    fim = max(ord_entradas.max() if len(ord_entradas) else np.iinfo(np.int64).min,
+              ord_encerrados.max() if len(ord_encerrados) else np.iinfo(np.int64).min)
+    n_periodos = int(fim - inicio + 1)
+
+    # Uma única passada: posição par = entradas, ímpar = encerramentos
+    codigos = np.concatenate([(ord_entradas - inicio) * 2, (ord_encerrados - inicio) * 2 + 1])
+    contagens = np.bincount(codigos, minlength=n_periodos * 2).reshape(n_periodos, 2)
+    entradas = contagens[:, 0]
+    encerramentos = contagens[:, 1]
+    backlog = np.cumsum(entradas - encerramentos)
+
+    ativos = np.flatnonzero(entradas | encerramentos)
+    rotulos = _period_labels(ativos + inicio, freq)
+
+    return [
+        {
+            'periodo': rotulo,
+            'entradas': int(entradas[i]),
+            'encerramentos': int(encerramentos[i]),
+            'backlog': int(backlog[i])
+        }
+        for rotulo, i in zip(rotulos, ativos)
+    ]
+
+
+def calculate_evolution(df: pd.DataFrame, date_col: str = 'data_entrada', freq: str = 'M') -> List[Dict]:
+    """Calcula evolução temporal separando Entradas e Encerramentos (inclui backlog acumulado)"""
+    return calculate_time_series(df, freq=freq)
 
 
 def calculate_average_time(df: pd.DataFrame) -> Dict[str, Any]:
@@ -198,6 +203,17 @@ def calculate_pareto(df: pd.DataFrame, value_col: str = 'impacto_financeiro',
 
 def filter_critical_cases(df: pd.DataFrame, top_n: int = 20) -> List[Dict]:
     """Filtra casos críticos"""
+    critical = df[df['critico'] == True].copy()
+    
+    if critical.empty:
+        critical = df.nlargest(top_n, 'impacto_financeiro')
+    
+    critical = critical.sort_values('impacto_financeiro', ascending=False).head(top_n)
+    return format_critical_cases(critical)
+
+
+def format_critical_cases(critical: pd.DataFrame) -> List[Dict]:
+    """Campos de cada caso crítico (linhas já selecionadas e ordenadas)"""
     import math
     
     def _safe_float(value, default=0.0):
@@ -222,13 +238,6 @@ def filter_critical_cases(df: pd.DataFrame, top_n: int = 20) -> List[Dict]:
         except (ValueError, TypeError):
             return default
     
-    critical = df[df['critico'] == True].copy()
-    
-    if critical.empty:
-        critical = df.nlargest(top_n, 'impacto_financeiro')
-    
-    critical = critical.sort_values('impacto_financeiro', ascending=False).head(top_n)
-    
     # Selecionar campos relevantes
     result = []
     for _, row in critical.iterrows():
@@ -286,54 +295,42 @@ def aggregate_by_state(df: pd.DataFrame) -> List[Dict]:
     return grouped.to_dict('records')
 
 
-def calculate_sla_by_area(df: pd.DataFrame) -> List[Dict]:
+def calculate_sla_by_area(df: pd.DataFrame, benchmark: float = None) -> List[Dict]:
     """
     Calcula SLA por área interna usando sla_real (diferença entre data_encerramento e data_entrada).
     Retorna área, média de dias, acima_da_meta e quantidade de casos.
     Ordenado do maior para o menor SLA.
     """
-    from services.data_loader import BENCHMARK_NACIONAL
-    
-    df_copy = df.copy()
-    
-    # Verificar se temos sla_real calculado
-    if 'sla_real' not in df_copy.columns:
-        return []
-    
-    # Verificar se temos area_interna
-    if 'area_interna' not in df_copy.columns:
-        return []
-    
-    # Filtrar áreas válidas
-    df_copy = df_copy[df_copy['area_interna'].notna()].copy()
-    df_copy = df_copy[df_copy['area_interna'] != 'Não Informado'].copy()
-    
-    if df_copy.empty:
+    from services.distributions import distribution_for
+
+    dist = distribution_for(df, 'sla_real', 'area')
+    if dist is None:
         return []
-    
-    # Agrupar por área e calcular média de sla_real
-    sla_data = df_copy.groupby('area_interna').agg({
-        'sla_real': 'mean'  # Média de sla_real por área
-    }).reset_index()
-    sla_data.columns = ['area', 'media_dias']
-    
-    # Contar quantidade de casos por área
-    quantidade_por_area = df_copy.groupby('area_interna').size().reset_index(name='quantidade')
-    quantidade_por_area.columns = ['area', 'quantidade']  # Renomear para fazer merge correto
-    sla_data = sla_data.merge(quantidade_por_area, on='area', how='left')
-    
-    # Adicionar campo acima_da_meta (True se media_dias > BENCHMARK_NACIONAL)
-    sla_data['acima_da_meta'] = sla_data['media_dias'] > BENCHMARK_NACIONAL
-    
+    return format_sla_by_area(dist.resumo(), benchmark)
+
+
+def format_sla_by_area(resumo: Dict[str, Dict[str, Any]], benchmark: float = None) -> List[Dict]:
+    """Formata o resumo de uma distribuição de sla_real por área (inclui mediana e p90)"""
+    from services.data_loader import BENCHMARK_NACIONAL
+    from services.distributions import TOTAL
+
+    if benchmark is None:
+        benchmark = BENCHMARK_NACIONAL
+
+    sla_data = [
+        {
+            'area': area,
+            'media_dias': round(r['media'], 2),
+            'quantidade': r['quantidade'],
+            # acima_da_meta: True se media_dias > benchmark
+            'acima_da_meta': bool(r['media'] > benchmark),
+            'mediana_dias': round(r['p50'], 2),
+            'p90_dias': round(r['p90'], 2)
+        }
+        for area, r in resumo.items() if area != TOTAL
+    ]
     # Ordenar do maior para o menor SLA
-    sla_data = sla_data.sort_values('media_dias', ascending=False)
-    
-    # Converter para tipos nativos
-    sla_data['media_dias'] = sla_data['media_dias'].round(2).astype(float)
-    sla_data['quantidade'] = sla_data['quantidade'].astype(int)
-    sla_data['acima_da_meta'] = sla_data['acima_da_meta'].astype(bool)
-    
-    return sla_data.to_dict('records')
+    return sorted(sla_data, key=lambda x: x['media_dias'], reverse=True)
 
 
 def calculate_sentences(df: pd.DataFrame) -> Dict[str, Any]:
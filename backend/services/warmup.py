@@ -0,0 +1,339 @@
+"""
+Aquecimento e Prontidão
+No startup, a base é carregada em uma thread (o event loop segue respondendo /health e
+/ready) e, em seguida, as respostas padrão (sem filtros) e as variantes por UF de cada
+rota GET são calculadas em processo e guardadas no cache de rotas.
+
+/ready informa a etapa (loading → warming → ready) com os tempos; o healthcheck do
+Render aponta para ele, então um worker só recebe tráfego depois de aquecido.
+
+Com MATERIALIZAR=1, o aquecimento vira a materialização completa: além das UFs, cada
+rota que aceita objeto da ação é calculada para cada objeto (e UF x objeto, quando a rota
+aceita os dois), em paralelo. Cliques de cross-filter no mapa e o filtro de estado passam
+a cair sempre em respostas prontas.
+
+Configuração por ambiente:
+- AQUECIMENTO=0 desliga o pré-cálculo (a carga continua em segundo plano)
+- AQUECIMENTO_UFS=0 aquece só as respostas sem filtro
+- MATERIALIZAR=1 inclui as variantes por objeto da ação e UF x objeto
+- MATERIALIZAR_PARALELO: workers do aquecimento (padrão: até 4 com MATERIALIZAR=1; 1 no
+  aquecimento simples)
+- MATERIALIZAR_MODO: 'processos' (padrão onde há fork: os filhos herdam a base já carregada
+  e devolvem os corpos serializados) ou 'threads' (Windows)
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi.routing import APIRoute
+
+from services.cache import CACHE_MAX_ENTRADAS, chave_rota, response_cache
+from services.logs import evento
+
+CARREGANDO = 'loading'
+AQUECENDO = 'warming'
+PRONTO = 'ready'
+ERRO = 'error'
+PARADO = 'idle'
+
+AQUECIMENTO_HABILITADO = os.getenv('AQUECIMENTO', '1') != '0'
+AQUECIMENTO_UFS = os.getenv('AQUECIMENTO_UFS', '1') != '0'
+MATERIALIZAR = os.getenv('MATERIALIZAR', '0') == '1'
+MATERIALIZAR_PARALELO = int(os.getenv(
+    'MATERIALIZAR_PARALELO', str(min(4, os.cpu_count() or 1) if MATERIALIZAR else 1)))
+MATERIALIZAR_MODO = os.getenv(
+    'MATERIALIZAR_MODO', 'processos' if 'fork' in multiprocessing.get_all_start_methods() else 'threads')
+
+# Alvos por tarefa enviada a um processo filho (granularidade do progresso em /ready)
+LOTE_PROCESSOS = 8
+
+# Nomes dos parâmetros de UF e de objeto da ação nas rotas
+PARAMS_UF = ('estado', 'uf')
+PARAMS_OBJETO = ('objeto', 'filtro_objeto')
+
+# Rotas que não são pré-calculadas (streaming: downloads e avisos SSE, nada a guardar no cache)
+ROTAS_SEM_AQUECIMENTO = ('/api/exportar', '/api/atualizacoes')
+
+
+class _Estado:
+    def __init__(self):
+        self.etapa = PARADO
+        self.inicio: Optional[float] = None
+        self.carga_s: Optional[float] = None
+        self.aquecimento_s: Optional[float] = None
+        self.previstas = 0
+        self.concluidas = 0
+        self.falhas: List[str] = []
+        self.erro: Optional[str] = None
+        self.materializar = MATERIALIZAR
+        self.paralelo = MATERIALIZAR_PARALELO
+        self.modo = MATERIALIZAR_MODO if MATERIALIZAR_PARALELO > 1 else 'sequencial'
+        self.lock = threading.Lock()
+        self.carregado = threading.Event()
+        self.parar = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+
+_estado = _Estado()
+
+
+def alvos(app, ufs: List[str], objetos: List[str] = ()) -> List[Tuple[str, Dict[str, str]]]:
+    """
+    (caminho, parâmetros) a aquecer: cada rota GET de /api sem parâmetros obrigatórios
+    com os padrões, e as que filtram por UF com cada UF da base. Com objetos, as rotas
+    que filtram por objeto ganham uma variante por objeto e, se também filtram por UF,
+    uma por combinação UF x objeto.
+    """
+    lista = []
+    for rota in app.routes:
+        if not isinstance(rota, APIRoute) or 'GET' not in rota.methods:
+            continue
+        if not rota.path.startswith('/api/') or '{' in rota.path or rota.path in ROTAS_SEM_AQUECIMENTO:
+            continue
+        params = {p.name: p for p in rota.dependant.query_params}
+        obrigatorios = {nome for nome, p in params.items() if p.required}
+        # Rotas que aceitam uf e estado (mapa) ganham as variantes com os dois nomes: o
+        # painel manda estado=, os cliques no mapa, uf=
+        params_uf = [nome for nome in PARAMS_UF if nome in params]
+        param_obj = next((nome for nome in PARAMS_OBJETO if nome in params), None)
+        if not obrigatorios:
+            lista.append((rota.path, {}))
+        for param_uf in params_uf:
+            if AQUECIMENTO_UFS and obrigatorios <= {param_uf}:
+                lista.extend((rota.path, {param_uf: uf}) for uf in ufs)
+        if objetos and param_obj and obrigatorios <= {param_obj}:
+            lista.extend((rota.path, {param_obj: obj}) for obj in objetos)
+        for param_uf in params_uf:
+            if objetos and param_obj and obrigatorios <= {param_uf, param_obj}:
+                lista.extend((rota.path, {param_uf: uf, param_obj: obj}) for uf in ufs for obj in objetos)
+    return lista
+
+
+def _sigla_uf(valor: str) -> bool:
+    """Sigla de UF (duas letras maiúsculas); exclui o preenchimento 'Não Informado' do loader"""
+    return len(valor) == 2 and valor.isalpha() and valor.isupper()
+
+
+def ufs_da_base(df) -> List[str]:
+    """UFs presentes na base carregada, em ordem (só siglas: é o que o filtro de estado seleciona)"""
+    if df is None or 'estado' not in df.columns:
+        return []
+    return sorted(str(uf) for uf in df['estado'].dropna().unique() if _sigla_uf(str(uf)))
+
+
+def objetos_da_base(df) -> List[str]:
+    """Objetos da ação presentes na base carregada, em ordem"""
+    if df is None or 'objeto_acao' not in df.columns:
+        return []
+    return sorted(str(obj) for obj in df['objeto_acao'].dropna().unique() if str(obj).strip())
+
+
+async def requisitar(app, caminho: str, params: Dict[str, str]) -> Tuple[int, bytes]:
+    """
+    GET em processo pela pilha ASGI completa (middlewares, rota, cache); devolve status e
+    corpo. O escopo é marcado com 'aquecimento' para não entrar nas métricas de latência.
+    """
+    status = {'codigo': 500}
+    partes: List[bytes] = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(mensagem):
+        if mensagem['type'] == 'http.response.start':
+            status['codigo'] = mensagem['status']
+        elif mensagem['type'] == 'http.response.body':
+            partes.append(mensagem.get('body', b''))
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': caminho, 'raw_path': caminho.encode(),
+        'query_string': urlencode(params).encode(), 'root_path': '',
+        'headers': [(b'host', b'aquecimento')], 'client': None, 'server': None,
+        'aquecimento': True,
+    }
+    await app(scope, receive, send)
+    return status['codigo'], b''.join(partes)
+
+
+def _aquecer_um(app, alvo: Tuple[str, Dict[str, str]]) -> None:
+    """Uma requisição em um event loop próprio (cada thread do pool roda o seu)"""
+    caminho, params = alvo
+    if _estado.parar.is_set():
+        return
+    try:
+        codigo, _ = asyncio.run(requisitar(app, caminho, params))
+        if codigo != 200:
+            _estado.falhas.append(f"{caminho}?{urlencode(params)} -> {codigo}")
+    except Exception as e:
+        _estado.falhas.append(f"{caminho}?{urlencode(params)} -> {e}")
+    with _estado.lock:
+        _estado.concluidas += 1
+
+
+# App usado pelos processos filhos (herdado no fork)
+_app_filho = None
+
+
+def _iniciar_filho() -> None:
+    """
+    Processo filho recém-criado por fork: locks herdados podem ter sido copiados
+    adquiridos por outra thread do pai, então são recriados.
+    """
+    from services import data_loader, logs
+    response_cache._lock = threading.Lock()
+    data_loader._loader_lock = threading.Lock()
+    logs._lock = threading.Lock()
+    loader = data_loader._loader
+    if loader is not None:
+        loader._lock = threading.Lock()
+        loader._derived_lock = threading.Lock()
+
+
+def _materializar_lote(lote: List[Tuple[str, Dict[str, str]]]) -> Tuple[List[Tuple], List[str]]:
+    """Executa no filho: calcula o lote e devolve (chave, corpo) para o cache do pai"""
+    resultados, falhas = [], []
+    for caminho, params in lote:
+        try:
+            codigo, _ = asyncio.run(requisitar(_app_filho, caminho, params))
+            if codigo != 200:
+                falhas.append(f"{caminho}?{urlencode(params)} -> {codigo}")
+                continue
+            chave = chave_rota(caminho, params)
+            with response_cache._lock:
+                valor = response_cache._data.get(chave)
+            if valor is not None:
+                resultados.append((chave, valor))
+        except Exception as e:
+            falhas.append(f"{caminho}?{urlencode(params)} -> {e}")
+    return resultados, falhas
+
+
+def _aquecer_processos(app, lista: List[Tuple[str, Dict[str, str]]], paralelo: int) -> None:
+    global _app_filho
+    _app_filho = app
+    lotes = [lista[i:i + LOTE_PROCESSOS] for i in range(0, len(lista), LOTE_PROCESSOS)]
+    contexto = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=paralelo, mp_context=contexto, initializer=_iniciar_filho) as pool:
+        futuros = {pool.submit(_materializar_lote, lote): len(lote) for lote in lotes}
+        for futuro in as_completed(futuros):
+            resultados, falhas = futuro.result()
+            for chave, valor in resultados:
+                response_cache.set(chave, valor)
+            _estado.falhas.extend(falhas)
+            with _estado.lock:
+                _estado.concluidas += futuros[futuro]
+            if _estado.parar.is_set():
+                pool.shutdown(wait=False, cancel_futures=True)
+                return
+
+
+def _aquecer(app, lista: List[Tuple[str, Dict[str, str]]], paralelo: int, modo: str) -> None:
+    """
+    Calcula os alvos: em sequência, em processos filhos (paralelismo real, a base é
+    herdada no fork) ou em threads (agregações pandas/numpy liberam o GIL só em parte).
+    """
+    if paralelo <= 1:
+        for alvo in lista:
+            _aquecer_um(app, alvo)
+        return
+    if modo == 'processos':
+        _aquecer_processos(app, lista, paralelo)
+        return
+    with ThreadPoolExecutor(max_workers=paralelo, thread_name_prefix='materializacao') as pool:
+        list(pool.map(lambda alvo: _aquecer_um(app, alvo), lista))
+
+
+def _executar(app) -> None:
+    from services.busca import get_indice_busca
+    from services.cube import get_cube
+    from services.data_loader import get_loader
+
+    try:
+        inicio = time.perf_counter()
+        loader = get_loader()
+        _estado.carga_s = time.perf_counter() - inicio
+        _estado.carregado.set()
+
+        if AQUECIMENTO_HABILITADO and not _estado.parar.is_set():
+            _estado.etapa = AQUECENDO
+            inicio = time.perf_counter()
+            get_cube()
+            get_indice_busca()
+            objetos = objetos_da_base(loader._df) if _estado.materializar else []
+            lista = alvos(app, ufs_da_base(loader._df), objetos)
+            _estado.previstas = len(lista)
+            # As visões materializadas precisam caber no cache junto com o tráfego sob demanda
+            response_cache.max_entries = max(response_cache.max_entries, len(lista) + CACHE_MAX_ENTRADAS // 4)
+            _aquecer(app, lista, _estado.paralelo, _estado.modo)
+            _estado.aquecimento_s = time.perf_counter() - inicio
+
+        _estado.etapa = PRONTO
+        evento("warmup", "ready", status(), nivel=logging.INFO)
+    except Exception as e:
+        _estado.erro = str(e)
+        _estado.etapa = ERRO
+        print(f"Erro no aquecimento: {e}")
+        traceback.print_exc()
+    finally:
+        _estado.carregado.set()
+
+
+def iniciar(app) -> None:
+    """Dispara carga + aquecimento em segundo plano (chamado no lifespan do app)"""
+    global _estado
+    if _estado.thread is not None and _estado.thread.is_alive():
+        return
+    _estado = _Estado()
+    _estado.inicio = time.time()
+    # Antes do start: requisições que chegarem já sabem que devem esperar a carga
+    _estado.etapa = CARREGANDO
+    _estado.thread = threading.Thread(target=_executar, args=(app,), name='aquecimento', daemon=True)
+    _estado.thread.start()
+
+
+def parar() -> None:
+    """Interrompe o aquecimento entre duas requisições (shutdown)"""
+    _estado.parar.set()
+
+
+async def aguardar_carga() -> None:
+    """
+    Requisições que chegam durante a carga esperam sem bloquear o event loop
+    (fora do startup em segundo plano, retorna na hora).
+    """
+    if _estado.etapa == CARREGANDO and not _estado.carregado.is_set():
+        await asyncio.to_thread(_estado.carregado.wait)
+
+
+def pronto() -> bool:
+    return _estado.etapa == PRONTO
+
+
+def status() -> Dict[str, Any]:
+    """Etapa atual e tempos (s) de carga e aquecimento"""
+    decorrido = time.time() - _estado.inicio if _estado.inicio else None
+    return {
+        'status': _estado.etapa,
+        'materializacao': _estado.materializar,
+        'paralelo': _estado.paralelo,
+        'modo': _estado.modo,
+        'decorrido_s': round(decorrido, 3) if decorrido is not None else None,
+        'carga_s': round(_estado.carga_s, 3) if _estado.carga_s is not None else None,
+        'aquecimento_s': round(_estado.aquecimento_s, 3) if _estado.aquecimento_s is not None else None,
+        'respostas': {
+            'previstas': _estado.previstas,
+            'concluidas': _estado.concluidas,
+            'falhas': len(_estado.falhas),
+        },
+        'falhas': _estado.falhas[:20],
+        'erro': _estado.erro,
+    }
@@ -0,0 +1,197 @@
+"""
+Exportação Estática da API
+Carrega a base uma vez e grava a resposta de cada rota GET (sem filtro, por UF, por objeto
+da ação e UF x objeto) como JSON estático, com versões pré-comprimidas (.gz e, se o
+pacote brotli estiver instalado, .br), mais um manifest.json. O frontend (api.js), com
+window.API_STATIC_URL definido, consulta o manifesto e só cai na API ao vivo quando a
+combinação de filtros não foi exportada.
+
+Uso (a partir de backend/):
+    python static_export.py                          # grava em ../frontend/api-estatica
+    python static_export.py --saida /tmp/api --sem-objetos
+    python static_export.py --sintetico 50k          # base sintética (teste do build)
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import re
+import shutil
+import sys
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+from fastapi.routing import APIRoute
+
+PASTA_PADRAO = Path(__file__).resolve().parent.parent / 'frontend' / 'api-estatica'
+
+# Prefixo das rotas no app; o manifesto usa caminhos relativos a ele, como o api.js
+PREFIXO_API = '/api'
+
+NOME_MANIFESTO = 'manifest.json'
+
+# Nível de compressão dos arquivos .gz (o build roda uma vez; o tamanho importa mais)
+NIVEL_GZIP = 9
+
+
+def chave_manifesto(caminho: str, params: Dict[str, str]) -> str:
+    """
+    Chave canônica de uma requisição: caminho sem /api e parâmetros ordenados, com os
+    valores sem codificação (api.js monta a mesma chave com URLSearchParams).
+    """
+    relativo = caminho[len(PREFIXO_API):] if caminho.startswith(PREFIXO_API) else caminho
+    if not params:
+        return relativo
+    return relativo + '?' + '&'.join(f"{k}={v}" for k, v in sorted(params.items()))
+
+
+def _slug(texto: str) -> str:
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^A-Za-z0-9]+', '-', texto).strip('-').lower()[:40] or 'x'
+
+
+def nome_arquivo(caminho: str, params: Dict[str, str]) -> str:
+    """Arquivo relativo à pasta de saída: <rota>/index.json ou <rota>/<filtros>-<hash>.json"""
+    relativo = caminho[len(PREFIXO_API):] if caminho.startswith(PREFIXO_API) else caminho
+    pasta = relativo.strip('/') or 'raiz'
+    if not params:
+        return f"{pasta}/index.json"
+    legivel = '_'.join(f"{k}-{_slug(v)}" for k, v in sorted(params.items()))
+    resumo = hashlib.sha1(chave_manifesto(caminho, params).encode('utf-8')).hexdigest()[:8]
+    return f"{pasta}/{legivel}-{resumo}.json"
+
+
+def padroes_rotas(app) -> Dict[str, Dict[str, Any]]:
+    """
+    Valores padrão dos parâmetros de cada rota (ex.: freq=M). O api.js remove da chave os
+    parâmetros iguais ao padrão, então ?freq=M encontra o arquivo exportado sem filtros.
+    """
+    padroes = {}
+    for rota in app.routes:
+        if not isinstance(rota, APIRoute) or not rota.path.startswith(PREFIXO_API + '/'):
+            continue
+        valores = {}
+        for param in rota.dependant.query_params:
+            padrao = param.field_info.default
+            if not param.required and isinstance(padrao, (str, int, float, bool)):
+                valores[param.name] = str(padrao).lower() if isinstance(padrao, bool) else str(padrao)
+        if valores:
+            padroes[chave_manifesto(rota.path, {})] = valores
+    return padroes
+
+
+def _gravar(destino: Path, corpo: bytes) -> Dict[str, int]:
+    """Grava o JSON e as versões comprimidas; devolve os tamanhos"""
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    destino.write_bytes(corpo)
+    tamanhos = {'bytes': len(corpo)}
+    # mtime=0: o mesmo conteúdo gera o mesmo .gz (deploys sem diferenças espúrias)
+    comprimido = gzip.compress(corpo, compresslevel=NIVEL_GZIP, mtime=0)
+    destino.with_name(destino.name + '.gz').write_bytes(comprimido)
+    tamanhos['gzip'] = len(comprimido)
+    if brotli is not None:
+        comprimido = brotli.compress(corpo, quality=11)
+        destino.with_name(destino.name + '.br').write_bytes(comprimido)
+        tamanhos['br'] = len(comprimido)
+    return tamanhos
+
+
+async def _exportar(app, alvos: List[Tuple[str, Dict[str, str]]], saida: Path) -> Tuple[Dict[str, Any], List[str]]:
+    from services.warmup import requisitar
+
+    arquivos: Dict[str, Any] = {}
+    falhas: List[str] = []
+    for caminho, params in alvos:
+        chave = chave_manifesto(caminho, params)
+        try:
+            codigo, corpo = await requisitar(app, caminho, params)
+        except Exception as e:
+            falhas.append(f"{chave} -> {e}")
+            continue
+        if codigo != 200:
+            falhas.append(f"{chave} -> {codigo}")
+            continue
+        arquivo = nome_arquivo(caminho, params)
+        arquivos[chave] = {'arquivo': arquivo, **_gravar(saida / arquivo, corpo)}
+    return arquivos, falhas
+
+
+def exportar(saida: Path, ufs: bool = True, objetos: bool = True, limpar: bool = True) -> Dict[str, Any]:
+    """Gera os arquivos estáticos e o manifesto a partir da base carregada por get_loader()"""
+    from app import app
+    from services.data_loader import get_loader
+    from services.warmup import alvos as listar_alvos, objetos_da_base, ufs_da_base
+
+    inicio = time.perf_counter()
+    loader = get_loader()
+    df = loader._df
+    lista = listar_alvos(
+        app,
+        ufs_da_base(df) if ufs else [],
+        objetos_da_base(df) if objetos else [],
+    )
+
+    # Só apaga pastas que são exportações anteriores (têm manifesto)
+    if limpar and (saida / NOME_MANIFESTO).is_file():
+        shutil.rmtree(saida)
+    saida.mkdir(parents=True, exist_ok=True)
+
+    arquivos, falhas = asyncio.run(_exportar(app, lista, saida))
+
+    manifesto = {
+        'gerado_em': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'geracao': loader.generation,
+        'data_referencia': str(loader._reference_date.date()) if loader._reference_date is not None else None,
+        'registros': len(df) if df is not None else 0,
+        'total': len(arquivos),
+        'compressao': ['gzip'] + (['br'] if brotli is not None else []),
+        'padroes': padroes_rotas(app),
+        'arquivos': arquivos,
+    }
+    (saida / NOME_MANIFESTO).write_text(json.dumps(manifesto, ensure_ascii=False, indent=1), encoding='utf-8')
+
+    return {
+        'arquivos': len(arquivos),
+        'falhas': falhas,
+        'bytes': sum(a['bytes'] for a in arquivos.values()),
+        'bytes_gzip': sum(a['gzip'] for a in arquivos.values()),
+        'duracao_s': round(time.perf_counter() - inicio, 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Exporta as respostas da API como JSON estático')
+    parser.add_argument('--saida', default=str(PASTA_PADRAO), help='Pasta de saída (servida como origem estática)')
+    parser.add_argument('--sem-ufs', action='store_true', help='Não exportar as variantes por UF')
+    parser.add_argument('--sem-objetos', action='store_true', help='Não exportar as variantes por objeto da ação')
+    parser.add_argument('--manter', action='store_true', help='Não apagar a pasta de saída antes de exportar')
+    parser.add_argument('--sintetico', default=None, help='Usar base sintética com N registros (ex.: 50k)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--estrito', action='store_true', help='Código de saída 1 se alguma rota falhar')
+    args = parser.parse_args(argv)
+
+    if args.sintetico:
+        from benchmarks.synthetic import gerar_base, instalar_loader, parse_tamanho
+        instalar_loader(gerar_base(parse_tamanho(args.sintetico), seed=args.seed))
+
+    resultado = exportar(Path(args.saida), ufs=not args.sem_ufs, objetos=not args.sem_objetos,
+                         limpar=not args.manter)
+    print(f"{resultado['arquivos']} respostas exportadas em {resultado['duracao_s']}s "
+          f"({resultado['bytes'] / 1e6:.1f} MB; {resultado['bytes_gzip'] / 1e6:.1f} MB com gzip) → {args.saida}")
+    # Falhas não interrompem o build: essas combinações seguem pela API ao vivo
+    for falha in resultado['falhas']:
+        print(f"  falha (fica na API ao vivo): {falha}")
+    return 1 if args.estrito and resultado['falhas'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
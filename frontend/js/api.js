@@ -16,16 +16,79 @@ const API_BASE_URL = (() => {
     return 'http://localhost:8001/api';
 })();
 
+// Origem estática opcional (exportação de backend/static_export.py); null = só API ao vivo
+const API_STATIC_URL = (() => {
+    if (window.API_STATIC_URL) {
+        return window.API_STATIC_URL.replace(/\/$/, '');
+    }
+    return null;
+})();
+
 // Estado global para filtro de estado
 let estadoSelecionado = null;
 
+// Manifesto da origem estática (carregado uma vez; null se indisponível)
+let manifestoEstatico = null;
+
+function carregarManifestoEstatico() {
+    if (!manifestoEstatico) {
+        manifestoEstatico = fetch(`${API_STATIC_URL}/manifest.json`)
+            .then(response => (response.ok ? response.json() : null))
+            .catch(() => null);
+    }
+    return manifestoEstatico;
+}
+
+/**
+ * Chave canônica da requisição no manifesto (mesma regra de chave_manifesto no backend):
+ * caminho + parâmetros ordenados, sem os que estão no valor padrão da rota.
+ */
+function chaveEstatica(url, manifesto) {
+    const [caminho, query = ''] = url.split('?');
+    const padroes = (manifesto.padroes || {})[caminho] || {};
+    const params = [...new URLSearchParams(query).entries()]
+        .filter(([chave, valor]) => valor !== '' && padroes[chave] !== valor)
+        .sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0));
+    if (!params.length) {
+        return caminho;
+    }
+    return `${caminho}?${params.map(([chave, valor]) => `${chave}=${valor}`).join('&')}`;
+}
+
 class APIClient {
+    /**
+     * Resposta exportada na origem estática, ou undefined quando não há origem configurada,
+     * a combinação de filtros não foi exportada ou o arquivo falhou (cai na API ao vivo).
+     */
+    async getEstatico(url) {
+        if (!API_STATIC_URL) {
+            return undefined;
+        }
+        try {
+            const manifesto = await carregarManifestoEstatico();
+            const entrada = manifesto && manifesto.arquivos[chaveEstatica(url, manifesto)];
+            if (!entrada) {
+                return undefined;
+            }
+            const response = await fetch(`${API_STATIC_URL}/${entrada.arquivo}`);
+            return response.ok ? await response.json() : undefined;
+        } catch (e) {
+            console.warn(`APIClient.getEstatico: falha na origem estática para ${url}, usando a API`, e);
+            return undefined;
+        }
+    }
+
     async get(url) {
         try {
             // Adicionar parâmetro estado se houver filtro ativo
             const separator = url.includes('?') ? '&' : '?';
             const estadoParam = estadoSelecionado ? `${separator}estado=${encodeURIComponent(estadoSelecionado)}` : '';
             const fullUrl = `${API_BASE_URL}${url}${estadoParam}`;
+
+            const estatico = await this.getEstatico(`${url}${estadoParam}`);
+            if (estatico !== undefined) {
+                return estatico;
+            }
             
             console.log(`APIClient.get: Buscando ${fullUrl}`);
             
@@ -104,6 +167,35 @@ class APIClient {
         }
     }
     
+    /**
+     * Avisos de nova geração da base (SSE em /atualizacoes). aoAtualizar(rotas, evento) é
+     * chamado após uma espera sorteada em [0, espalhar_ms), para que os clientes não busquem
+     * todos ao mesmo tempo; rotas = caminhos alterados (ex.: '/saldo/') ou null (tudo).
+     * Com origem estática, os arquivos só mudam em uma nova exportação: não assina.
+     */
+    assinarAtualizacoes(aoAtualizar) {
+        if (API_STATIC_URL || typeof EventSource === 'undefined') {
+            return null;
+        }
+        const fonte = new EventSource(`${API_BASE_URL}/atualizacoes`);
+        fonte.addEventListener('geracao', (mensagem) => {
+            let evento;
+            try {
+                evento = JSON.parse(mensagem.data);
+            } catch (e) {
+                console.warn('APIClient.assinarAtualizacoes: evento inválido', e);
+                return;
+            }
+            const rotas = Array.isArray(evento.secoes_alteradas)
+                ? evento.secoes_alteradas.map(caminho => caminho.replace(/^\/api/, ''))
+                : null;
+            const espera = Math.random() * (evento.espalhar_ms || 0);
+            console.log(`APIClient.assinarAtualizacoes: geração ${evento.geracao}, atualizando em ${Math.round(espera)} ms`, rotas);
+            setTimeout(() => aoAtualizar(rotas, evento), espera);
+        });
+        return fonte;
+    }
+
     // Métodos para gerenciar filtro de estado
     setEstadoFiltro(estado) {
         estadoSelecionado = estado ? estado.toUpperCase() : null;
@@ -136,6 +228,10 @@ class APIClient {
         return await this.get('/saldo/por-objeto');
     }
 
+    async getSaldoEvolucao(freq = 'M') {
+        return await this.get(`/saldo/evolucao?freq=${freq}`);
+    }
+
     // Mapas
     async getMapaNacional() {
         return await this.get('/mapas/nacional');
@@ -187,6 +283,14 @@ class APIClient {
         return await this.get('/indicadores/sla-subsidio-por-area');
     }
 
+    async getSLADistribuicao(metrica = 'sla', dimensao = 'area', limite = null) {
+        const params = new URLSearchParams({ metrica, dimensao });
+        if (limite !== null) {
+            params.append('limite', limite);
+        }
+        return await this.get(`/indicadores/sla-distribuicao?${params.toString()}`);
+    }
+
     async getCasosObjetosPorUf() {
         return await this.get('/indicadores/casos-objetos-por-uf');
     }
@@ -2,6 +2,39 @@
  * Controle de Scroll e Lazy Loading
  */
 
+// Rotas da API lidas por cada seção (para recarregar só o que mudou em uma nova geração da base)
+const ROTAS_POR_SECAO = {
+    'entradas-encerrados': ['/entradas/por-objeto', '/encerramentos/por-objeto'],
+    'saldo-entradas-encerramentos': ['/saldo/', '/saldo/por-objeto'],
+    'entradas-objeto': ['/entradas/por-objeto'],
+    'encerrados-objeto': ['/encerramentos/por-objeto'],
+    'estatisticas-gerais': ['/indicadores/estatisticas-gerais'],
+    'dashboard-acoes-ganhas-perdidas': ['/indicadores/acoes-ganhas-perdidas'],
+    'evolucao': ['/indicadores/evolucao'],
+    'mapa-nacional': ['/mapas/nacional', '/mapas/capitais', '/mapas/cidades-por-uf'],
+    'objeto-estado-mapa': ['/indicadores/objeto-por-estado', '/mapas/nacional', '/mapas/capitais', '/mapas/cidades-por-uf'],
+    'objeto-estado': ['/indicadores/objeto-por-estado'],
+    'tempo-medio': ['/indicadores/tempo-medio'],
+    'casos-impacto': ['/indicadores/casos-impacto'],
+    'sla-area': ['/indicadores/sla-area', '/indicadores/solicitacoes-prazo', '/indicadores/solicitacoes-prazo-por-area'],
+    'solicitacoes-prazo': ['/indicadores/solicitacoes-prazo'],
+    'volume-custo': ['/indicadores/volume-custo'],
+    'reiteracoes': ['/indicadores/reiteracoes'],
+    'pareto-impacto': ['/indicadores/pareto'],
+    'distribuicao-casos-uf': ['/indicadores/casos-objetos-por-uf'],
+    'casos-criticos-sentencas': ['/indicadores/casos-criticos', '/indicadores/sentencas', '/indicadores/sentencas-por-area'],
+    'casos-criticos': ['/indicadores/casos-criticos', '/indicadores/sentencas-por-area'],
+    'sentencas': ['/indicadores/sentencas'],
+    'reincidencia': ['/indicadores/reincidencia', '/indicadores/reincidencia-por-cliente'],
+    'tipos-acoes-reincidencia': ['/indicadores/tipos-acoes-2025', '/indicadores/reincidencia', '/indicadores/reincidencia-por-cliente'],
+    'tipos-acoes-2025': ['/indicadores/tipos-acoes-2025'],
+    'erro-sistemico-prejuizo': ['/indicadores/erro-sistemico'],
+    'erro-sistemico': ['/indicadores/erro-sistemico'],
+    'maior-reiteracao': ['/indicadores/maior-reiteracao'],
+    'kpis-finais': ['/indicadores/kpis-finais'],
+    'slide-analise-impacto': ['/indicadores/analise-correlacao'],
+};
+
 class ScrollController {
     constructor() {
         this.loadedSections = new Set();
@@ -104,6 +137,9 @@ class ScrollController {
         const secEntradas = document.getElementById('entradas-encerrados');
         if (secEntradas) this.loadSectionData(secEntradas);
 
+        // Nova geração da base: recarregar só as seções cujas rotas mudaram
+        api.assinarAtualizacoes((rotas) => this.atualizarSecoes(rotas));
+
         // Event listeners para filtros de reincidência
         this.setupReincidenciaFilters();
         // Event listeners para filtros de casos críticos
@@ -316,6 +352,31 @@ class ScrollController {
         }
     }
 
+    /**
+     * Seções já carregadas que leem alguma das rotas alteradas (rotas null = todas): as
+     * visíveis recarregam agora; as demais voltam a carregar quando entrarem na tela.
+     */
+    atualizarSecoes(rotas) {
+        const afetadas = [...this.loadedSections].filter(sectionId => {
+            if (rotas === null) {
+                return true;
+            }
+            const lidas = ROTAS_POR_SECAO[sectionId] || [];
+            return lidas.some(rota => rotas.includes(rota));
+        });
+        afetadas.forEach(sectionId => {
+            this.loadedSections.delete(sectionId);
+            const section = document.getElementById(sectionId);
+            if (!section) {
+                return;
+            }
+            const rect = section.getBoundingClientRect();
+            if (rect.bottom > 0 && rect.top < window.innerHeight && rect.width > 0) {
+                this.loadSectionData(section).then(() => this.loadedSections.add(sectionId));
+            }
+        });
+    }
+
     async loadSectionData(section) {
         const sectionId = section.id;
 
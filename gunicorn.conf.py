@@ -0,0 +1,75 @@
+"""
+Configuração do gunicorn (usada por Procfile, start.sh e render.yaml)
+Prepara o diretório compartilhado das métricas Prometheus entre os workers.
+
+PRELOAD=1: o master importa o app, carrega a base, compacta as colunas de texto em
+categóricas (só arrays numéricos), monta as estruturas derivadas e congela o GC antes do
+fork. Os workers herdam tudo por copy-on-write, sem recarregar nem duplicar as páginas;
+dashboard_process_memory_bytes{tipo="shared"|"private"} em /metrics mostra o efeito.
+Com preload, a verificação de atualização da base também roda só no master: numa nova
+geração ele relê a base e manda SIGHUP a si mesmo, e os workers novos herdam a geração
+(services/atualizacoes.py). Sem preload, um worker líder relê e os demais adotam o snapshot.
+"""
+
+import gc
+import os
+import shutil
+import sys
+import tempfile
+
+workers = int(os.getenv('WEB_CONCURRENCY', '4'))
+worker_class = 'uvicorn.workers.UvicornWorker'
+bind = f"0.0.0.0:{os.getenv('PORT', '8001')}"
+pythonpath = '.'
+preload_app = os.getenv('PRELOAD', '0') == '1'
+
+# Cada worker grava suas métricas neste diretório; /metrics agrega todos.
+# Precisa existir (e estar vazio) antes de importar prometheus_client; com preload o app é
+# importado antes de on_starting, então o diretório é preparado já na leitura da config
+# (uma vez por master: um reload da config não apaga os arquivos dos workers vivos).
+_multiproc_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'dashboard_metrics'))
+if os.environ.get('_DASHBOARD_METRICAS_PREPARADAS') != str(os.getpid()):
+    shutil.rmtree(_multiproc_dir, ignore_errors=True)
+    os.makedirs(_multiproc_dir, exist_ok=True)
+    os.environ['_DASHBOARD_METRICAS_PREPARADAS'] = str(os.getpid())
+
+
+def _modulo(nome):
+    """Módulo do app já importado (como 'services.x' ou 'backend.services.x')"""
+    return sys.modules.get(nome) or sys.modules.get(f'backend.{nome}')
+
+
+def when_ready(server):
+    """Com preload, roda no master depois de importar o app e antes do fork dos workers"""
+    if not preload_app:
+        return
+    data_loader = _modulo('services.data_loader')
+    cube = _modulo('services.cube')
+    if data_loader is None:
+        server.log.warning("preload: services.data_loader não foi importado pelo app")
+        return
+    loader = data_loader.get_loader()
+    loader.compactar()
+    if cube is not None:
+        cube.get_cube()
+    busca = _modulo('services.busca')
+    if busca is not None:
+        busca.get_indice_busca()
+    atualizacoes = _modulo('services.atualizacoes')
+    if atualizacoes is not None:
+        atualizacoes.iniciar_no_master(server.app.wsgi())
+    # Objetos vivos vão para a geração permanente: as coletas nos workers não escrevem
+    # nos cabeçalhos deles (o que copiaria as páginas)
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"preload: {len(loader._df)} registros carregados no master "
+                    f"({len(loader._colunas_compactas)} colunas compactadas)")
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+    except ImportError:
+        pass
@@ -3,4 +3,4 @@
 # Configura PYTHONPATH e inicia o servidor
 
 export PYTHONPATH="${PYTHONPATH}:."
-exec gunicorn backend.app:app -w 4 -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT --pythonpath .
+exec gunicorn backend.app:app -c gunicorn.conf.py
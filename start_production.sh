@@ -23,9 +23,7 @@ fi
 # Iniciar backend com gunicorn
 cd backend
 echo "✅ Iniciando servidor na porta 8001..."
-gunicorn app:app \
-    -w 4 \
-    -k uvicorn.workers.UvicornWorker \
+gunicorn app:app -c ../gunicorn.conf.py \
     --bind 0.0.0.0:8001 \
     --access-logfile - \
     --error-logfile - \